@@ -0,0 +1,53 @@
+"""
+Throughput benchmark of the validation of repeated identical elements (as found in large feeds, e.g. 
+the same identifiers and names with validity periods), with and without the cache of fulfilled constraints.
+
+Usage:
+    python benchmarks/bench_constraint_result_cache.py [elements]
+"""
+import sys
+import time
+import warnings
+import logging
+
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+from fhircraft.fhir.resources.validation import enable_constraint_result_cache, disable_constraint_result_cache
+
+PERIOD = {'start': '2020-01-01', 'end': '2024-12-31'}
+DISTINCT_ELEMENTS = [
+    ('Identifier', {'system': 'http://hospital.org/mrn', 'value': '12345', 'period': PERIOD}),
+    ('HumanName', {'family': 'Doe', 'given': ['John'], 'period': PERIOD}),
+    ('ContactPoint', {'system': 'phone', 'value': '555-1234', 'period': PERIOD}),
+    ('Address', {'city': 'Springfield', 'postalCode': '12345', 'period': PERIOD}),
+]
+
+
+def run(workload):
+    start = time.perf_counter()
+    for model, data in workload:
+        model.model_validate(data)
+    return len(workload) / (time.perf_counter() - start)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    warnings.simplefilter('ignore')
+    logging.disable(logging.DEBUG)
+    workload = [
+        (get_complex_FHIR_type(type_name), data) 
+            for _ in range(size // len(DISTINCT_ELEMENTS)) 
+                for type_name, data in DISTINCT_ELEMENTS
+    ]
+    print(f'{len(workload)} validations of {len(DISTINCT_ELEMENTS)} distinct elements')
+    before = run(workload)
+    cache = enable_constraint_result_cache()
+    try:
+        after = run(workload)
+    finally:
+        disable_constraint_result_cache()
+    print(f'without result cache: {before:9.1f} validations/s')
+    print(f'with result cache:    {after:9.1f} validations/s  (speed-up {after / before:4.1f}x, hit rate {cache.hit_rate:.1%})')
+
+
+if __name__ == '__main__':
+    main()
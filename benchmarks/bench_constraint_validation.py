@@ -0,0 +1,85 @@
+"""
+Throughput benchmark of the FHIRPath constraint validation of `Patient.model_validate` on the
+`test/static` example patients, with the constraint expressions parsed on every validation
+(as before) and with the cached compiled expressions.
+
+If the Patient profile cannot be downloaded, the complex-type elements of the example patients
+(names, identifiers, addresses, ...) are validated against the built-in complex types instead.
+
+Usage:
+    python benchmarks/bench_constraint_validation.py [repetitions]
+"""
+import sys
+import json
+import glob
+import time
+import os
+import warnings
+import logging
+
+import fhircraft.fhir.resources.validators as fhir_validators
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), '..', 'test', 'static', 'fhir-core-examples', 'R4B', 'patient-*.json')
+
+# Complex types of the Patient elements, used when the Patient profile is not available
+PATIENT_ELEMENT_TYPES = {
+    'identifier': 'Identifier',
+    'name': 'HumanName',
+    'telecom': 'ContactPoint',
+    'address': 'Address',
+    'maritalStatus': 'CodeableConcept',
+    'photo': 'Attachment',
+    'managingOrganization': 'Reference',
+    'generalPractitioner': 'Reference',
+    'meta': 'Meta',
+    'extension': 'Extension',
+}
+
+
+def load_workload():
+    patients = [json.load(open(path)) for path in sorted(glob.glob(EXAMPLES))]
+    try:
+        from fhircraft.fhir.resources.factory import construct_resource_model
+        Patient = construct_resource_model('http://hl7.org/fhir/StructureDefinition/Patient')
+        return 'Patient', [(Patient, patient) for patient in patients]
+    except Exception:
+        workload = []
+        for patient in patients:
+            for element, type_name in PATIENT_ELEMENT_TYPES.items():
+                model = get_complex_FHIR_type(type_name)
+                for value in patient.get(element, []) if isinstance(patient.get(element), list) else [patient.get(element)]:
+                    if value is not None:
+                        workload.append((model, value))
+        return 'Patient elements (offline)', workload
+
+
+def run(workload, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for model, data in workload:
+            model.model_validate(data)
+    return repetitions * len(workload) / (time.perf_counter() - start)
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    warnings.simplefilter('ignore')
+    logging.disable(logging.DEBUG)
+    name, workload = load_workload()
+    print(f'{name}: {len(workload)} validations x {repetitions} repetitions')
+
+    compiled = fhir_validators._compile_FHIRPath_expression
+    # Before: the constraint expressions are parsed on every evaluation
+    fhir_validators._compile_FHIRPath_expression = compiled.__wrapped__
+    try:
+        before = run(workload, repetitions)
+    finally:
+        fhir_validators._compile_FHIRPath_expression = compiled
+    after = run(workload, repetitions)
+    print(f'parsed on every evaluation: {before:9.1f} validations/s')
+    print(f'compiled once:              {after:9.1f} validations/s  (speed-up {after / before:4.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of the construction of the models of all the profiles of an Implementation Guide, comparing the sequential
+construction of each profile with the concurrent construction scheduled by the dependencies between the profiles.
+
+Each profile slices one of its elements into profiles published outside the IG, whose download is simulated with
+a fixed latency, as well as into profiles of the IG itself.
+
+Usage:
+    python benchmarks/bench_ig_build.py [profiles] [latency_ms]
+"""
+import sys
+import time
+import warnings
+import logging
+from unittest import mock
+
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.packages import PackageRegistry
+from fhircraft.fhir.resources.registry import ModelRegistry
+
+
+def structure_definition(name, slice_profiles=()):
+    return {
+        'resourceType': 'StructureDefinition', 'url': f'http://example.org/StructureDefinition/{name}', 'version': '1.0.0',
+        'name': name, 'type': 'Test', 'fhirVersion': '4.0.1',
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            *[{'id': f'Test.value{index}', 'path': f'Test.value{index}', 'min': 0, 'max': '1', 'type': [{'code': 'Coding'}]} for index in range(10)],
+            {'id': 'Test.item', 'path': 'Test.item', 'min': 0, 'max': '*', 'type': [{'code': 'string'}]},
+            *[
+                {'id': f'Test.item:slice{index}', 'path': 'Test.item', 'sliceName': f'slice{index}', 'min': 0, 'max': '1',
+                 'type': [{'code': 'string', 'profile': [f'http://example.org/StructureDefinition/{profile}']}]}
+                    for index, profile in enumerate(slice_profiles)
+            ],
+        ]}
+    }
+
+
+def implementation_guide(profiles):
+    return [
+        structure_definition(f'Profile{index}', [f'External{index}', *([f'Profile{index - 1}'] if index % 4 else [])])
+            for index in range(profiles)
+    ]
+
+
+def run(build, profiles, latency):
+    def http_get(url, headers=None):
+        time.sleep(latency)
+        response = mock.Mock()
+        response.json.return_value = structure_definition(url.rsplit('-', 1)[-1].removesuffix('.json'))
+        return response
+    with mock.patch.object(ResourceFactory, 'package_registry', PackageRegistry()), \
+         mock.patch.object(ResourceFactory, 'construction_cache', ModelRegistry()), \
+         mock.patch('fhircraft.fhir.resources.factory.http_get', http_get):
+        start = time.perf_counter()
+        result = build(ResourceFactory(), implementation_guide(profiles))
+        return time.perf_counter() - start, result
+
+
+def build_sequentially(factory, structure_definitions):
+    for structure_definition in structure_definitions:
+        factory.construct_resource_model(structure_definition['url'], structure_definition)
+
+
+def main():
+    profiles = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+    warnings.simplefilter('ignore')
+    logging.disable(logging.DEBUG)
+    print(f'Construction of {profiles} profiles, each with an external slice profile ({latency * 1000:.0f} ms download)')
+    # Warm up the imports and caches of the complex types
+    run(build_sequentially, profiles, 0)
+    before, _ = run(build_sequentially, profiles, latency)
+    after, builds = run(lambda factory, structure_definitions: factory.construct_resource_models(structure_definitions), profiles, latency)
+    print(f'sequential construction:            {before:6.2f} s')
+    print(f'scheduled concurrent construction:  {after:6.2f} s  (speed-up {before / after:4.1f}x)')
+    print('slowest profiles:')
+    for build in sorted(builds.values(), key=lambda build: build.duration, reverse=True)[:5]:
+        print(f'  {build.url.rsplit("/", 1)[-1]:<12} {build.duration * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Scaling benchmark of the parallel FHIRPath evaluation over 1/2/4/8 worker processes.
+
+Usage:
+    python benchmarks/bench_parallel_fhirpath.py [number of resources]
+"""
+import sys
+import time
+
+from fhircraft.fhir.path.parallel import evaluate_in_parallel
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+EXPRESSION = "coding.where(system = 'http://loinc.org').code"
+
+
+def make_resources(count):
+    CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+    Coding = get_complex_FHIR_type('Coding')
+    return [
+        CodeableConcept.model_construct(
+            text=f'concept-{n}',
+            coding=[
+                Coding.model_construct(system='http://loinc.org', code=f'{n}-{k}') if k % 2 else
+                Coding.model_construct(system='http://snomed.info/sct', code=f'{n}-{k}')
+                    for k in range(8)
+            ],
+        ) for n in range(count)
+    ]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    resources = make_resources(count)
+    expression = parse(EXPRESSION)
+
+    start = time.perf_counter()
+    expected = [[item.value for item in expression.find(resource)] for resource in resources]
+    sequential = time.perf_counter() - start
+    print(f'{count} resources, expression: {EXPRESSION}')
+    print(f'sequential find():  {sequential:7.2f} s')
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        result = list(evaluate_in_parallel(expression, resources, max_workers=workers))
+        elapsed = time.perf_counter() - start
+        assert result == expected
+        print(f'{workers} worker(s):        {elapsed:7.2f} s  (speed-up {sequential / elapsed:4.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Throughput benchmark of the validation of heavily sliced elements (as found in profiles such as the mCODE 
+observations), comparing the discriminator-based dispatch of the elements to their slice models with the 
+trial validation against each slice model in turn.
+
+Usage:
+    python benchmarks/bench_slice_dispatch.py [slices] [resources]
+"""
+import sys
+import time
+import warnings
+import logging
+
+from fhircraft.utils import get_all_models_from_field
+from fhircraft.fhir.resources.base import FHIRSliceModel
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+
+def structure_definition(slices, discriminated):
+    slicing = {'slicing': {'discriminator': [{'type': 'value', 'path': 'code'}], 'rules': 'open'}} if discriminated else {}
+    elements = [
+        {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+        {'id': 'Test.coding', 'path': 'Test.coding', 'min': 0, 'max': '*', 'type': [{'code': 'Coding'}], **slicing},
+    ]
+    for index in range(slices):
+        elements += [
+            {'id': f'Test.coding:slice{index}', 'path': 'Test.coding', 'min': 0, 'max': '1', 'type': [{'code': 'Coding'}]},
+            {'id': f'Test.coding:slice{index}.code', 'path': 'Test.coding.code', 'min': 1, 'max': '1', 'type': [{'code': 'code'}], 'fixedCode': f'code-{index}'},
+        ]
+    return {'resourceType': 'StructureDefinition', 'url': f'http://example.org/StructureDefinition/Test{int(discriminated)}', 
+            'name': 'TestProfile', 'type': 'Test', 'fhirVersion': '4.0.1', 'version': '1', 'snapshot': {'element': elements}}
+
+
+def construct_model(slices, discriminated):
+    ResourceFactory.construction_cache.invalidate(structure_definition(slices, discriminated)['url'])
+    model = ResourceFactory().construct_resource_model(structure_definition=structure_definition(slices, discriminated))
+    namespace = {'Extension': get_complex_FHIR_type('Extension')}
+    for slice_model in get_all_models_from_field(model.model_fields['coding'], issubclass_of=FHIRSliceModel):
+        slice_model.model_rebuild(_types_namespace=namespace)
+    model.model_rebuild(_types_namespace=namespace)
+    return model
+
+
+def run(model, data, resources):
+    start = time.perf_counter()
+    for _ in range(resources):
+        model.model_validate(data)
+    return resources / (time.perf_counter() - start)
+
+
+def main():
+    slices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    resources = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    warnings.simplefilter('ignore')
+    logging.disable(logging.DEBUG)
+    data = {'coding': [{'system': 'http://example.org', 'code': f'code-{index}'} for index in range(slices)]}
+    print(f'{resources} validations of resources with {slices} sliced elements')
+    before = run(construct_model(slices, discriminated=False), data, resources)
+    after = run(construct_model(slices, discriminated=True), data, resources)
+    print(f'trial validation (left-to-right):  {before:9.1f} resources/s')
+    print(f'discriminator-based dispatch:      {after:9.1f} resources/s  (speed-up {after / before:4.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
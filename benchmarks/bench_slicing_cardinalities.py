@@ -0,0 +1,52 @@
+"""
+Throughput benchmark of the validation of the slicing cardinalities of heavily sliced elements (as found
+in profiles such as the mCODE observations, slicing e.g. their components and codings), comparing the
+cached single-pass classification with the former per-slice counting.
+
+Usage:
+    python benchmarks/bench_slicing_cardinalities.py [slices] [values]
+"""
+import sys
+import time
+from typing import List, Optional, Union
+
+from pydantic import create_model
+
+from fhircraft.utils import get_all_models_from_field
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
+from fhircraft.fhir.resources.validators import validate_slicing_cardinalities
+
+
+def validate_slicing_cardinalities_per_slice(cls, values, field_name):
+    slices = get_all_models_from_field(cls.model_fields[field_name], issubclass_of=FHIRSliceModel)
+    for slice in slices:
+        slice_instances_count = sum([isinstance(value, slice) for value in values])
+        assert slice.min_cardinality <= slice_instances_count <= slice.max_cardinality
+    return values
+
+
+def run(validator, model, values, repetitions=200):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        validator(model, values, field_name='component')
+    return repetitions / (time.perf_counter() - start)
+
+
+def main():
+    slices_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    values_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    slices = [
+        type(f'Slice{index}', (FHIRSliceModel,), {'min_cardinality': 0, 'max_cardinality': values_count})
+            for index in range(slices_count)
+    ]
+    model = create_model('SlicedModel', __base__=FHIRBaseModel, component=(Optional[List[Union[tuple(slices)]]], None))
+    values = [slices[index % slices_count]() for index in range(values_count)]
+    print(f'{values_count} values across {slices_count} slices')
+    before = run(validate_slicing_cardinalities_per_slice, model, values)
+    after = run(validate_slicing_cardinalities, model, values)
+    print(f'per-slice counting:          {before:9.1f} validations/s')
+    print(f'single-pass classification:  {after:9.1f} validations/s  (speed-up {after / before:4.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
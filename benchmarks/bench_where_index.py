@@ -0,0 +1,43 @@
+"""
+Benchmark of repeated `where()` equality lookups on a large repeated element, answered
+by the hash index versus a linear scan.
+
+Usage:
+    python benchmarks/bench_where_index.py [number of entries]
+"""
+import sys
+import time
+
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.path.engine.core import Invocation
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    Coding = get_complex_FHIR_type('Coding')
+    resource = get_complex_FHIR_type('CodeableConcept').model_construct(coding=[
+        Coding.model_construct(system=f'http://system.org/{n}', code=str(n)) for n in range(count)
+    ])
+    expressions = [parse(f"coding.where(system = 'http://system.org/{n}').code") for n in range(0, count, count // 50)]
+
+    start = time.perf_counter()
+    indexed = [expression.get_value(resource) for expression in expressions]
+    elapsed_indexed = time.perf_counter() - start
+
+    # Linear scan: bypass the indexed fast path by evaluating the segments separately
+    start = time.perf_counter()
+    linear = []
+    for expression in expressions:
+        filtered = expression.left.right.evaluate(expression.left.left.find(resource))
+        linear.append(expression._get_collection_value(expression.right.evaluate(filtered, create=False)))
+    elapsed_linear = time.perf_counter() - start
+
+    assert indexed == linear
+    print(f'{len(expressions)} lookups over {count} entries')
+    print(f'linear scan:   {elapsed_linear:7.3f} s')
+    print(f'hash index:    {elapsed_indexed:7.3f} s  (speed-up {elapsed_linear / elapsed_indexed:5.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Persistent on-disk cache of the content downloaded by Fhircraft (e.g. FHIR StructureDefinitions).
+
+The cached content is keyed by URL and (optional) version, and is shared by all processes using the same cache
+directory. Entries are served without any HTTP request until their time-to-live expires, after which they are
+revalidated with a conditional request (`If-None-Match`/`If-Modified-Since`) based on the `ETag` and `Last-Modified`
+headers of the original response.
+
+The cache is disabled by default. It can be enabled by setting the `FHIRCRAFT_CACHE_DIR` (and optionally
+`FHIRCRAFT_CACHE_TTL`, in seconds) variables in the `.env` file, or programmatically via `configure_disk_cache`.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import typing
+import warnings
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import requests
+
+from fhircraft.transport import get_settings
+
+
+@dataclass
+class CacheEntry:
+    """
+    Content cached on disk, along with the information required for its revalidation.
+
+    Attributes:
+        url (str): The URL of the content.
+        version (Optional[str]): The version of the content, if any.
+        content (Any): The (JSON-serializable) content.
+        fetched_at (float): The time at which the content was last downloaded or revalidated, as a UNIX timestamp.
+        etag (Optional[str]): The `ETag` header of the response, if any.
+        last_modified (Optional[str]): The `Last-Modified` header of the response, if any.
+    """
+    url: str
+    version: typing.Optional[str]
+    content: typing.Any
+    fetched_at: float
+    etag: typing.Optional[str] = None
+    last_modified: typing.Optional[str] = None
+
+    def is_fresh(self, ttl: typing.Optional[float]) -> bool:
+        """
+        Checks whether the entry can be served without revalidation.
+        """
+        return ttl is None or time.time() - self.fetched_at < ttl
+
+    def get_conditional_headers(self) -> typing.Dict[str, str]:
+        """
+        Returns the headers of a conditional request revalidating the entry.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class DiskCache:
+    """
+    On-disk cache of downloaded content, keyed by URL and version.
+
+    Attributes:
+        directory (Path): The directory where the entries are stored, one JSON file per entry.
+        ttl (Optional[float]): The time (in seconds) during which entries are served without revalidation.
+                               If None, entries are never revalidated.
+    """
+
+    def __init__(self, directory: typing.Union[str, os.PathLike], ttl: typing.Optional[float] = None):
+        self.directory = Path(directory)
+        self.ttl = ttl
+
+    def _get_path(self, url: str, version: typing.Optional[str]) -> Path:
+        key = hashlib.sha256(f'{url}|{version or ""}'.encode()).hexdigest()
+        return self.directory / f'{key}.json'
+
+    def get_entry(self, url: str, version: typing.Optional[str] = None) -> typing.Optional[CacheEntry]:
+        """
+        Returns the cached entry of a URL and version, regardless of its freshness.
+
+        Args:
+            url (str): The URL of the content.
+            version (Optional[str]): The version of the content.
+
+        Returns:
+            Optional[CacheEntry]: The cached entry, or None if the content is not cached (or the entry is corrupted).
+        """
+        try:
+            return CacheEntry(**json.loads(self._get_path(url, version).read_text(encoding='utf-8')))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def store(self, entry: CacheEntry) -> None:
+        """
+        Stores an entry in the cache. The entry is written atomically, such that concurrent processes
+        sharing the cache directory never read a partially written entry.
+
+        Args:
+            entry (CacheEntry): The entry to store.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+                json.dump(asdict(entry), file)
+            os.replace(temporary_path, self._get_path(entry.url, entry.version))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def invalidate(self, url: str, version: typing.Optional[str] = None) -> None:
+        """
+        Removes the entry of a URL and version from the cache, if present.
+        """
+        self._get_path(url, version).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from the cache.
+        """
+        for path in self.directory.glob('*.json'):
+            path.unlink(missing_ok=True)
+
+    def fetch(self, url: str, download: typing.Callable[[typing.Dict[str, str]], requests.Response],
+              parse: typing.Optional[typing.Callable[[requests.Response], typing.Any]] = None,
+              version: typing.Optional[str] = None, 
+              get_version: typing.Optional[typing.Callable[[typing.Any], typing.Optional[str]]] = None) -> typing.Any:
+        """
+        Returns the content of a URL and version, serving it from the cache when fresh, revalidating it when stale,
+        and downloading it otherwise. If the server cannot be reached, stale content is served with a warning.
+
+        Args:
+            url (str): The URL of the content.
+            download (Callable[[Dict[str, str]], Response]): Sends the HTTP request, with the given additional headers.
+            parse (Optional[Callable[[Response], Any]]): Parses the content of the response. Defaults to parsing JSON.
+            version (Optional[str]): The requested version of the content.
+            get_version (Optional[Callable[[Any], Optional[str]]]): Extracts the version of the downloaded content. 
+                If provided, the content is cached under the version it actually has, and must match the requested version.
+
+        Returns:
+            Any: The content.
+
+        Raises:
+            requests.HTTPError: If the request fails.
+            ValueError: If the downloaded content does not have the requested version.
+        """
+        entry = self.get_entry(url, version)
+        if entry is not None and entry.is_fresh(self.ttl):
+            return entry.content
+        try:
+            response = download(entry.get_conditional_headers() if entry is not None else {})
+        except (requests.ConnectionError, requests.Timeout) as error:
+            if entry is None:
+                raise
+            warnings.warn(f'Could not revalidate the cached content of {url} ({error}). Using the cached content.')
+            return entry.content
+        if entry is not None and response.status_code == 304:
+            entry.fetched_at = time.time()
+            self.store(entry)
+            return entry.content
+        response.raise_for_status()
+        content = parse(response) if parse is not None else response.json()
+        content_version = get_version(content) if get_version is not None else version
+        # Unversioned requests are cached as the current content, in addition to its own version
+        for entry_version in dict.fromkeys([content_version] + ([None] if version is None else [])):
+            self.store(CacheEntry(
+                url=url, version=entry_version, content=content, fetched_at=time.time(),
+                etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+            ))
+        if version is not None and content_version != version:
+            raise ValueError(f'The content of {url} has version {content_version} instead of the requested version {version}')
+        return content
+
+
+# Cache configured programmatically, taking precedence over the settings of the `.env` file
+_configured_disk_cache: typing.Optional[DiskCache] = None
+
+
+def configure_disk_cache(directory: typing.Optional[typing.Union[str, os.PathLike]], ttl: typing.Optional[float] = None) -> typing.Optional[DiskCache]:
+    """
+    Enables the on-disk cache of downloaded content in a given directory.
+
+    Args:
+        directory (Optional[Union[str, PathLike]]): The cache directory. If None, the cache is configured from the settings again.
+        ttl (Optional[float]): The time (in seconds) during which entries are served without revalidation.
+
+    Returns:
+        Optional[DiskCache]: The configured cache.
+    """
+    global _configured_disk_cache
+    _configured_disk_cache = DiskCache(directory, ttl) if directory is not None else None
+    return _configured_disk_cache
+
+
+def get_disk_cache() -> typing.Optional[DiskCache]:
+    """
+    Returns the active on-disk cache, either configured programmatically or via the `FHIRCRAFT_CACHE_DIR`
+    and `FHIRCRAFT_CACHE_TTL` settings.
+
+    Returns:
+        Optional[DiskCache]: The active cache, or None if the cache is disabled.
+    """
+    if _configured_disk_cache is not None:
+        return _configured_disk_cache
+    settings = get_settings()
+    if not (directory := settings.get('FHIRCRAFT_CACHE_DIR')):
+        return None
+    ttl = settings.get('FHIRCRAFT_CACHE_TTL')
+    return DiskCache(directory, float(ttl) if ttl else None)
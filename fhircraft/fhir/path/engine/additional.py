@@ -64,12 +64,24 @@ class TypeChoice(FHIRPath):
     def evaluate(self, collection, *args, **kwargs):
         collection = ensure_list(collection)
         return  [
-            FHIRPathCollectionItem(getattr(item.value, field), path=Element(field), parent=item) 
+            FHIRPathCollectionItem(self._get_field_value(item.value, field), path=Element(field), parent=item) 
                 for item in collection
-                    for field in item.value.model_fields.keys() 
-                        if field.startswith(self.type_choice_name) and getattr(item.value, field) 
+                    for field in self._get_fields(item.value) 
+                        if field.startswith(self.type_choice_name) and self._get_field_value(item.value, field) 
         ]
 
+    @staticmethod
+    def _get_fields(value):
+        if isinstance(value, dict):
+            return [key for key in value.keys() if not key.startswith('_')]
+        return value.model_fields.keys()
+
+    @staticmethod
+    def _get_field_value(value, field):
+        if isinstance(value, dict):
+            return value.get(field)
+        return getattr(value, field)
+
     def __str__(self):
         return f'{self.type_choice_name}[x]'
 
@@ -134,6 +146,8 @@ class Resolve(FHIRPathFunction):
     """
     A representation of the FHIRPath [`resolve()`](https://build.fhir.org/fhirpath.html#functions) function.
     """
+    is_pure = False
+
     def evaluate(self, collection: List[FHIRPathCollectionItem], *args, **kwargs) -> List[FHIRPathCollectionItem]:
         """
         For each item in the collection, if it is a string that is a `uri` (or `canonical` or `url`), locate the target of the
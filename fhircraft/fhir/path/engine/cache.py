@@ -0,0 +1,284 @@
+"""
+The cache module provides a scoped memoization of the results of pure FHIRPath subexpressions, as well as
+the hash indexes used to answer equality filters on repeated elements.
+
+Within the scope of an evaluation cache (e.g. a single `model_validate` call), the result of a pure, context-free
+subexpression evaluated on the same input objects is computed only once, even if it is shared between different expressions.
+"""
+
+import typing
+from fhircraft.utils import ensure_list
+from pydantic import BaseModel
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_active_evaluation_cache: ContextVar[typing.Optional["EvaluationCache"]] = ContextVar('fhirpath_evaluation_cache', default=None)
+
+
+class EvaluationCache:
+    """
+    Memoization store of the results of pure FHIRPath subexpressions, keyed by the structure of the
+    subexpression and the identity of the objects in the input collection.
+
+    The input objects are referenced by the cache for its whole lifetime, such that their identities cannot be reused.
+
+    Attributes:
+        hits (int): Number of results retrieved from the cache.
+        misses (int): Number of results that had to be computed.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+        self._inputs = []
+
+    def key(self, expression: typing.Any, values: typing.List[typing.Any]) -> typing.Optional[tuple]:
+        """
+        Computes the cache key of the evaluation of an expression on a collection of values.
+
+        Args:
+            expression (FHIRPath): The FHIRPath expression.
+            values (List[Any]): The values of the input collection.
+
+        Returns:
+            key (Optional[tuple]): The cache key, or None if the evaluation cannot be cached because the expression is not pure
+                                   or the collection contains primitive values (whose identity is not unique).
+        """
+        signature = expression_signature(expression)
+        if signature is None:
+            return None
+        if not all(isinstance(value, (dict, list, BaseModel)) for value in values):
+            return None
+        return (signature, tuple(id(value) for value in values))
+
+    def memoize(self, expression: typing.Any, collection: typing.List[typing.Any], evaluate: typing.Callable) -> typing.Any:
+        """
+        Evaluates an expression on a collection, reusing the cached result if available.
+        Only non-collection results (e.g. booleans or integers) are cached, since collection items 
+        are bound to the context (parents) they were derived from.
+
+        Args:
+            expression (FHIRPath): The FHIRPath expression.
+            collection (List[FHIRPathCollectionItem]): The input collection.
+            evaluate (Callable): Function evaluating the expression on the collection if the result is not cached.
+
+        Returns:
+            result (Any): The result of the evaluation.
+        """
+        values = [getattr(item, 'value', item) for item in ensure_list(collection)]
+        key = self.key(expression, values)
+        if key is None:
+            return evaluate(collection)
+        result = self._results.get(key, _MISSING)
+        if result is not _MISSING:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = evaluate(collection)
+        if not isinstance(result, list):
+            self._results[key] = result
+            self._inputs.append(values)
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of the lookups that were answered from the cache.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return f'EvaluationCache(size={len(self)}, hits={self.hits}, misses={self.misses})'
+
+
+_MISSING = object()
+
+
+def get_evaluation_cache() -> typing.Optional[EvaluationCache]:
+    """
+    Returns the evaluation cache active in the current context, if any.
+    """
+    return _active_evaluation_cache.get()
+
+
+@contextmanager
+def evaluation_cache():
+    """
+    Context manager that activates an evaluation cache for the FHIRPath evaluations performed within its scope.
+    If a cache is already active, it is reused, such that nested scopes share their results.
+
+    Example:
+        ``` python
+        >>> with evaluation_cache() as cache:
+        ...     Observation.model_validate(data)
+        >>> cache.hit_rate
+        0.42
+        ```
+    """
+    cache = _active_evaluation_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    cache = EvaluationCache()
+    token = _active_evaluation_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _active_evaluation_cache.reset(token)
+
+
+def expression_signature(expression: typing.Any) -> typing.Optional[tuple]:
+    """
+    Computes a hashable structural signature of a FHIRPath expression, such that structurally identical
+    expressions share the same signature. The signature is stored on the expression object after the first call.
+
+    Args:
+        expression (FHIRPath): The FHIRPath expression.
+
+    Returns:
+        signature (Optional[tuple]): The signature of the expression, or None if the expression (or any of its
+                                     subexpressions) is not pure.
+    """
+    try:
+        return expression.__dict__['_signature']
+    except KeyError:
+        pass
+    if not getattr(expression, 'is_pure', True):
+        signature = None
+    else:
+        signature = _signature(expression)
+    expression.__dict__['_signature'] = signature
+    return signature
+
+
+def _signature(value: typing.Any) -> typing.Optional[typing.Any]:
+    if hasattr(value, 'evaluate') and hasattr(value, '__dict__'):
+        if not getattr(value, 'is_pure', True):
+            return None
+        attributes = []
+        for name, attribute in sorted(vars(value).items()):
+            if name.startswith('_'):
+                continue
+            attribute_signature = _signature(attribute)
+            if attribute_signature is None and attribute is not None:
+                return None
+            attributes.append((name, attribute_signature))
+        return (value.__class__, tuple(attributes))
+    if isinstance(value, (list, tuple)):
+        signatures = tuple(_signature(entry) for entry in value)
+        if any(signature is None and entry is not None for signature, entry in zip(signatures, value)):
+            return None
+        return (type(value), signatures)
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value), repr(value))
+    return (type(value), value)
+
+
+_mutation_epoch = 0
+
+def notify_mutation() -> None:
+    """
+    Signals that a model has been modified in place, invalidating all element indexes built so far.
+    """
+    global _mutation_epoch
+    _mutation_epoch += 1
+
+
+class ElementIndexCache:
+    """
+    Bounded LRU cache of hash indexes over repeated elements, mapping the value of a child element 
+    of the list entries to the positions of the entries in the list.
+
+    An index is reused as long as the list has the same length and the same first and last entries, and
+    no model has been modified in place since the index was built. These checks are constant-time, such that
+    reusing an index does not require a pass over the list. Lists whose entries are replaced in place
+    (e.g. `values[1] = entry`) must be signalled with `notify_mutation()`.
+
+    Attributes:
+        maxsize (int): Maximal number of indexes kept in the cache.
+        hits (int): Number of lookups answered by a cached index.
+        misses (int): Number of lookups that required building the index.
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._indexes = OrderedDict()
+
+    def lookup(self, values: list, label: str) -> typing.Optional[dict]:
+        """
+        Returns the index of the entries of a list by the value of their child element `label`.
+
+        Args:
+            values (list): The list of entries.
+            label (str): The name of the child element to index.
+
+        Returns:
+            index (Optional[dict]): Mapping of the child values to the positions of the entries, or None if the
+                                    entries cannot be indexed (e.g. they are not models or their child values are not hashable).
+        """
+        key = (id(values), label)
+        guard = self._get_guard(values)
+        cached = self._indexes.get(key)
+        if cached is not None:
+            cached_values, cached_guard, epoch, index = cached
+            if cached_values is values and epoch == _mutation_epoch and cached_guard == guard:
+                self._indexes.move_to_end(key)
+                self.hits += 1
+                return index
+        self.misses += 1
+        index = self._build_index(values, label)
+        # Keep a reference to the list, such that its identity cannot be reused while cached
+        self._indexes[key] = (values, guard, _mutation_epoch, index)
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.maxsize:
+            self._indexes.popitem(last=False)
+        return index
+
+    @staticmethod
+    def _get_guard(values: list) -> tuple:
+        # Detects appended, removed or replaced boundary entries without scanning the list
+        if not values:
+            return (0, None, None)
+        return (len(values), id(values[0]), id(values[-1]))
+
+    @staticmethod
+    def _build_index(values: list, label: str) -> typing.Optional[dict]:
+        index = {}
+        for position, entry in enumerate(values):
+            if entry is None:
+                continue
+            if not isinstance(entry, BaseModel):
+                return None
+            child = getattr(entry, label, None)
+            if isinstance(child, list):
+                # Only single-item collections can be equal to a single literal 
+                if len(child) != 1:
+                    continue
+                child = child[0]
+            if child is None:
+                continue
+            try:
+                index.setdefault(child, []).append(position)
+            except TypeError:
+                return None
+        return index
+
+    def clear(self) -> None:
+        """
+        Removes all indexes from the cache.
+        """
+        self._indexes.clear()
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+element_index_cache = ElementIndexCache()
@@ -2,16 +2,46 @@ import logging
 from itertools import *  # noqa
 from fhircraft.utils import ensure_list, contains_list_type, get_fhir_model_from_field
 from fhircraft.fhir.path.utils import import_fhirpath_engine 
+from fhircraft.fhir.path.engine.cache import get_evaluation_cache, notify_mutation
 
 import typing
 from typing import List, Optional
 from abc import ABC
 from dataclasses import dataclass, field
-from functools import partial
+from functools import partial, lru_cache
 
 # Get logger name
 logger = logging.getLogger(__name__)
 
+FHIR_PRIMITIVE_TYPE_NAMES = (
+    'Boolean', 'Integer', 'Integer64', 'String', 'Decimal', 'Uri', 'Url', 'Canonical', 'Base64Binary', 'Instant', 
+    'Date', 'DateTime', 'Time', 'Code', 'Oid', 'Id', 'Markdown', 'UnsignedInt', 'PositiveInt', 'Uuid',
+)
+
+@lru_cache(maxsize=None)
+def _is_FHIR_type_name(name: str) -> bool:
+    """
+    Checks whether a string is the name of a FHIR data type, as used in the suffixes of type-choice element names.
+
+    Args:
+        name (str): The name to check.
+
+    Returns:
+        bool: True if the name is a FHIR primitive or complex data type name.
+    """
+    if not name[:1].isupper():
+        return False
+    if name in FHIR_PRIMITIVE_TYPE_NAMES:
+        return True
+    from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+    from pydantic import BaseModel
+    for release in ('R4', 'R4B', 'R5'):
+        complex_type = get_complex_FHIR_type(name, release)
+        if isinstance(complex_type, type) and issubclass(complex_type, BaseModel):
+            return True
+    return False
+
+
 class FHIRPathError(Exception):
     """
     An exception related to FHIRPath specific syntax or runtime criteria.
@@ -185,7 +215,12 @@ class FHIRPath(ABC):
     """
     Abstract base class representing a FHIRPath, used for navigating and manipulating
     FHIR resources.
+
+    Attributes:
+        is_pure (bool): Whether the result of the evaluation depends only on the values of the input collection. 
+                        Results of pure subexpressions can be memoized within an evaluation cache.
     """
+    is_pure: typing.ClassVar[bool] = True
     
     def get_value(self, data):
         """
@@ -197,14 +232,44 @@ class FHIRPath(ABC):
         Returns:
             (Any): The extracted value(s), or None if no values are found.
         """
-        collection = self.find(data)
-        values = [item.value for item in collection if item.value and not isinstance(item.value, bool)]
+        return self._get_collection_value(self.find(data))
+
+    @staticmethod
+    def _get_collection_value(collection: typing.Union[List[FHIRPathCollectionItem], bool, int]) -> typing.Any:
+        """
+        Extracts the value(s) from an evaluated collection.
+
+        Args:
+            collection (Union[List[FHIRPathCollectionItem], bool, int]): The evaluated collection.
+
+        Returns:
+            (Any): The extracted value(s), or None if no values are found.
+        """
+        if not isinstance(collection, (list, FHIRPathCollectionItem)):
+            # Functions such as `exists()` or `count()` yield a bare value instead of a collection
+            return collection
+        values = [
+            item.value for item in map(FHIRPathCollectionItem.wrap, ensure_list(collection))
+                if item.value and not isinstance(item.value, bool)
+        ]
         if len(values) == 1:
             values = values[0]
         elif len(values) == 0:
             return None
         return values        
 
+    def values_many(self, resources: typing.Iterable[typing.Any]) -> List[typing.Any]:
+        """
+        Extracts the value(s) from each of the given resources.
+
+        Args:
+            resources (Iterable[Any]): The resources from which to extract values.
+
+        Returns:
+            (List[Any]): The extracted value(s) for each resource, in the same order as the input resources.
+        """
+        return [self._get_collection_value(collection) for collection in self.find_many(resources)]
+
 
     def find(self, collection: typing.Any) -> List[FHIRPathCollectionItem]:
         """
@@ -220,6 +285,27 @@ class FHIRPath(ABC):
         collection = [FHIRPathCollectionItem.wrap(item) for item in ensure_list(collection)]
         return self.evaluate(collection, create=False)
 
+    def find_many(self, resources: typing.Iterable[typing.Any]) -> List[typing.Union[List[FHIRPathCollectionItem], bool, int]]:
+        """
+        Finds and returns the collections of FHIRPathCollectionItem instances for each of the input resources.
+
+        Each resource is treated as an independent root collection. The expression is evaluated level-by-level 
+        across the whole batch, i.e. each path segment is evaluated for all resources before moving on to the next one.
+
+        Args:
+            resources (Iterable[Any]): The input resources to search.
+
+        Returns:
+            List[Union[List[FHIRPathCollectionItem], bool, int]]: The result for each resource, as returned by `find`. 
+                Expressions ending in a function such as `exists()` or `count()` yield a bare boolean or integer per resource.
+        """
+        # Ensure that entrypoints are FHIRPathCollectionItem instances
+        collections = [
+            [FHIRPathCollectionItem.wrap(item) for item in ensure_list(resource)]
+                for resource in resources
+        ]
+        return self.evaluate_many(collections, create=False)
+
     def find_or_create(self, collection) -> List[FHIRPathCollectionItem]:
         """
         Finds or creates and returns a collection of FHIRPathCollectionItem instances from the input collection.
@@ -279,6 +365,22 @@ class FHIRPath(ABC):
         """
         raise NotImplementedError()        
 
+    def evaluate_many(self, collections: typing.Iterable[List[FHIRPathCollectionItem]], create: bool) -> List[typing.Any]:
+        """
+        Evaluates multiple independent collections and returns the resulting collection for each of them.
+
+        By default each collection is evaluated separately. Subclasses can override this method to process 
+        the items of all collections in a single pass.
+
+        Args:
+            collections (Iterable[List[FHIRPathCollectionItem]]): The input collections to evaluate.
+            create (bool): Flag indicating whether to create new items if they do not exist.
+
+        Returns:
+            List[Any]: The resulting collection (or boolean/integer value) for each of the input collections.
+        """
+        return [self.evaluate(collection, create) for collection in collections]
+
     def child(self, child):
         """
         Returns the child of this FHIRPath instance with some canonicalization.
@@ -321,6 +423,8 @@ class Element(FHIRPath):
     Attributes:
         label (str): The name of the element.
     """
+    PRIMITIVE_EXTENSION_ELEMENTS = ('id', 'extension')
+
     def __init__(self, label: str):
         self.label = label
 
@@ -364,7 +468,14 @@ class Element(FHIRPath):
             label (str): The label of the element to set.
         """
         parent = item.value
-        parents = getattr(parent, label)
+        if isinstance(parent, dict):
+            key = Element(label).get_dict_key(parent)
+            parents = parent.get(key)
+            if not isinstance(parents, list):
+                parent[key] = value
+                return
+        else:
+            parents = getattr(parent, label)
         if not isinstance(parents, list):
             setattr(parent, label, value)
         else:
@@ -372,6 +483,10 @@ class Element(FHIRPath):
                 parents.insert(index, value)
             else:                
                 parents[index] = value
+            # Track the modification of the list for the incremental revalidation of the parent model
+            if (mark_modified := getattr(parent, 'mark_modified', None)) is not None:
+                mark_modified(label)
+            notify_mutation()
         
 
     def evaluate(self, collection: List[FHIRPathCollectionItem], create: bool) -> List[FHIRPathCollectionItem]:
@@ -385,27 +500,154 @@ class Element(FHIRPath):
         Returns:
             List[FHIRPathCollectionItem]: A list of FHIRPathCollectionItems after evaluation.
         """
-        collection = ensure_list(collection)
         element_collection = []
-        for item in collection:
-            if not item.value:
-                continue
-            element_value = getattr(item.value, self.label, None)         
-            if not element_value and not isinstance(element_value, bool) and create:
-                element_value = self.create_element(item.value)  
-                setattr(item.value, self.label, element_value)  
-            for index, value in enumerate(ensure_list(element_value)):
-                if create or value is not None: 
-                    element = FHIRPathCollectionItem(
-                        value, 
-                        path=Element(self.label), 
-                        parent=item, 
-                        setter=partial(self.setter, item=item, index=index, label=self.label)
-                    )
-                    # element.set_value(value)
-                    element_collection.append(element)
+        for item in ensure_list(collection):
+            self._evaluate_item(item, create, element_collection)
         return element_collection
 
+    def evaluate_many(self, collections: typing.Iterable[List[FHIRPathCollectionItem]], create: bool) -> List[List[FHIRPathCollectionItem]]:
+        """ 
+        Evaluate the element for multiple independent collections. The items of all collections are flattened 
+        and evaluated in a single loop, after which the resulting items are split back by input collection.
+
+        Args:
+            collections (Iterable[List[FHIRPathCollectionItem]]): The input collections to evaluate.
+            create (bool): A flag indicating whether to create new elements if they do not exist.
+
+        Returns:
+            List[List[FHIRPathCollectionItem]]: The resulting collection for each of the input collections.
+        """
+        # Flatten the items of all collections, keeping track of the collection they belong to
+        items, owners, size = [], [], 0
+        for owner, collection in enumerate(collections):
+            collection = ensure_list(collection)
+            items.extend(collection)
+            owners.extend([owner] * len(collection))
+            size = owner + 1
+        # Evaluate all items in a single loop
+        elements, element_owners = [], []
+        for item, owner in zip(items, owners):
+            count = len(elements)
+            self._evaluate_item(item, create, elements)
+            element_owners.extend([owner] * (len(elements) - count))
+        # Split the resulting items back by input collection
+        element_collections = [[] for _ in range(size)]
+        for element, owner in zip(elements, element_owners):
+            element_collections[owner].append(element)
+        return element_collections
+
+    def _evaluate_item(self, item: FHIRPathCollectionItem, create: bool, element_collection: List[FHIRPathCollectionItem]) -> None:
+        """ 
+        Evaluate the element for a single collection item and append the resulting items to the output collection.
+
+        Args:
+            item (FHIRPathCollectionItem): The collection item to evaluate.
+            create (bool): A flag indicating whether to create new elements if they do not exist.
+            element_collection (List[FHIRPathCollectionItem]): The output collection.
+        """
+        if not item.value:
+            return
+        if isinstance(item.value, dict):
+            return self._evaluate_dict_item(item, create, element_collection)
+        element_value = getattr(item.value, self.label, None)         
+        if element_value is None and self.label in self.PRIMITIVE_EXTENSION_ELEMENTS:
+            element_value = self._get_primitive_extension_value(item)
+        if not element_value and not isinstance(element_value, bool) and create:
+            element_value = self.create_element(item.value)  
+            setattr(item.value, self.label, element_value)  
+        for index, value in enumerate(ensure_list(element_value)):
+            if create or value is not None: 
+                element_collection.append(self.collection_item(item, index, value))
+
+    def collection_item(self, parent: FHIRPathCollectionItem, index: int, value: typing.Any) -> FHIRPathCollectionItem:
+        """ 
+        Create the collection item of an element value of a parent item.
+
+        Args:
+            parent (FHIRPathCollectionItem): The parent collection item.
+            index (int): The index of the value in the parent's element.
+            value (Any): The element value.
+
+        Returns:
+            FHIRPathCollectionItem: The collection item.
+        """
+        return FHIRPathCollectionItem(
+            value, 
+            path=Element(self.label), 
+            parent=parent, 
+            setter=partial(self.setter, item=parent, index=index, label=self.label)
+        )
+
+    def get_dict_key(self, data: dict) -> typing.Optional[str]:
+        """ 
+        Determine the key of a JSON object (dictionary) that holds the element.
+
+        Besides the plain element name, the following JSON representations are supported:
+
+        - Primitive extension placeholders (e.g. `status_ext`) are stored under the `_`-prefixed key (e.g. `_status`).
+        - Type-choice elements (e.g. `value`) are stored under the key of the chosen type (e.g. `valueQuantity`).
+
+        Args:
+            data (dict): The JSON object.
+
+        Returns:
+            key (Optional[str]): The key of the element, or None if the object does not contain the element.
+        """
+        if self.label in data:
+            return self.label
+        if self.label.endswith('_ext'):
+            key = '_' + self.label[:-4]
+            return key if key in data else None
+        offset = len(self.label)
+        for key in data:
+            if key.startswith(self.label) and _is_FHIR_type_name(key[offset:]):
+                return key
+        return None
+
+    def _evaluate_dict_item(self, item: FHIRPathCollectionItem, create: bool, element_collection: List[FHIRPathCollectionItem]) -> None:
+        """ 
+        Evaluate the element for a single collection item whose value is a JSON object (dictionary).
+
+        Args:
+            item (FHIRPathCollectionItem): The collection item to evaluate.
+            create (bool): A flag indicating whether to create new elements if they do not exist.
+            element_collection (List[FHIRPathCollectionItem]): The output collection.
+        """
+        key = self.get_dict_key(item.value)
+        element_value = item.value.get(key) if key else None
+        if element_value is None and create:
+            item.value[self.label] = None
+        is_list = isinstance(element_value, list)
+        for index, value in enumerate(ensure_list(element_value)):
+            if create or value is not None: 
+                element = FHIRPathCollectionItem(
+                    value, 
+                    path=Element(self.label), 
+                    index=index if is_list else None,
+                    parent=item, 
+                    setter=partial(self.setter, item=item, index=index, label=self.label)
+                )
+                element_collection.append(element)
+
+    def _get_primitive_extension_value(self, item: FHIRPathCollectionItem) -> typing.Any:
+        """ 
+        Retrieve the `id` or `extension` of a primitive value from the `_`-prefixed sibling key of its parent JSON object.
+
+        Args:
+            item (FHIRPathCollectionItem): The collection item of the primitive value.
+
+        Returns:
+            value (Any): The value of the element, or None if not available.
+        """
+        if item.parent is None or not isinstance(item.parent.value, dict) or not isinstance(item.path, Element):
+            return None
+        placeholder = item.parent.value.get('_' + item.path.label)
+        if isinstance(placeholder, list):
+            placeholder = placeholder[item.index] if item.index is not None and item.index < len(placeholder) else None
+        if isinstance(placeholder, dict):
+            return placeholder.get(self.label)
+        return None
+
     def __str__(self):
         return self.label
 
@@ -426,6 +668,8 @@ class Root(FHIRPath):
     A class representing the root of a FHIRPath, i.e. the top-most segment of the FHIRPath 
     whose collection has no parent associated.
     """
+    is_pure = False
+
     def evaluate(self, collection: List[FHIRPathCollectionItem], *args, **kwargs) -> List[FHIRPathCollectionItem]:
         """
         Evaluate the collection of top-most resources in the input collection.
@@ -463,6 +707,8 @@ class Parent(FHIRPath):
     """ 
     A class representing the parent of a FHIRPath
     """
+    is_pure = False
+
     def evaluate(self, collection: List[FHIRPathCollectionItem], *args, **kwargs) -> List[FHIRPathCollectionItem]:
         """
         Evaluate the collection of parent resources in the input collection.
@@ -507,6 +753,18 @@ class This(FHIRPath):
         """
         return ensure_list(collection)
 
+    def evaluate_many(self, collections: typing.Iterable[List[FHIRPathCollectionItem]], *args, **kwargs) -> List[List[FHIRPathCollectionItem]]:
+        """
+        Simply returns the input collections. 
+
+        Args:
+            collections (Iterable[List[FHIRPathCollectionItem]]): The input collections to evaluate.
+
+        Returns:
+            List[List[FHIRPathCollectionItem]]: The input collections.
+        """
+        return [ensure_list(collection) for collection in collections]
+
     def __str__(self):
         return '`this`'
 
@@ -545,10 +803,38 @@ class Invocation(FHIRPath):
         Returns:
             List[FHIRPathCollectionItem]: The resulting child collection after the evaluation process.
         """        
+        if not create and isinstance(self.right, FHIRPathFunction):
+            cache = get_evaluation_cache()
+            if cache is not None:
+                return cache.memoize(self, collection, self._evaluate)
+        return self._evaluate(collection, create)
+
+    def _evaluate(self, collection: List[FHIRPathCollectionItem], create: bool = False) -> List[FHIRPathCollectionItem]:
+        # Filters on repeated elements (e.g. `identifier.where(system='x')`) can be answered by a hash index
+        if not create and getattr(self.right, 'indexed_equality', None) is not None:
+            parent_path, element = (self.left.left, self.left.right) if isinstance(self.left, Invocation) else (None, self.left)
+            if isinstance(element, Element):
+                parent_collection = parent_path.evaluate(collection, create) if parent_path else ensure_list(collection)
+                return self.right.evaluate_indexed(element, parent_collection)
         parent_collection = self.left.evaluate(collection, create)
         child_collection = self.right.evaluate(parent_collection, create)
         return child_collection
 
+    def evaluate_many(self, collections: typing.Iterable[List[FHIRPathCollectionItem]], create: bool) -> List[typing.Any]:
+        """
+        Performs the evaluation of the Invocation for multiple independent collections, by applying the left-hand side 
+        FHIRPath segment to all collections before applying the right-hand side segment to all resulting parent collections.
+
+        Args:
+            collections (Iterable[List[FHIRPathCollectionItem]]): The collections on which the evaluation is performed.
+            create (bool): A boolean flag indicating whether to create any missing elements.
+
+        Returns:
+            List[Any]: The resulting child collection (or boolean/integer value) for each of the input collections.
+        """        
+        parent_collections = self.left.evaluate_many(collections, create)
+        return self.right.evaluate_many(parent_collections, create)
+
     def __eq__(self, other):
         return isinstance(other, Invocation) and self.left == other.left and self.right == other.right
 
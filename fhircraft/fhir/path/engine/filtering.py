@@ -1,8 +1,36 @@
 """The filtering module contains the object representations of the filtering-category FHIRPath functions."""
 
-from fhircraft.fhir.path.engine.core import FHIRPath, FHIRPathCollectionItem, FHIRPathFunction
+from fhircraft.fhir.path.engine.core import FHIRPath, FHIRPathCollectionItem, FHIRPathFunction, FHIRPathMixin, Element
+from fhircraft.fhir.path.engine.cache import element_index_cache
 from fhircraft.utils import ensure_list
-from typing import List, Optional,Union
+from typing import List, Optional, Union, Tuple, Any
+from decimal import Decimal
+
+# Types of the literals that can be looked up in a hash index
+INDEXABLE_LITERAL_TYPES = (str, int, float, Decimal)
+
+
+def _find_indexed_equality(expression: FHIRPath) -> Optional[Tuple[str, Any]]:
+    """
+    Finds an equality between a child element and a literal (`element = literal` or `literal = element`) 
+    within a criteria expression that is either the equality itself or a conjunction containing it.
+
+    Args:
+        expression (FHIRPath): The criteria expression.
+
+    Returns:
+        (Optional[Tuple[str, Any]]): The name of the child element and the literal, or None if not found.
+    """
+    from fhircraft.fhir.path.engine.equality import Equals
+    from fhircraft.fhir.path.engine.boolean import And
+    if isinstance(expression, Equals):
+        for element, literal in ((expression.left, expression.right), (expression.right, expression.left)):
+            if isinstance(element, Element) and isinstance(literal, INDEXABLE_LITERAL_TYPES):
+                return element.label, literal
+    elif isinstance(expression, And):
+        return _find_indexed_equality(expression.left) or _find_indexed_equality(expression.right)
+    return None
+
 
 
 class Where(FHIRPathFunction):
@@ -32,6 +60,45 @@ class Where(FHIRPathFunction):
         collection = ensure_list(collection)
         return [item for item in collection if self.expression.evaluate(item, create)]
 
+    @property
+    def indexed_equality(self) -> Optional[Tuple[str, Any]]:
+        """
+        The equality on a child element (e.g. `system = 'x'`) that can be used to look up the matching items 
+        in a hash index, if the criteria expression is such an equality or a conjunction (`and`) containing one.
+        """
+        try:
+            return self.__dict__['_indexed_equality']
+        except KeyError:
+            equality = self.__dict__['_indexed_equality'] = _find_indexed_equality(self.expression)
+            return equality
+
+    def evaluate_indexed(self, element: Element, parent_collection: List[FHIRPathCollectionItem]) -> List[FHIRPathCollectionItem]:
+        """
+        Evaluates the `where()` function on the repeated `element` of each item in the parent collection. 
+        For model items, the candidate entries are retrieved from a cached hash index over the element's entries 
+        and only the candidates are checked against the full criteria expression.
+
+        Args: 
+            element (Element): The filtered element.
+            parent_collection (List[FHIRPathCollectionItem])): The collection of the parents of the element.
+        
+        Returns:
+            List[FHIRPathCollectionItem]): The output collection.
+        """    
+        label, literal = self.indexed_equality
+        output_collection = []
+        for parent in parent_collection:
+            values = getattr(parent.value, element.label, None) if isinstance(parent.value, FHIRPathMixin) else None
+            index = element_index_cache.lookup(values, label) if isinstance(values, list) else None
+            if index is None:
+                output_collection.extend(self.evaluate(element.evaluate(parent, create=False)))
+                continue
+            for position in index.get(literal, ()):
+                item = element.collection_item(parent, position, values[position])
+                if self.expression.evaluate(item, create=False):
+                    output_collection.append(item)
+        return output_collection
+
     def __str__(self):
         return f'{self.__class__.__name__.lower()}({self.expression.__str__()})'
 
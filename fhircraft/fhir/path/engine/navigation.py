@@ -27,7 +27,11 @@ class Children(FHIRPathFunction):
             if isinstance(item.value, BaseModel):
                 fields = item.value.model_fields
             elif isinstance(item.value, dict):
-                fields = list(item.value.keys())
+                # Primitive extensions (e.g. `_status`) are children named as their model fields (e.g. `status_ext`)
+                fields = [
+                    f'{key[1:]}_ext' if key.startswith('_') else key 
+                        for key in item.value.keys() if key != 'resourceType'
+                ]
             else:
                 fields = []
             for field in fields:
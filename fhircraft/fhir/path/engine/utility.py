@@ -21,6 +21,8 @@ class Trace(FHIRPathFunction):
     Attributes:
         name  (str): Subtring query.
     """
+    is_pure = False
+
     def __init__(self, name: str, projection: Optional[FHIRPath] = None):
         self.name = name
         self.projection = projection
@@ -51,6 +53,8 @@ class Now(FHIRPathFunction):
     """
     A representation of the FHIRPath [`now()`](http://hl7.org/fhirpath/N1/#now-datetime) function.
     """
+    is_pure = False
+
     def evaluate(self, *args, **kwargs) -> int:
         """
         Returns the current date and time, including timezone offset.
@@ -67,6 +71,8 @@ class TimeOfDay(FHIRPathFunction):
     """
     A representation of the FHIRPath [`timeOfDay()`](http://hl7.org/fhirpath/N1/#timeOfDay-time) function.
     """
+    is_pure = False
+
     def evaluate(self, *args, **kwargs) -> int:
         """
         Returns the current time.
@@ -82,6 +88,8 @@ class Today(FHIRPathFunction):
     """
     A representation of the FHIRPath [`Today()`](http://hl7.org/fhirpath/N1/#today-date) function.
     """
+    is_pure = False
+
     def evaluate(self, *args, **kwargs) -> int:
         """
         Returns the current date.
@@ -0,0 +1,214 @@
+"""
+Parallel evaluation of FHIRPath expressions over large sets of resources.
+
+The input resources are sharded into batches that are distributed across a pool of worker processes.
+The compiled expression is shipped once to each worker when the pool is initialized, and every batch
+is evaluated with the batched `find_many` API. Results are streamed back in the order of the input.
+"""
+import os
+import json
+import typing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, count
+
+from fhircraft.fhir.path.engine.core import FHIRPath
+from fhircraft.fhir.path.parser import parse
+
+# Compiled expression and model of the current worker process
+_worker_expression: typing.Optional[FHIRPath] = None
+_worker_model: typing.Optional[type] = None
+
+
+def _initialize_worker(expression: FHIRPath, model: typing.Optional[type] = None) -> None:
+    """
+    Stores the compiled expression (and optional model) shipped to the worker process.
+
+    Args:
+        expression (FHIRPath): The compiled FHIRPath expression.
+        model (Optional[type]): The model used to validate raw resources before evaluation.
+    """
+    global _worker_expression, _worker_model
+    _worker_expression = expression
+    _worker_model = model
+
+
+def _collection_values(result: typing.Any) -> typing.Any:
+    """
+    Converts the result of an evaluation into plain values that can be sent back to the parent process.
+
+    Args:
+        result (Any): The evaluated collection, or a bare boolean/integer.
+
+    Returns:
+        (Any): The list of values of the collection items, or the bare boolean/integer.
+    """
+    if isinstance(result, list):
+        return [item.value for item in result]
+    return result
+
+
+def _evaluate_batch(resources: typing.List[typing.Any]) -> typing.List[typing.Any]:
+    """
+    Evaluates the worker's expression over a batch of resources.
+
+    Args:
+        resources (List[Any]): The batch of resources.
+
+    Returns:
+        (List[Any]): The values resulting for each resource.
+    """
+    if _worker_model is not None:
+        resources = [_worker_model.model_validate(resource) for resource in resources]
+    return [_collection_values(result) for result in _worker_expression.find_many(resources)]
+
+
+def _evaluate_ndjson_range(path: str, start: int, end: int) -> typing.List[typing.Any]:
+    """
+    Evaluates the worker's expression over the NDJSON lines starting within a byte range of a file.
+
+    Args:
+        path (str): Path to the NDJSON file.
+        start (int): Byte offset at which the range starts. Must be at the beginning of a line.
+        end (int): Byte offset at which the range ends.
+
+    Returns:
+        (List[Any]): The values resulting for each line in the range. Blank lines yield an empty collection.
+    """
+    resources, blank_lines = [], []
+    with open(path, 'rb') as file:
+        file.seek(start)
+        for index in count():
+            if file.tell() >= end or not (line := file.readline()):
+                break
+            if line.strip():
+                resources.append(json.loads(line))
+            else:
+                blank_lines.append(index)
+    results = _evaluate_batch(resources)
+    # Keep the results aligned with the line numbers of the file
+    for index in blank_lines:
+        results.insert(index, [])
+    return results
+
+
+def _ndjson_ranges(path: str, chunk_size: int) -> typing.Iterator[typing.Tuple[int, int]]:
+    """
+    Splits an NDJSON file into byte ranges of approximately `chunk_size` bytes, aligned to line boundaries.
+
+    Args:
+        path (str): Path to the NDJSON file.
+        chunk_size (int): Approximate size of the ranges in bytes.
+
+    Returns:
+        (Iterator[Tuple[int, int]]): The start and end offsets of the ranges.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as file:
+        start = 0
+        while start < size:
+            file.seek(min(start + chunk_size, size))
+            file.readline()
+            end = min(file.tell(), size)
+            yield start, end
+            start = end
+
+
+def _stream_ordered(pool: ProcessPoolExecutor, tasks: typing.Iterator[typing.Tuple], max_pending: int) -> typing.Iterator[typing.Any]:
+    """
+    Submits the tasks to the pool keeping at most `max_pending` of them in flight, and yields their results in order.
+
+    Args:
+        pool (ProcessPoolExecutor): The pool of worker processes.
+        tasks (Iterator[Tuple]): The tasks as tuples of a function and its arguments.
+        max_pending (int): Maximal number of tasks in flight.
+
+    Returns:
+        (Iterator[Any]): The results of each individual resource, in order.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(*task))
+        if len(pending) >= max_pending:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def evaluate_in_parallel(
+        expression: typing.Union[str, FHIRPath],
+        resources: typing.Iterable[typing.Any],
+        model: typing.Optional[type] = None,
+        max_workers: typing.Optional[int] = None,
+        batch_size: int = 500,
+    ) -> typing.Iterator[typing.Any]:
+    """
+    Evaluates a FHIRPath expression over many resources using a pool of worker processes.
+
+    The resources are sent in batches of `batch_size` to the workers. The results are streamed back in the
+    order of the input resources, while a bounded number of batches is kept in flight.
+    Resources and resulting values must be picklable, i.e. dictionaries or instances of importable models.
+
+    Args:
+        expression (Union[str, FHIRPath]): The FHIRPath expression, as a string or already compiled.
+        resources (Iterable[Any]): The resources to evaluate.
+        model (Optional[type]): Model used by the workers to validate the resources before evaluation.
+        max_workers (Optional[int]): Number of worker processes, by default the number of CPUs.
+        batch_size (int): Number of resources sent to a worker at once.
+
+    Returns:
+        (Iterator[Any]): For each resource, the list of values of the resulting collection (or a bare boolean/integer).
+
+    Example:
+        ``` python
+        >>> from fhircraft.fhir.path.parallel import evaluate_in_parallel
+        >>> list(evaluate_in_parallel('Observation.status', observations, max_workers=4))
+        [['final'], ['preliminary'], ...]
+        ```
+    """
+    if isinstance(expression, str):
+        expression = parse(expression)
+    max_workers = max_workers or os.cpu_count() or 1
+    resources = iter(resources)
+    tasks = (
+        (_evaluate_batch, batch)
+            for batch in iter(lambda: list(islice(resources, batch_size)), [])
+    )
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(expression, model)) as pool:
+        yield from _stream_ordered(pool, tasks, 2 * max_workers)
+
+
+def evaluate_ndjson_in_parallel(
+        expression: typing.Union[str, FHIRPath],
+        path: str,
+        model: typing.Optional[type] = None,
+        max_workers: typing.Optional[int] = None,
+        chunk_size: int = 2**20,
+    ) -> typing.Iterator[typing.Any]:
+    """
+    Evaluates a FHIRPath expression over each resource of an NDJSON file using a pool of worker processes.
+
+    The file is split into byte ranges aligned to line boundaries, which are read and parsed by the
+    workers themselves, so that the raw content never has to be sent between processes.
+
+    Args:
+        expression (Union[str, FHIRPath]): The FHIRPath expression, as a string or already compiled.
+        path (str): Path to the NDJSON file.
+        model (Optional[type]): Model used by the workers to validate the resources before evaluation. 
+            If not provided, the expression is evaluated directly on the parsed JSON objects.
+        max_workers (Optional[int]): Number of worker processes, by default the number of CPUs.
+        chunk_size (int): Approximate size in bytes of the file ranges assigned to a worker at once.
+
+    Returns:
+        (Iterator[Any]): For each line of the file, the list of values of the resulting collection (or a bare boolean/integer).
+            Blank lines yield an empty list, such that the n-th result always corresponds to the n-th line of the file.
+    """
+    if isinstance(expression, str):
+        expression = parse(expression)
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = (
+        (_evaluate_ndjson_range, path, start, end)
+            for start, end in _ndjson_ranges(path, chunk_size)
+    )
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(expression, model)) as pool:
+        yield from _stream_ordered(pool, tasks, 2 * max_workers)
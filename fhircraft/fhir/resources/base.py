@@ -1,8 +1,124 @@
-from pydantic import BaseModel , ValidationError
+from pydantic import BaseModel , ValidationError, PrivateAttr
 from fhircraft.utils import get_all_models_from_field
 from fhircraft.fhir.path import FHIRPathMixin
-from typing import ClassVar
+from fhircraft.fhir.path.engine.cache import notify_mutation
+from fhircraft.fhir.resources.validation import validation_context, validation_report, ValidationReport, get_validation_level, attach_pending_validations, get_pending_validations, validate_constraints, mark_modified, get_modified_fields, revalidate, MODIFIED_FIELDS_ATTRIBUTE
+from typing import Any, Callable, ClassVar, Dict, Optional, Tuple
 from copy import copy
+from weakref import WeakKeyDictionary, WeakValueDictionary
+
+# Name of the private attribute holding the sliced elements whose slice instances have not been materialized yet
+LAZY_SLICES_ATTRIBUTE = '_lazy_slices'
+# Name of the instance attribute flagging slice templates (and their elements) that have not been modified
+PRISTINE_ATTRIBUTE = '_pristine'
+# Structure of the models derived from their fields, by model class and kind, along with the fields it was derived from
+_model_structures: "WeakKeyDictionary[type, Dict[str, Tuple[dict, Any]]]" = WeakKeyDictionary()
+# Instances with slice instances that have not been materialized yet, by identity
+_lazy_instances: "WeakValueDictionary[int, BaseModel]" = WeakValueDictionary()
+
+
+def _get_model_structure(model: type, kind: str, compute: Callable[[], Any]) -> Any:
+    """
+    Returns a structure derived from the fields of a model (e.g. its sliced elements), computing it only once per model.
+    The structure is computed again if the model is rebuilt, i.e. if its fields are replaced.
+
+    Args:
+        model (type): The model class.
+        kind (str): The name of the structure.
+        compute (Callable[[], Any]): Function computing the structure.
+
+    Returns:
+        Any: The structure of the model.
+    """
+    fields = model.model_fields
+    structures = _model_structures.setdefault(model, {})
+    if (structure := structures.get(kind)) is None or structure[0] is not fields:
+        structure = structures[kind] = (fields, compute())
+    return structure[1]
+
+
+def _mark_pristine(value) -> None:
+    """
+    Marks the instances nested within a value as matching their slice template, i.e. as not modified.
+    """
+    if isinstance(value, list):
+        for entry in value:
+            _mark_pristine(entry)
+    elif isinstance(value, BaseModel):
+        value.__dict__[PRISTINE_ATTRIBUTE] = True
+        value.__dict__.pop(MODIFIED_FIELDS_ATTRIBUTE, None)
+        for name in value.__class__.model_fields:
+            if (entry := value.__dict__.get(name)) is not None:
+                _mark_pristine(entry)
+
+
+def _is_pristine(value) -> bool:
+    """
+    Checks whether all the instances nested within a value match their slice template, i.e. have not been modified.
+    """
+    if isinstance(value, list):
+        return all(_is_pristine(entry) for entry in value)
+    if isinstance(value, BaseModel):
+        return PRISTINE_ATTRIBUTE in value.__dict__ and all(
+            _is_pristine(entry) for name in value.__class__.model_fields 
+                if (entry := value.__dict__.get(name)) is not None
+        )
+    return True
+
+
+def _is_complete(value) -> bool:
+    """
+    Checks whether the required fields of all the instances nested within a value are populated.
+    """
+    if isinstance(value, list):
+        return all(_is_complete(entry) for entry in value)
+    if isinstance(value, FHIRBaseModel):
+        for name, min_length in value.__class__.get_required_fields().items():
+            if (entry := value.__dict__.get(name)) is None or (isinstance(entry, list) and len(entry) < min_length):
+                return False
+        return all(
+            _is_complete(entry) for name in value.__class__.model_fields 
+                if (entry := value.__dict__.get(name)) is not None
+        )
+    return True
+
+
+def _get_lazy_slices(instance: BaseModel) -> Optional[dict]:
+    """
+    Returns the record of the slice placeholders of an instance that have not been materialized yet, if any.
+    """
+    try:
+        private = object.__getattribute__(instance, '__pydantic_private__')
+    except AttributeError:
+        return None
+    return private.get(LAZY_SLICES_ATTRIBUTE) if private else None
+
+
+def _register_lazy_instance(instance: BaseModel) -> BaseModel:
+    """
+    Registers an instance if it holds slice placeholders that have not been materialized yet.
+    """
+    if _get_lazy_slices(instance):
+        _lazy_instances[id(instance)] = instance
+    return instance
+
+
+def _materialize_lazy_slices(value) -> None:
+    """
+    Materializes all the slice placeholders nested within a value, such that it can be serialized.
+    """
+    if not _lazy_instances:
+        return
+    if isinstance(value, list):
+        for entry in value:
+            _materialize_lazy_slices(entry)
+    elif isinstance(value, BaseModel):
+        for name in list(_get_lazy_slices(value) or ()):
+            value._materialize_slices(name)
+        for name in value.__class__.model_fields:
+            if (entry := value.__dict__.get(name)) is not None:
+                _materialize_lazy_slices(entry)
+
 
 class FHIRBaseModel(BaseModel, FHIRPathMixin):
     """
@@ -10,19 +126,205 @@ class FHIRBaseModel(BaseModel, FHIRPathMixin):
 
     Expands the Pydantic [BaseModel](https://docs.pydantic.dev/latest/api/base_model/) class with FHIR-specific methods.    
     """    
+    _lazy_slices: Optional[dict] = PrivateAttr(default=None)
+
+    def __init__(self, **data):
+        # Share the evaluated constraints and FHIRPath subexpressions across the whole validation
+        with validation_context() as context:
+            start = len(context.pending_validations)
+            super().__init__(**data)
+            attach_pending_validations(self, context, start)
+
+    @classmethod
+    def model_validate(cls, *args, **kwargs):
+        # Share the evaluated constraints and FHIRPath subexpressions across the whole validation
+        with validation_context(get_validation_level(kwargs.get('context'))) as context:
+            start = len(context.pending_validations)
+            instance = super().model_validate(*args, **kwargs)
+            attach_pending_validations(instance, context, start)
+            return instance
+
+    @classmethod
+    def model_validate_json(cls, *args, **kwargs):
+        # Share the evaluated constraints and FHIRPath subexpressions across the whole validation
+        with validation_context(get_validation_level(kwargs.get('context'))) as context:
+            start = len(context.pending_validations)
+            instance = super().model_validate_json(*args, **kwargs)
+            attach_pending_validations(instance, context, start)
+            return instance
+
+    @classmethod
+    def model_validate_with_report(cls, *args, **kwargs) -> ValidationReport:
+        """
+        Validates the data against the model, collecting all the failed validations in a single pass
+        instead of stopping at the first failure. Accepts the same arguments as `model_validate`.
+
+        Returns:
+            report (ValidationReport): The report of the validation issues, convertible to a FHIR `OperationOutcome` 
+                                       via `to_operation_outcome()`. The validated instance is available as `report.resource`,
+                                       unless the data is structurally invalid.
+        """
+        root = cls.model_fields['resourceType'].default if 'resourceType' in cls.model_fields else cls.__name__
+        with validation_report() as report:
+            try:
+                report.resource = cls.model_validate(*args, **kwargs)
+            except ValidationError as error:
+                report.add_validation_error(error, cls, root)
+        report.resolve_locations(report.resource, root)
+        return report
+
+    def validate_constraints(self):
+        """
+        Runs the constraint, pattern and slicing validators deferred during the validation of the instance 
+        and its elements in deferred validation mode (see `fhircraft.fhir.resources.validation.deferred_validation`).
+
+        Returns:
+            instance (Self): The validated instance.
+
+        Raises:
+            ValidationError: If any of the deferred validators fails.
+        """
+        error, = validate_constraints([self])
+        if error is not None:
+            raise error
+        return self
+
+    @property
+    def has_pending_validations(self) -> bool:
+        """
+        Whether the instance or its elements have deferred validators that have not been run yet.
+        """
+        return bool(get_pending_validations(self))
+
+    def __setattr__(self, name, value):
+        # Assigned sliced elements replace their slice placeholders
+        if (lazy_slices := _get_lazy_slices(self)) and name in lazy_slices:
+            self._discard_lazy_slices(name)
+        super().__setattr__(name, value)
+        # Track the modified fields for the incremental revalidation
+        if name in self.__class__.model_fields:
+            self.mark_modified(name)
+        # Invalidate the indexes over repeated elements used by the FHIRPath engine
+        notify_mutation()
+
+    def mark_modified(self, field: str) -> None:
+        """
+        Marks a field as modified in place (e.g. after mutating a list of elements), such that it is 
+        validated again by the next call to `revalidate()`. Assigned fields are marked automatically.
+
+        Args:
+            field (str): The name of the modified field.
+        """
+        mark_modified(self, field)
+        # The instance does not match its slice template anymore
+        self.__dict__.pop(PRISTINE_ATTRIBUTE, None)
+
+    @property
+    def modified_fields(self) -> frozenset:
+        """
+        The fields of the instance that have been modified in place since it was validated.
+        """
+        return get_modified_fields(self)
+
+    def revalidate(self):
+        """
+        Incrementally validates the instance after in-place modifications of its elements (e.g. via attribute 
+        assignment or `replace_fhirpath`). Only the modified fields, the constraints reading them, and the constraints 
+        of the ancestors reading the modified elements are validated again.
+
+        Returns:
+            instance (Self): The validated instance.
+
+        Raises:
+            ValidationError: If the modified instance is not valid anymore.
+        """
+        return revalidate(self)
+
     def model_dump(self, *args, **kwargs):
         kwargs.update({'by_alias': True, 'exclude_none': True})
+        _materialize_lazy_slices(self)
         return super().model_dump(*args, **kwargs)
 
     def model_dump_json(self, *args, **kwargs):
         kwargs.update({'by_alias': True, 'exclude_none': True})
+        _materialize_lazy_slices(self)
         return super().model_dump_json(*args, **kwargs)
 
+    def __eq__(self, other):
+        # Compare the materialized instances, such that lazily constructed instances equal their materialized equivalents
+        _materialize_lazy_slices(self)
+        _materialize_lazy_slices(other)
+        return super().__eq__(other)
+
+    def __repr_args__(self):
+        _materialize_lazy_slices(self)
+        return super().__repr_args__()
+
+    def __copy__(self):
+        return _register_lazy_instance(super().__copy__())
+
+    def __deepcopy__(self, memo=None):
+        return _register_lazy_instance(super().__deepcopy__(memo))
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        _register_lazy_instance(self)
+
+    def __getattr__(self, name):
+        # Materialize the slice placeholders of the element on first access
+        lazy_slices = _get_lazy_slices(self) if not name.startswith('__') else None
+        if lazy_slices and name in lazy_slices:
+            self._materialize_slices(name)
+            return self.__dict__[name]
+        return super().__getattr__(name)
+
+    def _discard_lazy_slices(self, name: str) -> tuple:
+        """
+        Removes the record of the slice placeholders under a field, and returns it.
+        """
+        lazy_slices = dict(_get_lazy_slices(self))
+        record = lazy_slices.pop(name)
+        # Replace (instead of update) the record, as it is shared with shallow copies of the instance
+        self.__pydantic_private__[LAZY_SLICES_ATTRIBUTE] = lazy_slices or None
+        if not lazy_slices:
+            _lazy_instances.pop(id(self), None)
+        return record
+
+    def _materialize_slices(self, name: str) -> None:
+        """
+        Materializes the slice placeholders of the sliced elements under a field, recorded by `model_construct_with_slices`.
+
+        Args:
+            name (str): The name of the field.
+        """
+        default, sliced_elements, slice_copies = self._discard_lazy_slices(name)
+        paths = self.__class__._get_sliced_element_paths()
+        # The materialization does not count as a modification
+        state = {attribute: self.__dict__[attribute] for attribute in (PRISTINE_ATTRIBUTE, MODIFIED_FIELDS_ATTRIBUTE) if attribute in self.__dict__}
+        self.__dict__[name] = default
+        for element, slices in sliced_elements.items():
+            slice_resources = []
+            for slice in slices:
+                # Add empty slice instances, whose own slices are materialized on access
+                slice_resources.extend([
+                    slice.model_construct_with_slices()
+                        for _ in range(min(slice.max_cardinality, slice_copies))
+                ])
+            # Set the whole list of slices in the resource
+            collection = paths[element].find_or_create(self)
+            [col.set_literal(slice_resources) for col in collection]
+        self.__dict__.pop(MODIFIED_FIELDS_ATTRIBUTE, None)
+        self.__dict__.update(state)
+        if PRISTINE_ATTRIBUTE in state:
+            _mark_pristine(self.__dict__[name])
+
     @classmethod 
     def model_construct_with_slices(cls, slice_copies:int=9) -> object:
         '''
-        Constructs a model with sliced elements by creating empty slice instances based on the specified number of slice copies. 
-        The method iterates over the sliced elements of the class, generates slice resources, and sets them in the resource collection. 
+        Constructs a model with sliced elements holding empty slice instances, based on the specified number of slice copies. 
+        The slice instances are materialized lazily, i.e. only when their sliced element is first accessed (e.g. via attribute access, 
+        `replace_fhirpath` or `find_or_create`) or when the instance is serialized. The slices of the slice instances are also 
+        materialized lazily, such that the construction is only as expensive as the number of touched slices. 
 
         Args:
             slice_copies (int): Optional, an integer specifying the number of copies for each slice (default is 9).
@@ -30,30 +332,62 @@ class FHIRBaseModel(BaseModel, FHIRPathMixin):
         Returns:
             instance (Self): An instance of the model with the sliced elements constructed.
         ''' 
-        from fhircraft.fhir.path import fhirpath
         instance = super().model_construct()
-        for element, slices in cls.get_sliced_elements().items():
-            slice_resources = []
-            for slice in slices:
-                # Add empty slice instances
-                slice_resources.extend([
-                    slice.model_construct_with_slices()
-                        for _ in range(min(slice.max_cardinality, slice_copies))
-                ])
-            # Set the whole list of slices in the resource
-            collection = fhirpath.parse(element).find_or_create(instance)
-            [col.set_literal(slice_resources) for col in collection]
-        return instance
+        lazy_slices = {
+            name: (instance.__dict__.pop(name, None), sliced_elements, slice_copies)
+                for name, sliced_elements in cls._get_sliced_fields().items()
+        }
+        if lazy_slices:
+            instance.__pydantic_private__[LAZY_SLICES_ATTRIBUTE] = lazy_slices
+        _mark_pristine(instance)
+        return _register_lazy_instance(instance)
     
     @classmethod 
     def get_sliced_elements(cls):
         '''
         Get the sliced elements from the model fields and their extension fields.
         Sliced elements are filtered based on being instances of `FHIRSliceModel`.
+        The sliced elements are determined once per model (and again if the model is rebuilt).
     
         Returns:
             slices (dict): A dictionary with field names as keys and corresponding sliced elements as values.
         '''        
+        return dict(cls._get_sliced_elements())
+
+    @classmethod
+    def _get_sliced_elements(cls) -> Dict[str, list]:
+        '''
+        Get the (cached, not to be modified) sliced elements of the model.
+        '''
+        return _get_model_structure(cls, 'sliced_elements', cls._find_sliced_elements)
+
+    @classmethod
+    def _get_sliced_fields(cls) -> Dict[str, Dict[str, list]]:
+        '''
+        Get the sliced elements of the model, grouped by the field containing them.
+        '''
+        def group_sliced_elements():
+            sliced_fields = {}
+            for element, slices in cls._get_sliced_elements().items():
+                sliced_fields.setdefault(element.split('.')[0], {})[element] = slices
+            return sliced_fields
+        return _get_model_structure(cls, 'sliced_fields', group_sliced_elements)
+
+    @classmethod
+    def _get_sliced_element_paths(cls) -> Dict[str, Any]:
+        '''
+        Get the compiled FHIRPath expressions of the sliced elements of the model.
+        '''
+        from fhircraft.fhir.path import fhirpath
+        return _get_model_structure(cls, 'sliced_element_paths', lambda: {
+            element: fhirpath.parse(element) for element in cls._get_sliced_elements()
+        })
+
+    @classmethod 
+    def _find_sliced_elements(cls) -> Dict[str, list]:
+        '''
+        Find the sliced elements of the model by inspecting the annotations of its fields.
+        '''
         # Get model elements' fields
         fields = copy(cls.model_fields)
         # Get model elements' extension fields 
@@ -68,16 +402,30 @@ class FHIRBaseModel(BaseModel, FHIRPathMixin):
                 if field and bool(slices := list(get_all_models_from_field(field, issubclass_of=FHIRSliceModel))) 
         } 
 
+    @classmethod
+    def get_required_fields(cls) -> Dict[str, int]:
+        '''
+        Get the required fields of the model, i.e. the fields without default value, and their minimal number of elements. 
+        The required fields are determined once per model (and again if the model is rebuilt).
+
+        Returns:
+            required_fields (Dict[str, int]): The minimal number of elements of each required field, by field name.
+        '''
+        return _get_model_structure(cls, 'required_fields', lambda: {
+            name: max([1] + [getattr(metadata, 'min_length', 0) or 0 for metadata in field.metadata])
+                for name, field in cls.model_fields.items() if field.is_required()
+        })
+
     @classmethod
     def clean_unusued_slice_instances(cls, resource):
         '''
         Cleans up unused or incomplete slice instances within the given FHIR resource by iterating through the 
         sliced elements of the class, identifying valid elements, and updating the resource with only the valid slices. 
         '''
-        from fhircraft.fhir.path import fhirpath
+        paths = cls._get_sliced_element_paths()
         # Remove unused/incomplete slices
-        for element, slices in cls.get_sliced_elements().items():
-            valid_elements = [col.value for col in fhirpath.parse(element).find_or_create(resource) if col.value is not None]        
+        for element, slices in cls._get_sliced_elements().items():
+            valid_elements = [col.value for col in paths[element].find_or_create(resource) if col.value is not None]        
             new_valid_elements = []
             if not valid_elements:
                 continue
@@ -85,14 +433,16 @@ class FHIRBaseModel(BaseModel, FHIRPathMixin):
                 # Get all the elements that conform to this slice's definition           
                 sliced_entries = [entry for entry in valid_elements if isinstance(entry, slice)] 
                 for entry in sliced_entries:
-                    if slice.get_sliced_elements():
+                    # Check for modifications before the cleaning of the entry's own slices
+                    has_been_modified = entry.has_been_modified
+                    if slice._get_sliced_fields():
                         entry = slice.clean_unusued_slice_instances(entry) 
-                    if (entry.is_FHIR_complete and entry.has_been_modified) \
-                        or (entry.is_FHIR_complete  and not entry.has_been_modified and slice.min_cardinality>0):
+                    if (entry.is_FHIR_complete and has_been_modified) \
+                        or (entry.is_FHIR_complete  and not has_been_modified and slice.min_cardinality>0):
                         if entry not in new_valid_elements:
                             new_valid_elements.append(entry)                
             # Set the new list with only the valid slices
-            collection = fhirpath.parse(element).find_or_create(resource)
+            collection = paths[element].find_or_create(resource)
             [col.set_literal(new_valid_elements) for col in collection]
         return resource
         
@@ -110,20 +460,17 @@ class FHIRSliceModel(FHIRBaseModel):
     @property
     def is_FHIR_complete(self):
         """
-        Validates if the FHIR model is complete by attempting to validate the model dump.
+        Checks if the FHIR model is complete, i.e. if the required fields of the instance and of its elements are populated.
         Returns `True` if the model is complete, `False` otherwise.
         """        
-        model = self.__class__ 
-        try:
-            model.model_validate(self.model_dump())
-            return True 
-        except ValidationError:
-            return False
+        return _is_complete(self)
     
     @property
     def has_been_modified(self):
         """
-        Checks if the FHIRSliceModel instance has been modified by comparing it with a new instance constructed with slices.
+        Checks if the FHIRSliceModel instance has been modified since it was constructed via `model_construct_with_slices`, 
+        i.e. if any of its fields or the fields of its elements have been assigned or modified in place by the FHIRPath engine.
+        Instances that were not constructed as slice templates are always considered as modified.
         Returns `True` if the instance has been modified, `False` otherwise.
         """        
-        return self != self.__class__.model_construct_with_slices()
\ No newline at end of file
+        return not _is_pristine(self)
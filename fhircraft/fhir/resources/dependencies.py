@@ -0,0 +1,216 @@
+"""
+Static analysis of the fields read by the FHIRPath expressions of constraints.
+
+The dependencies of a constraint are the elements of the validated element (i.e. the first-level children of `$this`)
+read by its expression. If all of them are absent, the verdict of the constraint does not depend on the validated
+element anymore, and can be reused instead of evaluating the expression again.
+"""
+
+import ast
+import inspect
+import textwrap
+import typing
+from functools import lru_cache
+from weakref import WeakKeyDictionary
+from pydantic import BaseModel
+
+from fhircraft.fhir.path.engine.core import FHIRPath, FHIRPathFunction, Element, This, Invocation
+from fhircraft.fhir.path.engine.cache import expression_signature
+from fhircraft.fhir.resources.invariants import get_native_invariant
+
+
+@lru_cache(maxsize=2048)
+def get_constraint_dependencies(expression: str) -> typing.Optional[typing.FrozenSet[str]]:
+    """
+    Extracts the elements of the validated element read by the FHIRPath expression of a constraint.
+
+    Args:
+        expression (str): The FHIRPath expression of the constraint.
+
+    Returns:
+        Optional[FrozenSet[str]]: The names of the elements read by the expression, or None if the expression
+                                  cannot be analyzed (e.g. it reads the validated element as a whole, as `hasValue()`
+                                  or `children()`, or accesses its context, as `%resource`).
+
+    Example:
+        ``` python
+        >>> get_constraint_dependencies('extension.exists() != value.exists()')
+        frozenset({'extension', 'value'})
+        ```
+    """
+    from fhircraft.fhir.resources.validators import _compile_FHIRPath_expression
+    try:
+        compiled_expression = _compile_FHIRPath_expression(expression)
+    except Exception:
+        return None
+    if expression_signature(compiled_expression) is None:
+        return None
+    dependencies = _get_dependencies(compiled_expression)
+    return frozenset(dependencies) if dependencies is not None else None
+
+
+def _get_dependencies(node: typing.Any) -> typing.Optional[typing.Set[str]]:
+    """
+    Recursively collects the elements of `$this` read by a FHIRPath expression node evaluated on `$this`.
+    """
+    if not isinstance(node, FHIRPath):
+        # Literals do not read any element
+        return set()
+    if isinstance(node, Element):
+        return {node.label}
+    if isinstance(node, Invocation):
+        # The right-hand side is evaluated on the result of the left-hand side,
+        # hence only reads elements nested within the ones read by the left-hand side
+        if isinstance(node.left, This):
+            return _get_dependencies(node.right)
+        return _get_dependencies(node.left)
+    if isinstance(node, (FHIRPathFunction, This)) or not hasattr(node, '__dict__'):
+        # Functions invoked on `$this` (and `$this` itself) read the validated element as a whole
+        return None
+    # Operators evaluate all their operands on `$this`
+    dependencies = set()
+    for name, operand in vars(node).items():
+        if name.startswith('_'):
+            continue
+        for entry in (operand if isinstance(operand, (list, tuple)) else [operand]):
+            if (operand_dependencies := _get_dependencies(entry)) is None:
+                return None
+            dependencies |= operand_dependencies
+    return dependencies
+
+
+def _is_absent(value: typing.Any) -> bool:
+    if isinstance(value, list):
+        return all(entry is None for entry in value)
+    return value is None
+
+
+def are_dependencies_absent(instance: BaseModel, dependencies: typing.Iterable[str]) -> bool:
+    """
+    Checks whether all the elements read by a constraint are absent in a model instance.
+
+    Args:
+        instance (BaseModel): The validated element.
+        dependencies (Iterable[str]): The names of the elements read by the constraint.
+
+    Returns:
+        bool: True if none of the elements has a value.
+    """
+    return all(_is_absent(getattr(instance, dependency, None)) for dependency in dependencies)
+
+
+# Names of the elements read through each field, by model class
+_field_labels: "WeakKeyDictionary[type, typing.Dict[str, str]]" = WeakKeyDictionary()
+
+
+def get_field_labels(model: type) -> typing.Dict[str, str]:
+    """
+    Maps the fields of a model to the names of the elements they represent in FHIRPath expressions, 
+    e.g. the fields `valueString` and `valueQuantity` of a type-choice element to `value`, and the 
+    primitive extensions `birthDate_ext` to `birthDate`.
+
+    Args:
+        model (type): The FHIR model.
+
+    Returns:
+        Dict[str, str]: The name of the element of each field of the model.
+    """
+    if (labels := _field_labels.get(model)) is not None:
+        return labels
+    suffix = '_type_choice_validator'
+    choice_bases = [
+        name[:-len(suffix)] for name in model.__pydantic_decorators__.model_validators 
+            if name.endswith(suffix)
+    ]
+    labels = {}
+    for field in model.model_fields:
+        label = field[:-len('_ext')] if field.endswith('_ext') else field
+        for base in choice_bases:
+            if label.startswith(base) and label[len(base):][:1].isupper():
+                label = base
+                break
+        labels[field] = label
+    _field_labels[model] = labels
+    return labels
+
+
+# Verdicts of the constraints on elements whose dependencies are all absent, by model class and expression
+_absent_dependencies_verdicts: "WeakKeyDictionary[type, typing.Dict[str, bool]]" = WeakKeyDictionary()
+
+
+def get_absent_dependencies_verdict(model: type, expression: str) -> typing.Optional[bool]:
+    """
+    Returns the known verdict of a constraint on elements of a model whose dependencies are all absent, if any.
+    """
+    verdicts = _absent_dependencies_verdicts.get(model)
+    return verdicts.get(expression) if verdicts is not None else None
+
+
+def set_absent_dependencies_verdict(model: type, expression: str, verdict: bool) -> None:
+    """
+    Records the verdict of a constraint on elements of a model whose dependencies are all absent.
+    """
+    _absent_dependencies_verdicts.setdefault(model, {})[expression] = verdict
+
+
+def _get_validator_constraint(validator: typing.Any) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """
+    Extracts the keyword arguments (key, expression, ...) of a constraint validator, either constructed by
+    the `ResourceFactory` (partial functions) or rendered into source code by the `CodeGenerator`.
+    """
+    function = getattr(validator.func, '__func__', validator.func)
+    if keywords := getattr(function, 'keywords', None):
+        return keywords if 'expression' in keywords else None
+    try:
+        source = ast.parse(textwrap.dedent(inspect.getsource(function)))
+    except (OSError, TypeError, SyntaxError):
+        return None
+    for node in ast.walk(source):
+        if isinstance(node, ast.Call):
+            keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+            if 'expression' in keywords and 'key' in keywords:
+                try:
+                    return {name: ast.literal_eval(value) for name, value in keywords.items()}
+                except ValueError:
+                    return None
+    return None
+
+
+def get_model_constraint_dependencies(model: type) -> typing.Dict[str, typing.Optional[typing.FrozenSet[str]]]:
+    """
+    Analyzes the elements read by the constraints of a model.
+
+    Args:
+        model (type): The FHIR model.
+
+    Returns:
+        Dict[str, Optional[FrozenSet[str]]]: The names of the elements read by each constraint, by constraint key.
+                                            The constraints implemented natively are not analyzed.
+    """
+    dependencies = {}
+    decorators = model.__pydantic_decorators__
+    for validator in list(decorators.model_validators.values()) + list(decorators.field_validators.values()):
+        constraint = _get_validator_constraint(validator)
+        if constraint is None or get_native_invariant(constraint['expression']) is not None:
+            continue
+        dependencies[constraint['key']] = get_constraint_dependencies(constraint['expression'])
+    return dependencies
+
+
+def get_model_fields_constraints(model: type) -> typing.Dict[str, typing.List[str]]:
+    """
+    Reports which fields of a model drive the cost of its validation, i.e. the constraints evaluated
+    by the FHIRPath engine that read each field.
+
+    Args:
+        model (type): The FHIR model.
+
+    Returns:
+        Dict[str, List[str]]: The keys of the constraints reading each field. The constraints that cannot be
+                              analyzed are listed under `*`.
+    """
+    fields = {}
+    for key, dependencies in get_model_constraint_dependencies(model).items():
+        for field in (dependencies if dependencies is not None else ['*']):
+            fields.setdefault(field, []).append(key)
+    return fields
@@ -8,29 +8,54 @@ import fhircraft.fhir.resources.validators as fhir_validators
 import fhircraft.fhir.resources.datatypes.primitives as primitives
 from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
 from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
-from fhircraft.utils import capitalize, load_env_variables, ensure_list, get_FHIR_release_from_version
+from fhircraft.fhir.resources.slicing import SliceDiscriminator, get_slice_discriminator_rules, SLICE_BASE_TAG
+from fhircraft.fhir.resources.packages import PackageRegistry, split_canonical_url
+from fhircraft.fhir.resources.registry import ModelRegistry, ModelKey
+from fhircraft.cache import get_disk_cache
+from fhircraft.transport import http_get, fetch_concurrently, MAX_CONCURRENT_REQUESTS
+from fhircraft.utils import capitalize, ensure_list, get_FHIR_release_from_version
 
 # Pydantic modules
-from pydantic import Field, create_model, model_validator, BaseModel, field_validator
+from pydantic import Field, create_model, model_validator, BaseModel, field_validator, Discriminator, Tag
 from pydantic_core import PydanticUndefined
 from pydantic.dataclasses import dataclass
 
 # Standard modules
 from enum import Enum
 from functools import partial
-from typing import List, Any, Dict, Union, Optional, Literal, Tuple
+from typing import List, Any, Dict, Union, Optional, Literal, Tuple, NamedTuple, Iterable, Set, get_args, get_origin
 from typing_extensions import Annotated 
 from collections import defaultdict
-import requests
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import inspect
+import threading
+import time
 
 _Unset: Any = PydanticUndefined
 
+
+class ProfileBuild(NamedTuple):
+    """
+    The outcome of the construction of the model of a profile during a bulk construction.
+
+    Attributes:
+        url (str): The canonical URL of the profile.
+        model (Optional[type]): The constructed model, or None if the construction failed.
+        duration (float): The time spent constructing the model (including the models of its slices), in seconds.
+        error (Optional[Exception]): The error raised by the construction, if any.
+    """
+    url: str
+    model: Optional[type]
+    duration: float
+    error: Optional[Exception] = None
+
 class ResourceFactory:
     
-    @dataclass
+    @dataclass(frozen=True)
     class FactoryConfig:
-        """Represents the configuration for the Factory class.
+        """Represents the configuration of the construction of a single model (i.e. its build context), 
+        passed through the construction methods of the Factory class.
 
         Attributes:
             FHIR_release (str): The FHIR release version.
@@ -39,20 +64,51 @@ class ResourceFactory:
         FHIR_release: str
         resource_name: str
     
-    Config: Optional[FactoryConfig]
-    construction_cache : Dict[str, BaseModel] = {}
+    construction_cache : ModelRegistry = ModelRegistry()
+    # Locks ensuring that each model is only constructed once at a time, with the number of threads using them
+    _construction_locks_lock : threading.Lock = threading.Lock()
+    _construction_locks : Dict[Tuple, List[Union[threading.RLock, int]]] = {}
+    package_registry : PackageRegistry = PackageRegistry()
+
+    def __init__(self):
+        # Profiles downloaded ahead of their construction by this factory, consumed on use
+        self.prefetched_structure_definitions : Dict[str, Dict[str, Any]] = {}
     
+    def load_package(self, path: str) -> str:
+        """
+        Loads a FHIR NPM package (`package.tgz` or unpacked directory) into the registry of the factory, such that 
+        the canonical URLs of its StructureDefinitions are resolved locally, without any network access.
+
+        Parameters:
+            path (str): The path to the package tarball or directory.
+
+        Returns:
+            str: The `name#version` identifier of the loaded package.
+        """
+        return self.package_registry.load_package(path)
+
     def download_structure_definition(self, profile_url: str) -> Dict[str, Any]:
         """
         Retrieves the structure definition of a FHIR resource from the provided profile URL.
+        The URL is first resolved against the loaded FHIR packages, the prefetched profiles and the on-disk cache 
+        (if enabled), and only downloaded if not available locally.
         
         Parameters:
-            profile_url (str): The URL of the FHIR profile from which to retrieve the structure definition.
+            profile_url (str): The URL of the FHIR profile from which to retrieve the structure definition, 
+                               optionally followed by a `|version`.
             
         Returns:
             Dict[str, Any]: A dictionary representing the structure definition of the FHIR resource.
+
+        Raises:
+            ValueError: If the downloaded structure definition does not have the requested version.
         """       
-        
+        # Resolve the profile from the loaded FHIR packages or the prefetched profiles, if available
+        if (structure_definition := self.package_registry.get_structure_definition(profile_url)) is not None:
+            return structure_definition
+        if (structure_definition := self.prefetched_structure_definitions.pop(profile_url, None)) is not None:
+            return structure_definition
+        profile_url, version = split_canonical_url(profile_url)
         if not profile_url.endswith('.json'):
             # Construct endpoint URL for the StructureDefinition JSON
             if profile_url.startswith('http://hl7.org/fhir/StructureDefinition'):
@@ -65,20 +121,64 @@ class ResourceFactory:
         else:
             json_url = profile_url
 
-        # Configure proxy if needed
-        settings = load_env_variables()
-        proxies = {
-            'https': settings.get('PROXY_URL_HTTPS'), 
-            'http': settings.get('PROXY_URL_HTTP')
-        } if settings.get('PROXY_URL_HTTPS') or settings.get('PROXY_URL_HTTP') else None
         headers = {
             'Content-Type': 'application/json',
             'Accept': 'application/json',
         }
-        # Download the StructureDefinition JSON            
-        response = requests.get(json_url, proxies=proxies, verify=settings.get('CERTIFICATE_BUNDLE_PATH'), headers=headers)     
+        # Download the StructureDefinition JSON through the shared HTTP session, unless available in the on-disk cache
+        download = lambda cache_headers: http_get(json_url, headers={**headers, **cache_headers})
+        get_version = lambda structure_definition: structure_definition.get('version')
+        if (disk_cache := get_disk_cache()) is not None:
+            return disk_cache.fetch(profile_url, download, version=version, get_version=get_version)
+        response = download({})
         response.raise_for_status()
-        return response.json()
+        structure_definition = response.json()
+        # The endpoint serves the current version of the profile, which may differ from the requested one
+        if version is not None and get_version(structure_definition) != version:
+            raise ValueError(f'The structure definition of {profile_url} has version {get_version(structure_definition)} instead of the requested version {version}')
+        return structure_definition
+
+    @staticmethod
+    def _get_slice_profiles(structure_definition: Dict[str, Any]) -> List[str]:
+        """
+        Collects the canonical URLs of the profiles of the slices of a StructureDefinition, i.e. the profiles
+        from which the slice models are constructed.
+        """
+        return [
+            element['type'][0]['profile'][0] for element in structure_definition.get('snapshot', {}).get('element', []) 
+                if element.get('sliceName') and element.get('type') and element['type'][0].get('profile')
+        ]
+
+    def prefetch_profiles(self, structure_definition: Dict[str, Any], max_workers: int = MAX_CONCURRENT_REQUESTS) -> List[str]:
+        """
+        Concurrently downloads the profiles referenced by the slices of a StructureDefinition, and recursively 
+        the profiles referenced by these, such that the slice models can be constructed without waiting for 
+        each download in turn. Profiles that are already available locally are skipped.
+
+        Parameters:
+            structure_definition (Dict[str, Any]): The StructureDefinition whose referenced profiles to prefetch.
+            max_workers (int): The maximal number of concurrent downloads.
+
+        Returns:
+            List[str]: The canonical URLs of the prefetched profiles.
+        """
+        prefetched, visited = [], set()
+        pending = self._get_slice_profiles(structure_definition)
+        while pending:
+            urls = [
+                url for url in dict.fromkeys(pending) 
+                    if url not in visited and url not in self.construction_cache 
+                        and url not in self.prefetched_structure_definitions and url not in self.package_registry
+            ]
+            visited.update(urls)
+            # Failed downloads are skipped, and reported once the profile is constructed
+            downloads = fetch_concurrently(urls, self.download_structure_definition, max_workers=max_workers)
+            pending = []
+            for url, profile in downloads.items():
+                self.prefetched_structure_definitions[url] = profile
+                prefetched.append(url)
+                pending.extend(self._get_slice_profiles(profile))
+        return prefetched
         
 
     def build_tree_structure(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -108,12 +208,13 @@ class ResourceFactory:
             current.update(element)
         return tree
 
-    def _get_complex_FHIR_type(self, field_type_name: str) -> Union[type,str]:     
+    def _get_complex_FHIR_type(self, field_type_name: str, config: FactoryConfig) -> Union[type,str]:     
         """
         Parses and loads the FHIR element type based on the provided field type name.
 
         Args:
             field_type_name (str): The name of the field type to be parsed.
+            config (FactoryConfig): The configuration of the current model construction.
 
         Returns:
             Union[type, str]: The parsed FHIR element type, returns input string if type not found.
@@ -129,7 +230,7 @@ class ResourceFactory:
         field_type = getattr(primitives, field_type_name, None)
         if not field_type:
             # Check if type is a FHIR complex datatype
-            field_type = get_complex_FHIR_type(field_type_name, self.Config.FHIR_release)
+            field_type = get_complex_FHIR_type(field_type_name, config.FHIR_release)
         if not field_type:
             return field_type_name
         return field_type
@@ -192,13 +293,14 @@ class ResourceFactory:
             )
         )    
     
-    def _process_pattern_or_fixed_values(self, element: Dict[str, Any], constraint_prefix: str) -> Any:
+    def _process_pattern_or_fixed_values(self, element: Dict[str, Any], constraint_prefix: str, config: FactoryConfig) -> Any:
         """
         Process the pattern or fixed values of a StructureDefinition element.
 
         Parameters:
             element (Dict[str, Any]): The element to process.
             constraint_prefix (str): The prefix indicating pattern or fixed values.
+            config (FactoryConfig): The configuration of the current model construction.
 
         Returns:
             Any: The constrained value after processing.
@@ -207,7 +309,7 @@ class ResourceFactory:
         constraint_attribute = next((attribute for attribute in element if attribute.startswith(constraint_prefix)), None)
         if (constrained_value := element.get(constraint_attribute)) is not None:
             # Get the type of value that is constrained to a preset value
-            constrained_type = self._get_complex_FHIR_type(constraint_attribute.replace(constraint_prefix,''))
+            constrained_type = self._get_complex_FHIR_type(constraint_attribute.replace(constraint_prefix,''), config)
             # Parse the value
             constrained_value = constrained_type.model_validate(constrained_value) \
                                 if inspect.isclass(constrained_type) and issubclass(constrained_type, BaseModel) \
@@ -247,28 +349,30 @@ class ResourceFactory:
         properties[name] = partial(fhir_validators.get_type_choice_value_by_base, base=name)
         return fields, validators, properties
 
-    def _process_element_slices(self, element: dict, field_type: type) -> Annotated:
+    def _process_element_slices(self, element: dict, field_type: type, config: FactoryConfig) -> Annotated:
         """
         Process the FHIR element slices to construct Pydantic models.
 
         Args:
             element (dict): The element containing slice information.
             field_type (type): The type of the field.
+            config (FactoryConfig): The configuration of the current model construction.
 
         Returns:
             Annotated:  A union of slice models and the original type.
         """
-        slice_types = []
+        discriminators = element.get('slicing', {}).get('discriminator', [])
+        slice_types, slice_rules = [], {}
         for slice_name, slice_element in element['slices'].items():
             if (slice_element_types := slice_element.get('type')) and (slice_element_canonical_urls := slice_element_types[0].get('profile')):
                 # Construct the slice model from the canonical URL
-                slice_model = ResourceFactory().construct_resource_model(slice_element_canonical_urls[0], base_model=FHIRSliceModel)
+                slice_model = self.construct_resource_model(slice_element_canonical_urls[0], base_model=FHIRSliceModel)
             else:
                 # Construct the slice model's name
                 slice_name = ''.join([capitalize(word) for word in slice_name.split('-')])
                 slice_model_name = capitalize(slice_name)
                 # Process and compile all subfields of the slice
-                slice_subfields, slice_validators, slice_properties = self._process_FHIR_structure_into_Pydantic_components(slice_element, FHIRSliceModel)
+                slice_subfields, slice_validators, slice_properties = self._process_FHIR_structure_into_Pydantic_components(slice_element, config, FHIRSliceModel)
                 # Construct the slice model
                 slice_model = self._create_model_with_properties(slice_model_name, 
                                     fields=slice_subfields, 
@@ -280,7 +384,18 @@ class ResourceFactory:
             slice_model.min_cardinality, slice_model.max_cardinality = self._process_cardinality_constraints(slice_element)
             # Store the slice model in the list of slices of the element
             slice_types.append(slice_model)    
-        # Create annotated type as union of slice models and original type (important, last in the definition) 
+            # Compile the rules assigning elements to the slice
+            slice_rules[slice_model.__name__] = get_slice_discriminator_rules(slice_element, discriminators)
+        # Dispatch the elements directly to their slice model, if all slices can be discriminated
+        if len(slice_rules) == len(slice_types) and all(rules is not None for rules in slice_rules.values()):
+            return Annotated[
+                Union[tuple([
+                    *[Annotated[slice_type, Tag(slice_type.__name__)] for slice_type in slice_types], 
+                    Annotated[field_type, Tag(SLICE_BASE_TAG)]
+                ])],
+                Discriminator(SliceDiscriminator(slice_rules))
+            ]
+        # Otherwise, create annotated type as union of slice models and original type (important, last in the definition) 
         return Annotated[
             Union[tuple([*slice_types, field_type])], 
             Field(union_mode='left_to_right')
@@ -348,7 +463,8 @@ class ResourceFactory:
         # Get the list of fields already being validated by this constraint in base model
         if base and validator_name in base.__pydantic_decorators__.field_validators:
             validate_fields.extend(base.__pydantic_decorators__.field_validators[validator_name].info.fields) 
-        # Add the current field to the list of validated fields
+        # Add the current field to the list of validated fields, validating each field only once
+        validate_fields = list(dict.fromkeys(validate_fields))
         validators[validator_name] = field_validator(*validate_fields, mode='after')(partial(
             fhir_validators.validate_element_constraint, 
             expression=constraint['expression'],
@@ -358,12 +474,54 @@ class ResourceFactory:
         ))
         return validators
 
-    def _process_FHIR_structure_into_Pydantic_components(self, structure: dict, base: BaseModel=None):
+    @staticmethod
+    def _is_constraint_enforced_by_type(constraint: dict, field_type: Any) -> bool:
+        """
+        Checks whether a constraint on an element is already enforced by the model validators of the element's type(s), 
+        e.g. `ele-1`, which is attached to all complex FHIR types.
+
+        Args:
+            constraint (dict): The details of the constraint including expression, human-readable description, key, and severity.
+            field_type (Any): The type of the element.
+
+        Returns:
+            bool: True if all types of the element validate the constraint themselves, False otherwise.
+        """
+        validator_name = f"FHIR_{constraint['key'].replace('-','_')}_constraint_model_validator"
+        field_types = get_args(field_type) if get_origin(field_type) is Union else (field_type,)
+        return all(
+            inspect.isclass(type_) and issubclass(type_, BaseModel) 
+                and validator_name in type_.__pydantic_decorators__.model_validators
+                # A profile may tighten an inherited constraint under the same key
+                and ResourceFactory._is_validator_of_expression(
+                    type_.__pydantic_decorators__.model_validators[validator_name].func, constraint['expression'])
+            for type_ in field_types if type_ is not type(None)
+        )
+
+    @staticmethod
+    def _is_validator_of_expression(validator: Any, expression: str) -> bool:
+        """
+        Checks whether a constraint validator evaluates the given FHIRPath expression.
+
+        Args:
+            validator (Any): The validator function, either constructed by the factory or defined in the datatype modules.
+            expression (str): The FHIRPath expression of the constraint.
+
+        Returns:
+            bool: True if the validator evaluates the expression, False otherwise.
+        """
+        if isinstance(validator, partial):
+            return validator.keywords.get('expression') == expression
+        code = getattr(validator, '__code__', None)
+        return code is not None and expression in code.co_consts
+
+    def _process_FHIR_structure_into_Pydantic_components(self, structure: dict, config: FactoryConfig, base: BaseModel=None):
         """
         Processes the FHIR structure elements into Pydantic components.
 
         Args:
             structure (dict): The structure containing FHIR elements.
+            config (FactoryConfig): The configuration of the current model construction.
             base (BaseModel, optional): The base model to check for existing validators. Defaults to None.
 
         Returns:
@@ -378,7 +536,7 @@ class ResourceFactory:
             # Get cardinality of element
             min_card, max_card = self._process_cardinality_constraints(element)
             # Parse the FHIR types of the element
-            field_types = [self._get_complex_FHIR_type(field_type['code']) for field_type in element.get('type', [])]
+            field_types = [self._get_complex_FHIR_type(field_type['code'], config) for field_type in element.get('type', [])]
             # If has no type, skip element
             if not field_types:
                 continue 
@@ -399,7 +557,7 @@ class ResourceFactory:
             # Start by not setting any default value (important, 'None' implies optional in Pydantic)
             field_default = _Unset 
             # Check for pattern value constraints
-            if pattern_value := self._process_pattern_or_fixed_values(element, 'pattern'):
+            if pattern_value := self._process_pattern_or_fixed_values(element, 'pattern', config):
                 field_default = pattern_value
                 # Add the current field to the list of validated fields
                 validators[f'FHIR_{name}_pattern_constraint'] = field_validator(name, mode='after')(partial(
@@ -407,7 +565,7 @@ class ResourceFactory:
                     pattern=pattern_value,
                 ))
             # Check for fixed value constraints
-            if fixed_value := self._process_pattern_or_fixed_values(element, 'fixed'):
+            if fixed_value := self._process_pattern_or_fixed_values(element, 'fixed', config):
                 # Use enum with single choice since Literal definition does not work at runtime
                 singleChoice = Enum(
                     f"{name}FixedValue",
@@ -419,22 +577,25 @@ class ResourceFactory:
             # Process FHIR constraint invariants on the element
             if constraints := element.get('constraint'):
                 for constraint in constraints:
+                    # Skip constraints already enforced by the model validators of the element's type
+                    if self._is_constraint_enforced_by_type(constraint, field_type):
+                        continue
                     validators = self._add_element_constraint_validator(name, constraint, base, validators)
             # Process FHIR slicing on the element, if present
             if element.get('slices'):
-                field_type = self._process_element_slices(element, field_type)
+                field_type = self._process_element_slices(element, field_type, config)
                 # Add slicing cardinality validator for field
                 validators[f'{name}_slicing_cardinality_validator'] = field_validator(name, mode='after')(partial(
                     fhir_validators.validate_slicing_cardinalities, field_name=name)
                 )                
             # Process element children, if present
             elif element.get('children'):
-                backbone_model_name = capitalize(self.Config.resource_name).strip() + capitalize(name).strip()
-                field_subfields, subfield_validators, subfield_properties = self._process_FHIR_structure_into_Pydantic_components(element, field_type)
+                backbone_model_name = capitalize(config.resource_name).strip() + capitalize(name).strip()
+                field_subfields, subfield_validators, subfield_properties = self._process_FHIR_structure_into_Pydantic_components(element, config, field_type)
                 for attribute, property_getter in subfield_properties.items():
                     setattr(field_type, attribute, property(property_getter))      
                 if element['children']['extension'].get('slices'):
-                    extension_type = self._process_element_slices(element['children']['extension'], get_complex_FHIR_type('Extension', self.Config.FHIR_release))
+                    extension_type = self._process_element_slices(element['children']['extension'], get_complex_FHIR_type('Extension', config.FHIR_release), config)
                     # Get cardinality of extension element
                     extension_min_card, extension_max_card = self._process_cardinality_constraints(element['children']['extension'])
                     # Add slicing cardinality validator for field
@@ -466,32 +627,174 @@ class ResourceFactory:
         Constructs a Pydantic model based on the provided FHIR structure definition.
 
         Args:
-            canonical_url (dict): The FHIR resource's or profile's canonical URL from which to download the StructureDefinition.
+            canonical_url (str): The FHIR resource's or profile's canonical URL (with an optional `|version`) from which to 
+                                 resolve or download the StructureDefinition.
+            structure_definition (dict): The FHIR StructureDefinition to build the model from.
+
+        Returns:
+            model (BaseModel): The constructed Pydantic model representing the FHIR resource.
+        """
+        # Resolve the key of the model in the cache, by canonical URL, version, FHIR release and base model
+        if canonical_url is not None:
+            url, version = split_canonical_url(canonical_url)
+        else:
+            url, version = (structure_definition or {}).get('url'), (structure_definition or {}).get('version')
+        release = self._get_FHIR_release(structure_definition)
+        # Construct each model only once, even if requested concurrently by multiple threads
+        with self._construction_lock((url, version, release, base_model)):
+            # If the model has been constructed before, return the cached model
+            if (model := self.construction_cache.get(url, version, release, base_model)) is not None:
+                return model
+            # Download the FHIR structure definition if the canonical URL has been specified        
+            if not structure_definition and canonical_url:
+                structure_definition = self.download_structure_definition(canonical_url)
+            model = self._build_resource_model(structure_definition, base_model)
+            # Add the current model to the cache
+            if url is not None:
+                self.construction_cache.put(ModelKey(
+                    url, structure_definition.get('version', version), self._get_FHIR_release(structure_definition), base_model
+                ), model)
+            return model
+
+    @staticmethod
+    def _get_FHIR_release(structure_definition: Optional[dict]) -> Optional[str]:
+        """
+        Returns the FHIR release of a StructureDefinition, or None if it is not specified (or invalid).
+        """
+        try:
+            return get_FHIR_release_from_version(structure_definition['fhirVersion'])
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def construct_resource_models(self, structure_definitions: Iterable[Dict[str, Any]], base_model: type=FHIRBaseModel, 
+                                  max_workers: int = MAX_CONCURRENT_REQUESTS) -> Dict[str, ProfileBuild]:
+        """
+        Constructs the models of a set of StructureDefinitions (e.g. all the profiles of an Implementation Guide) 
+        concurrently. The profiles of the slices are constructed first as slice models, the way the models of the 
+        slicing profiles consume them, and each model is only constructed once the models of its slices have been 
+        constructed, while independent models are constructed in parallel.
+
+        Args:
+            structure_definitions (Iterable[Dict[str, Any]]): The FHIR StructureDefinitions to build the models from.
+            base_model (type): The base class of the models.
+            max_workers (int): The maximal number of models constructed concurrently.
+
+        Returns:
+            Dict[str, ProfileBuild]: The outcome of the construction of each model (including its duration), by canonical URL.
+
+        Raises:
+            ValueError: If the dependencies between the profiles are cyclic.
+        """
+        profiles = {structure_definition['url']: structure_definition for structure_definition in structure_definitions}
+        # Make the profiles available locally, such that references between them do not require any download
+        for structure_definition in profiles.values():
+            self.package_registry.add_structure_definition(structure_definition)
+        # Compute the dependency graph between the models, identified by canonical URL and base model
+        dependencies, pending = {}, [(url, base_model) for url in profiles]
+        while pending:
+            node = pending.pop()
+            if node in dependencies:
+                continue
+            dependencies[node] = {
+                (slice_url, FHIRSliceModel) for slice_url in self._get_slice_profiles(profiles[node[0]]) if slice_url in profiles
+            } - {node}
+            pending.extend(dependencies[node])
+        dependents = defaultdict(list)
+        for node, model_dependencies in dependencies.items():
+            for dependency in model_dependencies:
+                dependents[dependency].append(node)
+        self._check_acyclic_dependencies(dependencies, dependents)
+
+        def build(node: Tuple[str, type]) -> Tuple[Tuple[str, type], ProfileBuild]:
+            url, node_base_model = node
+            start = time.perf_counter()
+            try:
+                model = self.construct_resource_model(url, profiles[url], base_model=node_base_model)
+            except Exception as error:
+                return node, ProfileBuild(url, None, time.perf_counter() - start, error)
+            return node, ProfileBuild(url, model, time.perf_counter() - start)
+
+        # Construct the models in topological order, as soon as all their dependencies have been constructed
+        builds, remaining = {}, {node: len(model_dependencies) for node, model_dependencies in dependencies.items()}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {executor.submit(build, node) for node, count in remaining.items() if count == 0}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node, profile_build = future.result()
+                    builds[node] = profile_build
+                    for dependent in dependents[node]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            pending.add(executor.submit(build, dependent))
+        return {url: builds[url, base_model] for url in profiles}
+
+    @staticmethod
+    def _check_acyclic_dependencies(dependencies: Dict[Tuple[str, type], Set[Tuple[str, type]]], 
+                                    dependents: Dict[Tuple[str, type], List[Tuple[str, type]]]) -> None:
+        """
+        Checks that the dependency graph between the models of the profiles can be sorted topologically.
+
+        Raises:
+            ValueError: If the dependencies between the profiles are cyclic.
+        """
+        remaining = {node: len(model_dependencies) for node, model_dependencies in dependencies.items()}
+        ready = [node for node, count in remaining.items() if count == 0]
+        while ready:
+            for dependent in dependents[ready.pop()]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if cyclic := sorted({url for (url, _), count in remaining.items() if count > 0}):
+            raise ValueError(f"Cyclic dependencies between the profiles: {', '.join(cyclic)}")
+
+    @contextmanager
+    def _construction_lock(self, key: Tuple):
+        """
+        Holds the lock of the construction of the model of a given key. The lock is reentrant, such that 
+        the same thread can construct the models of the slices while holding it. The number of threads 
+        holding or waiting for the lock is counted, such that it is only discarded once the last of them 
+        releases it.
+        """
+        with self._construction_locks_lock:
+            entry = self._construction_locks.setdefault(key, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._construction_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._construction_locks[key]
+
+    def _build_resource_model(self, structure_definition: dict, base_model: type) -> FHIRBaseModel:
+        """
+        Builds the Pydantic model of a FHIR structure definition, without any caching.
+
+        Args:
             structure_definition (dict): The FHIR StructureDefinition to build the model from.
+            base_model (type): The base class of the model.
 
         Returns:
             model (BaseModel): The constructed Pydantic model representing the FHIR resource.
         """
-        # If the model has been constructed before, return the cached model
-        if canonical_url in self.construction_cache:
-            return self.construction_cache[canonical_url]
-        # Download the FHIR structure definition if the canonical URL has been specified        
-        if not structure_definition and canonical_url:
-            structure_definition = self.download_structure_definition(canonical_url)
         # Check that the snapshot is available in the FHIR structure definition
         if 'snapshot' not in structure_definition or 'element' not in structure_definition['snapshot']:
             raise ValueError("Invalid StructureDefinition: Missing 'snapshot' or 'element' field")
+        # Download the profiles of the slices concurrently, before constructing their models
+        self.prefetch_profiles(structure_definition)
         # Pre-process the snapshort elements into a tree structure to simplify model construction later
         tree = self.build_tree_structure(structure_definition['snapshot']['element'])
         resource_type = structure_definition['type']
         structure = tree['children'][resource_type]
-        # Configure the factory for the current FHIR environment
-        self.Config = self.FactoryConfig(
+        # Configure the construction for the current FHIR environment
+        config = self.FactoryConfig(
             FHIR_release = get_FHIR_release_from_version(structure_definition['fhirVersion']), 
             resource_name = structure_definition['name'], 
         )
         # Process the FHIR resource's elements & constraints into Pydantic fields & validators
-        fields, validators, properties = self._process_FHIR_structure_into_Pydantic_components(structure)
+        fields, validators, properties = self._process_FHIR_structure_into_Pydantic_components(structure, config)
         # Process resource-level constraints 
         for constraint in structure['constraint']:
             validators = self._add_model_constraint_validator(constraint, validators)
@@ -501,22 +804,19 @@ class ResourceFactory:
                 Literal[f'{resource_type}'], resource_type
             )
             fields['meta'] = (
-                Optional[get_complex_FHIR_type('Meta', self.Config.FHIR_release)], 
-                get_complex_FHIR_type('Meta', self.Config.FHIR_release)(
+                Optional[get_complex_FHIR_type('Meta', config.FHIR_release)], 
+                get_complex_FHIR_type('Meta', config.FHIR_release)(
                     profile=[structure_definition['url']], 
                     versionId=structure_definition['version']
                 )
             )
         # Construct the Pydantic model representing the FHIR resource
-        model = self._create_model_with_properties(self.Config.resource_name, 
+        return self._create_model_with_properties(config.resource_name, 
             fields=fields, 
             base=base_model, 
             validators=validators, 
             properties=properties
         )            
-        # Add the current model to the cache
-        self.construction_cache[canonical_url] = model
-        return model 
     
 
     def construct_dataelement_model(self, structure_definition):
@@ -525,8 +825,8 @@ class ResourceFactory:
         resource_type = structure_definition['type']
         elements = structure_definition['snapshot']['element']
         tree = self.build_tree_structure(elements)        
-        # Configure the factory for the current FHIR environment
-        self.Config = self.FactoryConfig(
+        # Configure the construction for the current FHIR environment
+        config = self.FactoryConfig(
             FHIR_release = get_FHIR_release_from_version(structure_definition['fhirVersion']), 
             resource_name = structure_definition['name'], 
         )
@@ -536,21 +836,43 @@ class ResourceFactory:
             base = self.construction_cache.get(base_name)
         else:
             base = FHIRBaseModel
-        fields, validators, properties = self._process_FHIR_structure_into_Pydantic_components(structure, base)
+        fields, validators, properties = self._process_FHIR_structure_into_Pydantic_components(structure, config, base)
         for constraint in structure.get('constraint',[]):
             validators = self._add_model_constraint_validator(constraint, validators)
-        model = create_model(self.Config.resource_name, **fields, __base__=base, __validators__=validators)
+        model = create_model(config.resource_name, **fields, __base__=base, __validators__=validators)
         model.__doc__ = structure['short']
         for attribute, property_getter in properties.items():
             setattr(model, attribute, property(property_getter))
         return model 
     
-    def clear_chache(self):
+    def invalidate_cache(self, canonical_url: str, version: Optional[str]=None, FHIR_release: Optional[str]=None) -> int:
         """
-        Clears the factory cache.
+        Removes the cached models of a FHIR resource or profile.
+
+        Args:
+            canonical_url (str): The canonical URL (with an optional `|version`) of the resource or profile.
+            version (str, optional): The version of the profile. If not specified, all versions are removed.
+            FHIR_release (str, optional): The FHIR release of the profile. If not specified, all releases are removed.
+
+        Returns:
+            int: The number of removed models.
         """
-        self.construction_cache = {}
+        return self.construction_cache.invalidate(canonical_url, version, FHIR_release)
+
+    def clear_cache(self):
+        """
+        Clears the factory cache, shared by all factories, and the profiles prefetched by this factory.
+        """
+        self.construction_cache.clear()
+        self.prefetched_structure_definitions.clear()
+
+    # Deprecated alias of `clear_cache`
+    clear_chache = clear_cache
 
 factory = ResourceFactory()
 construct_resource_model = factory.construct_resource_model
-clear_chache = factory.clear_chache
\ No newline at end of file
+clear_cache = factory.clear_cache
+clear_chache = factory.clear_chache
+invalidate_cache = factory.invalidate_cache
+load_package = factory.load_package
+construct_resource_models = factory.construct_resource_models
\ No newline at end of file
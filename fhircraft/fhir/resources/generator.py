@@ -4,11 +4,12 @@ from fhircraft.utils import ensure_list
 
 # 3rd party package modules
 from jinja2 import Environment, FileSystemLoader
-from pydantic import BaseModel 
+from pydantic import BaseModel, Discriminator, Tag
 
 # Standard modules
 from collections import defaultdict 
-from typing import Dict, List, Any, Union, _UnionGenericAlias, get_args
+from typing import Dict, List, Any, Union, _UnionGenericAlias, get_args, get_origin
+from typing_extensions import Annotated
 from enum import Enum
 import inspect
 import re 
@@ -71,9 +72,16 @@ class CodeGenerator:
             type_obj = annotation.annotation
         else:
             type_obj = annotation
+        # Import the discriminator and tags of discriminated unions
+        if isinstance(type_obj, (Discriminator, Tag)):
+            self._add_import_statement(type(type_obj))
+            if isinstance(type_obj, Discriminator):
+                self._add_import_statement(type(type_obj.discriminator))
+        elif get_origin(type_obj) is Annotated:
+            self._add_import_statement(Annotated)
         # Ignore NoneType and strings
-        if type_obj is not None and not isinstance(type_obj, str):
-            if inspect.getmodule(type_obj).__name__ == FACTORY_MODULE and issubclass(type_obj, BaseModel):     
+        elif type_obj is not None and not isinstance(type_obj, str):
+            if inspect.getmodule(type_obj).__name__ == FACTORY_MODULE and inspect.isclass(type_obj) and issubclass(type_obj, BaseModel):     
                 # If object was created by ResourceFactory, then serialize the model 
                 self._serialize_model(type_obj)
             else:
@@ -118,7 +126,35 @@ class CodeGenerator:
             for key, value in model.__dict__.items()
             if isinstance(value, property)
         }
-        self.data.update({model: {'fields': subdata, 'properties': model_properties}})
+        self.data.update({model: {
+            'fields': subdata, 
+            'properties': model_properties,
+            'field_validators': self._get_model_validators(model, 'field_validators'),
+            'model_validators': self._get_model_validators(model, 'model_validators'),
+        }})
+
+    @staticmethod
+    def _get_model_validators(model: BaseModel, kind: str) -> Dict[str, Any]:
+        '''
+        Get the validators of a model that are not identical to the ones inherited from its base, 
+        such that inherited validators are not rendered again.
+
+        Args:
+            model (BaseModel): The model whose validators to get.
+            kind (str): The kind of validators, either `field_validators` or `model_validators`.
+
+        Returns:
+            Dict[str, Any]: The validator decorators of the model, by name.
+        '''
+        base_decorators = getattr(model.__base__, '__pydantic_decorators__', None)
+        base_validators = getattr(base_decorators, kind) if base_decorators else {}
+        unwrap = lambda validator: getattr(validator.func, '__func__', validator.func)
+        return {
+            name: validator for name, validator in getattr(model.__pydantic_decorators__, kind).items()
+                if name not in base_validators 
+                    or unwrap(base_validators[name]) is not unwrap(validator) 
+                    or base_validators[name].info != validator.info
+        }
     
     def generate_resource_model_code(self, resources: Union[BaseModel, List[BaseModel]]) -> str:
         '''
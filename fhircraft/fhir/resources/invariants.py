@@ -0,0 +1,109 @@
+"""
+Native Python implementations of frequently evaluated FHIR core invariants.
+
+The implementations are registered by the exact FHIRPath expression of the invariant and are used
+instead of the FHIRPath engine whenever a constraint with that expression is validated. Each implementation
+must return the same verdict as the FHIRPath evaluation of the expression, or `None` if it cannot decide
+(e.g. for unsupported input values), in which case the FHIRPath engine is used.
+"""
+
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, Optional
+
+# Native implementations of invariants, keyed by their FHIRPath expression
+NATIVE_INVARIANTS: Dict[str, Callable[[Any], Optional[bool]]] = {}
+
+
+def native_invariant(*expressions: str) -> Callable:
+    """
+    Decorator registering a function as the native implementation of the invariants with the given FHIRPath expressions.
+
+    Args:
+        expressions (str): The FHIRPath expressions implemented by the function.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(function):
+        for expression in expressions:
+            NATIVE_INVARIANTS[expression] = function
+        return function
+    return decorator
+
+
+def get_native_invariant(expression: str) -> Optional[Callable[[Any], Optional[bool]]]:
+    """
+    Returns the native implementation of an invariant, if available.
+
+    Args:
+        expression (str): The FHIRPath expression of the invariant.
+
+    Returns:
+        Optional[Callable]: The native implementation, or None if the invariant has not been implemented natively.
+    """
+    return NATIVE_INVARIANTS.get(expression)
+
+
+def _exists(instance: BaseModel, element: str) -> bool:
+    """
+    Native equivalent of `<element>.exists()` evaluated on a model instance.
+    """
+    value = getattr(instance, element, None)
+    if isinstance(value, list):
+        return any(entry is not None for entry in value)
+    return value is not None
+
+
+@native_invariant(
+    'hasValue() or (children().count() > id.count())',
+    'hasValue() or (children().count() > id.count()) or $this is Parameters',
+)
+def ele_1(instance: Any) -> Optional[bool]:
+    """
+    `ele-1`: All FHIR elements must have a @value or children.
+
+    The evaluated item always holds a value, hence `hasValue()` is always true.
+    """
+    if not isinstance(instance, BaseModel):
+        return None
+    return True
+
+
+@native_invariant('extension.exists() != value.exists()')
+def ext_1(instance: Any) -> Optional[bool]:
+    """
+    `ext-1`: Must have either extensions or value[x], not both.
+    """
+    if not isinstance(instance, BaseModel):
+        return None
+    return _exists(instance, 'extension') != _exists(instance, 'value')
+
+
+@native_invariant('code.empty() or system.exists()')
+def qty_3(instance: Any) -> Optional[bool]:
+    """
+    `qty-3`: If a code for the unit is present, the system SHALL also be present.
+    """
+    if not isinstance(instance, BaseModel):
+        return None
+    return not _exists(instance, 'code') or _exists(instance, 'system')
+
+
+@native_invariant('value.empty() or system.exists()')
+def cpt_2(instance: Any) -> Optional[bool]:
+    """
+    `cpt-2`: A system is required if a value is provided.
+    """
+    if not isinstance(instance, BaseModel):
+        return None
+    return not _exists(instance, 'value') or _exists(instance, 'system')
+
+
+@native_invariant('timeOfDay.empty() or when.empty()')
+def tim_10(instance: Any) -> Optional[bool]:
+    """
+    `tim-10`: If there's a timeOfDay, there cannot be a when, or vice versa.
+    """
+    if not isinstance(instance, BaseModel):
+        return None
+    return not _exists(instance, 'timeOfDay') or not _exists(instance, 'when')
@@ -0,0 +1,174 @@
+"""
+Offline registry of FHIR StructureDefinitions loaded from FHIR NPM packages.
+
+FHIR packages are distributed as NPM tarballs (`package.tgz`), containing the resources of the package in a
+`package/` folder, optionally along with an `.index.json` file listing the resources and their canonical URLs.
+The registry indexes all StructureDefinitions of the loaded packages by canonical URL and version at load time,
+such that profiles can be resolved without any network access.
+"""
+
+import json
+import os
+import tarfile
+import typing
+from pathlib import Path
+
+# Name of the index file of a FHIR package, listing the resources of the package
+PACKAGE_INDEX_FILENAME = '.index.json'
+
+
+def split_canonical_url(canonical_url: str) -> typing.Tuple[str, typing.Optional[str]]:
+    """
+    Splits a canonical URL into the URL and its (optional) version, separated by a `|`.
+
+    Args:
+        canonical_url (str): The canonical URL, e.g. `http://hl7.org/fhir/StructureDefinition/Patient|4.0.1`.
+
+    Returns:
+        Tuple[str, Optional[str]]: The URL and the version, if specified.
+    """
+    url, _, version = canonical_url.partition('|')
+    return url, version or None
+
+
+def _version_key(version: typing.Optional[str]) -> typing.Tuple:
+    # Compare the numeric parts of versions numerically, and any other part alphabetically
+    return tuple((0, int(part), '') if part.isdigit() else (1, 0, part) for part in (version or '').replace('-', '.').split('.'))
+
+
+class PackageRegistry:
+    """
+    Registry of the StructureDefinitions contained in FHIR NPM packages, indexed by canonical URL and version.
+
+    The StructureDefinitions are only indexed at load time, and are read and parsed on demand.
+
+    Attributes:
+        packages (List[str]): The `name#version` identifiers of the loaded packages.
+    """
+
+    def __init__(self):
+        self.packages: typing.List[str] = []
+        # Loaders of the StructureDefinitions, by canonical URL and version
+        self._index: typing.Dict[str, typing.Dict[typing.Optional[str], typing.Callable[[], dict]]] = {}
+
+    def load_package(self, path: typing.Union[str, os.PathLike]) -> str:
+        """
+        Loads a FHIR package into the registry, either as an NPM tarball (`.tgz`) or as an unpacked directory.
+
+        Args:
+            path (Union[str, PathLike]): The path to the package tarball or directory.
+
+        Returns:
+            str: The `name#version` identifier of the package.
+
+        Raises:
+            FileNotFoundError: If the path does not exist.
+            ValueError: If the file is not a valid package tarball.
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f'FHIR package not found: {path}')
+        if path.is_dir():
+            # Unpacked packages can contain the package folder itself, or its contents
+            package = self._load_directory(path / 'package' if (path / 'package').is_dir() else path)
+        elif tarfile.is_tarfile(path):
+            package = self._load_tarball(path)
+        else:
+            raise ValueError(f'Invalid FHIR package: {path} is neither a directory nor a package tarball')
+        self.packages.append(package)
+        return package
+
+    def _load_directory(self, directory: Path) -> str:
+        files = {filename: (lambda file=directory / filename: json.loads(file.read_bytes()))
+                    for filename in os.listdir(directory) if filename.endswith('.json')}
+        return self._index_package(files)
+
+    def _load_tarball(self, path: Path) -> str:
+        # The tarball is read once, keeping the raw content of its resources to be parsed on demand
+        contents = {}
+        with tarfile.open(path, 'r:*') as tarball:
+            for member in tarball.getmembers():
+                directory, _, filename = member.name.lstrip('./').rpartition('/')
+                if member.isfile() and directory == 'package' and filename.endswith('.json'):
+                    contents[filename] = tarball.extractfile(member).read()
+        if 'package.json' not in contents:
+            raise ValueError(f'Invalid FHIR package: {path} does not contain a package/package.json manifest')
+        return self._index_package({filename: (lambda content=content: json.loads(content)) for filename, content in contents.items()})
+
+    def _index_package(self, files: typing.Dict[str, typing.Callable[[], dict]]) -> str:
+        manifest = files.pop('package.json', lambda: {})()
+        if PACKAGE_INDEX_FILENAME in files:
+            # Use the index of the package, without parsing any of its resources
+            entries = [
+                (entry['filename'], entry.get('url'), entry.get('version'))
+                    for entry in files.pop(PACKAGE_INDEX_FILENAME)().get('files', [])
+                        if entry.get('resourceType') == 'StructureDefinition' and entry.get('filename') in files
+            ]
+        else:
+            entries = []
+            for filename, loader in files.items():
+                try:
+                    resource = loader()
+                except ValueError:
+                    continue
+                if isinstance(resource, dict) and resource.get('resourceType') == 'StructureDefinition':
+                    entries.append((filename, resource.get('url'), resource.get('version')))
+                    files[filename] = lambda resource=resource: resource
+        for filename, url, version in entries:
+            if url:
+                self._index.setdefault(url, {})[version] = files[filename]
+        return f"{manifest.get('name', 'unknown')}#{manifest.get('version', 'unknown')}"
+
+    def add_structure_definition(self, structure_definition: dict) -> None:
+        """
+        Registers a single StructureDefinition in the registry.
+
+        Args:
+            structure_definition (dict): The StructureDefinition, with its canonical `url`.
+        """
+        self._index.setdefault(structure_definition['url'], {})[structure_definition.get('version')] = lambda: structure_definition
+
+    def __contains__(self, canonical_url: str) -> bool:
+        url, version = split_canonical_url(canonical_url)
+        return url in self._index and (version is None or version in self._index[url])
+
+    def __len__(self) -> int:
+        return sum(len(versions) for versions in self._index.values())
+
+    def get_versions(self, url: str) -> typing.List[typing.Optional[str]]:
+        """
+        Returns the versions of a StructureDefinition available in the registry, from the oldest to the latest.
+
+        Args:
+            url (str): The canonical URL of the StructureDefinition (without version).
+
+        Returns:
+            List[Optional[str]]: The available versions.
+        """
+        return sorted(self._index.get(url, {}), key=_version_key)
+
+    def get_structure_definition(self, canonical_url: str) -> typing.Optional[dict]:
+        """
+        Resolves a canonical URL to a StructureDefinition of the loaded packages.
+
+        Args:
+            canonical_url (str): The canonical URL, with an optional `|version`. If no version is specified,
+                                 the latest available version is returned.
+
+        Returns:
+            Optional[dict]: The StructureDefinition, or None if it is not available in the registry.
+        """
+        url, version = split_canonical_url(canonical_url)
+        if not (versions := self._index.get(url)):
+            return None
+        if version is None:
+            version = self.get_versions(url)[-1]
+        loader = versions.get(version)
+        return loader() if loader is not None else None
+
+    def clear(self) -> None:
+        """
+        Removes all packages from the registry.
+        """
+        self.packages = []
+        self._index = {}
@@ -0,0 +1,236 @@
+"""
+Registry of the models constructed by the `ResourceFactory`, keyed by the canonical URL, version and FHIR release
+of their StructureDefinition (and by their base model, as profiles can be constructed both as resources and as
+slices of other profiles).
+
+The registry can be bounded in number of models and in (estimated) memory, evicting the least recently used models
+first, such that long-running services loading many profile versions do not accumulate models indefinitely.
+"""
+
+import sys
+import threading
+import typing
+from collections import OrderedDict
+
+from fhircraft.fhir.resources.packages import split_canonical_url, _version_key
+
+
+class ModelKey(typing.NamedTuple):
+    """
+    The key of a model in the registry.
+
+    Attributes:
+        url (str): The canonical URL of the StructureDefinition of the model.
+        version (Optional[str]): The version of the StructureDefinition.
+        release (Optional[str]): The FHIR release of the StructureDefinition, e.g. `R4`.
+        base (Optional[type]): The base model of the model.
+    """
+    url: str
+    version: typing.Optional[str]
+    release: typing.Optional[str]
+    base: typing.Optional[type] = None
+
+
+class ModelRegistryStats(typing.NamedTuple):
+    """
+    Statistics of the usage of a model registry.
+
+    Attributes:
+        hits (int): The number of lookups that returned a model.
+        misses (int): The number of lookups that did not return any model.
+        evictions (int): The number of models evicted to respect the bounds of the registry.
+        size (int): The number of models in the registry.
+        maxsize (Optional[int]): The maximal number of models in the registry, if bounded.
+        memory (int): The estimated memory used by the models in the registry, in bytes.
+        max_memory (Optional[int]): The maximal estimated memory used by the models in the registry, if bounded.
+    """
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: typing.Optional[int]
+    memory: int
+    max_memory: typing.Optional[int]
+
+
+def estimate_model_memory(model: type) -> int:
+    """
+    Estimates the memory used by a Pydantic model class, i.e. by the class itself and its core schema.
+    The memory of the nested models referenced by the schema is not included.
+
+    Args:
+        model (type): The Pydantic model.
+
+    Returns:
+        int: The estimated memory, in bytes.
+    """
+    memory, seen = sys.getsizeof(model) + sys.getsizeof(model.__dict__), set()
+    stack = [getattr(model, '__pydantic_core_schema__', None), dict(model.__dict__)]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen or isinstance(value, type):
+            continue
+        seen.add(id(value))
+        memory += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+    return memory
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU registry of the models constructed from StructureDefinitions.
+
+    Attributes:
+        maxsize (Optional[int]): The maximal number of models in the registry. If None, the number is not bounded.
+        max_memory (Optional[int]): The maximal estimated memory (in bytes) used by the models. If None, it is not bounded.
+    """
+
+    def __init__(self, maxsize: typing.Optional[int] = None, max_memory: typing.Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_memory = max_memory
+        self._entries: "OrderedDict[ModelKey, typing.Tuple[type, int]]" = OrderedDict()
+        self._keys_by_url: typing.Dict[str, typing.Set[ModelKey]] = {}
+        self._memory = 0
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.RLock()
+
+    def _find(self, url: str, version: typing.Optional[str], release: typing.Optional[str], base: typing.Optional[type]) -> typing.Optional[ModelKey]:
+        # Unspecified parts of the key match any model, preferring the latest version
+        keys = [
+            key for key in self._keys_by_url.get(url, ())
+                if (version is None or key.version == version) and (release is None or key.release == release)
+                    and (base is None or key.base is base)
+        ]
+        return max(keys, key=lambda key: (key.version is not None, _version_key(key.version))) if keys else None
+
+    def get(self, url: typing.Optional[str], version: typing.Optional[str] = None, release: typing.Optional[str] = None,
+            base: typing.Optional[type] = None) -> typing.Optional[type]:
+        """
+        Looks up a model in the registry, marking it as recently used.
+
+        Args:
+            url (Optional[str]): The canonical URL of the StructureDefinition, optionally followed by a `|version`.
+            version (Optional[str]): The version of the StructureDefinition. If None, the latest version is returned.
+            release (Optional[str]): The FHIR release of the StructureDefinition. If None, any release matches.
+            base (Optional[type]): The base model of the model. If None, any base model matches.
+
+        Returns:
+            Optional[type]: The model, or None if no model matches.
+        """
+        if url is None:
+            return None
+        url, url_version = split_canonical_url(url)
+        with self._lock:
+            if (key := self._find(url, version or url_version, release, base)) is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: ModelKey, model: type) -> None:
+        """
+        Stores a model in the registry, evicting the least recently used models if the registry exceeds its bounds.
+
+        Args:
+            key (ModelKey): The key of the model.
+            model (type): The model.
+        """
+        memory = estimate_model_memory(model)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (model, memory)
+            self._keys_by_url.setdefault(key.url, set()).add(key)
+            self._memory += memory
+            self._evict()
+
+    def _remove(self, key: ModelKey) -> bool:
+        if (entry := self._entries.pop(key, None)) is None:
+            return False
+        self._memory -= entry[1]
+        keys = self._keys_by_url[key.url]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_url[key.url]
+        return True
+
+    def _evict(self) -> None:
+        # The most recently stored model is never evicted
+        while len(self._entries) > 1 and (
+            (self.maxsize is not None and len(self._entries) > self.maxsize)
+                or (self.max_memory is not None and self._memory > self.max_memory)
+        ):
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def resize(self, maxsize: typing.Optional[int] = None, max_memory: typing.Optional[int] = None) -> None:
+        """
+        Changes the bounds of the registry, evicting the least recently used models if necessary.
+
+        Args:
+            maxsize (Optional[int]): The maximal number of models in the registry. If None, the number is not bounded.
+            max_memory (Optional[int]): The maximal estimated memory (in bytes) used by the models. If None, it is not bounded.
+        """
+        with self._lock:
+            self.maxsize, self.max_memory = maxsize, max_memory
+            self._evict()
+
+    def invalidate(self, url: str, version: typing.Optional[str] = None, release: typing.Optional[str] = None) -> int:
+        """
+        Removes the models of a StructureDefinition from the registry.
+
+        Args:
+            url (str): The canonical URL of the StructureDefinition, optionally followed by a `|version`.
+            version (Optional[str]): The version of the StructureDefinition. If None, all versions are removed.
+            release (Optional[str]): The FHIR release of the StructureDefinition. If None, all releases are removed.
+
+        Returns:
+            int: The number of removed models.
+        """
+        url, url_version = split_canonical_url(url)
+        version = version or url_version
+        with self._lock:
+            keys = [
+                key for key in self._keys_by_url.get(url, ())
+                    if (version is None or key.version == version) and (release is None or key.release == release)
+            ]
+            return sum(self._remove(key) for key in keys)
+
+    def clear(self) -> None:
+        """
+        Removes all models from the registry and resets its statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_url.clear()
+            self._memory = 0
+            self._hits = self._misses = self._evictions = 0
+
+    def stats(self) -> ModelRegistryStats:
+        """
+        Returns the statistics of the usage of the registry.
+        """
+        with self._lock:
+            return ModelRegistryStats(
+                hits=self._hits, misses=self._misses, evictions=self._evictions, size=len(self._entries),
+                maxsize=self.maxsize, memory=self._memory, max_memory=self.max_memory,
+            )
+
+    def keys(self) -> typing.List[ModelKey]:
+        """
+        Returns the keys of the models in the registry, from the least to the most recently used.
+        """
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, url: str) -> bool:
+        url, version = split_canonical_url(url)
+        with self._lock:
+            return self._find(url, version, None, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
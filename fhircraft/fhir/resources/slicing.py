@@ -0,0 +1,186 @@
+"""
+Discriminator-based dispatch of the elements of sliced fields to their slice models.
+
+The `slicing.discriminator` definitions of a sliced element in a StructureDefinition describe how each element
+is assigned to a slice, e.g. by the fixed or pattern value of one of its children. The discriminators are compiled
+into rules for each slice, such that each element is validated directly against the model of its slice, instead of
+being validated against every slice model in turn.
+"""
+
+import typing
+from enum import Enum
+from pydantic import BaseModel
+
+from fhircraft.utils import ensure_list
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+# Tag of the base type of a sliced element, accepting the elements not assigned to any slice
+SLICE_BASE_TAG = '@base'
+
+# A discriminator rule, as a tuple of the discriminator type, the path and the expected value
+DiscriminatorRule = typing.Tuple[str, str, typing.Any]
+
+
+def _get_children(node: dict, name: str) -> typing.Optional[dict]:
+    children = node.get('children', {})
+    return children.get(name) or children.get(f'{name}[x]')
+
+
+def get_path_values(value: typing.Any, path: str) -> typing.List[typing.Any]:
+    """
+    Collects the values found at a (simple, dot-separated) discriminator path within an element.
+
+    Args:
+        value (Any): The element, either as a dictionary or a model instance.
+        path (str): The discriminator path, e.g. `code.coding.code` or `$this`.
+
+    Returns:
+        List[Any]: The values found at the path.
+    """
+    values = [entry for entry in ensure_list(value) if entry is not None]
+    for part in ([] if path == '$this' else path.split('.')):
+        values = [
+            entry for value in values
+                for entry in ensure_list(value.get(part) if isinstance(value, dict) else getattr(value, part, None))
+                    if entry is not None
+        ]
+    return values
+
+
+def matches_pattern(value: typing.Any, pattern: typing.Any) -> bool:
+    """
+    Checks whether a value matches a pattern, i.e. whether all elements of the pattern are present in the value.
+
+    Args:
+        value (Any): The value, with its elements either as dictionaries or model instances.
+        pattern (Any): The JSON pattern.
+
+    Returns:
+        bool: True if the value matches the pattern.
+    """
+    if isinstance(pattern, list):
+        values = ensure_list(value)
+        return all(any(matches_pattern(entry, pattern_entry) for entry in values) for pattern_entry in pattern)
+    if isinstance(value, list):
+        return any(matches_pattern(entry, pattern) for entry in value)
+    if isinstance(pattern, dict):
+        if isinstance(value, BaseModel):
+            value = value.model_dump(by_alias=True, exclude_none=True)
+        return isinstance(value, dict) and all(
+            value.get(key) is not None and matches_pattern(value[key], entry) for key, entry in pattern.items()
+        )
+    if isinstance(value, Enum):
+        value = value.value
+    return value == pattern
+
+
+def _get_discriminator_rule(slice_element: dict, discriminator: dict) -> typing.Optional[DiscriminatorRule]:
+    """
+    Compiles a discriminator of a sliced element into the rule assigning elements to a given slice.
+
+    Returns:
+        Optional[DiscriminatorRule]: The rule, or None if the discriminator is not supported or not defined by the slice.
+    """
+    discriminator_type, path = discriminator.get('type'), discriminator.get('path', '$this')
+    parts = [] if path == '$this' else path.split('.')
+    if discriminator_type in ('value', 'pattern'):
+        node = slice_element
+        for index in range(len(parts) + 1):
+            # The value can be fixed at the path, or by one of its ancestors
+            if constraint := next((key for key in node if key.startswith(('fixed', 'pattern'))), None):
+                expected = get_path_values(node[constraint], '.'.join(parts[index:]) or '$this')
+                return (discriminator_type, path, expected) if expected else None
+            if index == len(parts) or (node := _get_children(node, parts[index])) is None:
+                break
+        # Extension slices are discriminated by their URL, given by the profile of the slice
+        if path == 'url' and (profiles := (slice_element.get('type') or [{}])[0].get('profile')):
+            return (discriminator_type, path, [profiles[0]])
+    elif discriminator_type == 'exists':
+        node = slice_element
+        for part in parts:
+            if (node := _get_children(node, part)) is None:
+                return None
+        if str(node.get('max')) == '0':
+            return ('exists', path, False)
+        if int(node.get('min') or 0) > 0:
+            return ('exists', path, True)
+    elif discriminator_type == 'type':
+        # The types are constrained by the element at the path, e.g. `Bundle.entry:patient.resource`
+        node = slice_element
+        for part in parts:
+            if (node := _get_children(node, part)) is None:
+                return None
+        codes = [element_type.get('code') for element_type in node.get('type', [])]
+        # Only resources carry their type (`resourceType`) in their content
+        if codes and all(_is_resource_type(code) for code in codes):
+            return ('type', path, codes)
+    return None
+
+
+def _is_resource_type(code: typing.Optional[str]) -> bool:
+    """
+    Checks whether a type code refers to a concrete resource type, as opposed to a data type or an abstract resource.
+    """
+    return bool(code) and code[0].isupper() and code not in ('Resource', 'DomainResource') \
+        and get_complex_FHIR_type(code) is None
+
+
+def get_slice_discriminator_rules(slice_element: dict, discriminators: typing.List[dict]) -> typing.Optional[typing.List[DiscriminatorRule]]:
+    """
+    Compiles the discriminators of a sliced element into the rules assigning elements to a given slice.
+
+    Args:
+        slice_element (dict): The element tree of the slice.
+        discriminators (List[dict]): The `slicing.discriminator` definitions of the sliced element.
+
+    Returns:
+        Optional[List[DiscriminatorRule]]: The rules, or None if any of the discriminators cannot be compiled
+                                           (e.g. `profile` discriminators, or paths with functions).
+    """
+    if not discriminators:
+        return None
+    rules = []
+    for discriminator in discriminators:
+        if (rule := _get_discriminator_rule(slice_element, discriminator)) is None:
+            return None
+        rules.append(rule)
+    return rules
+
+
+class SliceDiscriminator:
+    """
+    Callable discriminator of a sliced field, returning the tag of the slice model (i.e. its name) that an element
+    must be validated against, or `SLICE_BASE_TAG` if the element does not belong to any slice.
+
+    Attributes:
+        slices (Dict[str, List[DiscriminatorRule]]): The discriminator rules of each slice, by tag, in the order of the slices.
+    """
+
+    def __init__(self, slices: typing.Dict[str, typing.List[DiscriminatorRule]]):
+        self.slices = slices
+        # Name required by Pydantic for callable discriminators
+        self.__name__ = type(self).__name__
+
+    def __call__(self, value: typing.Any) -> str:
+        if isinstance(value, BaseModel):
+            # Instances of the slice models are validated against their own model
+            return type(value).__name__ if type(value).__name__ in self.slices else SLICE_BASE_TAG
+        for tag, rules in self.slices.items():
+            if all(self._matches(value, rule) for rule in rules):
+                return tag
+        return SLICE_BASE_TAG
+
+    @staticmethod
+    def _matches(value: typing.Any, rule: DiscriminatorRule) -> bool:
+        discriminator_type, path, expected = rule
+        if discriminator_type == 'exists':
+            return bool(get_path_values(value, path)) == expected
+        if discriminator_type == 'type':
+            return any(
+                (entry.get('resourceType') if isinstance(entry, dict) else type(entry).__name__) in expected 
+                    for entry in get_path_values(value, path)
+            )
+        return matches_pattern(get_path_values(value, path), expected)
+
+    def __repr__(self) -> str:
+        return f'SliceDiscriminator({self.slices!r})'
@@ -0,0 +1,857 @@
+"""
+The validation module provides the state shared by the validators of FHIR models during a single validation
+(e.g. a `model_validate` call), including the nested validations of all its elements.
+
+It also implements the deferred validation mode, in which models are parsed immediately but their constraint, 
+pattern and slicing validators are only recorded, to be run later on one or many instances.
+"""
+
+import typing
+import hashlib
+import threading
+from enum import IntEnum
+from functools import lru_cache
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pydantic import BaseModel, ValidationError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import Executor
+
+from fhircraft.fhir.path.engine.cache import evaluation_cache, expression_signature
+from fhircraft.utils import get_all_models_from_field
+
+_active_validation_context: ContextVar[typing.Optional["ValidationContext"]] = ContextVar('fhir_validation_context', default=None)
+_deferred_validation: ContextVar[bool] = ContextVar('fhir_deferred_validation', default=False)
+_active_validation_report: ContextVar[typing.Optional["ValidationReport"]] = ContextVar('fhir_validation_report', default=None)
+
+# Name of the instance attribute holding the validations deferred during the validation of the instance
+PENDING_VALIDATIONS_ATTRIBUTE = '_pending_validations'
+# Name of the instance attribute holding the fields modified in place since the instance was validated
+MODIFIED_FIELDS_ATTRIBUTE = '_modified_fields'
+# Key of the validation level in the Pydantic validation context
+VALIDATION_LEVEL_CONTEXT_KEY = 'validation_level'
+
+
+class ValidationLevel(IntEnum):
+    """
+    Levels of validation of FHIR models, each level including the checks of the previous ones.
+
+    Attributes:
+        STRUCTURE: Only the structure of the model is validated (types, elements cardinalities and type choices).
+        CARDINALITY: Additionally validates the cardinalities of the slices of sliced elements.
+        INVARIANTS: Additionally validates the FHIRPath invariant constraints.
+        PATTERNS: Additionally validates the pattern constraints of the elements (full validation).
+    """
+    STRUCTURE = 1
+    CARDINALITY = 2
+    INVARIANTS = 3
+    PATTERNS = 4
+
+
+def get_validation_level(context: typing.Optional[dict]) -> typing.Optional[ValidationLevel]:
+    """
+    Returns the validation level specified in a Pydantic validation context.
+
+    Args:
+        context (Optional[dict]): The Pydantic validation context, passed e.g. via `model_validate(..., context=...)`.
+
+    Returns:
+        Optional[ValidationLevel]: The validation level, or None if not specified.
+
+    Raises:
+        ValueError: If the validation level is not valid.
+    """
+    if not context or (level := context.get(VALIDATION_LEVEL_CONTEXT_KEY)) is None:
+        return None
+    if isinstance(level, str):
+        try:
+            return ValidationLevel[level.upper()]
+        except KeyError:
+            raise ValueError(f"Invalid validation level '{level}'. Must be one of {[level.name for level in ValidationLevel]}.")
+    return ValidationLevel(level)
+
+
+@dataclass
+class ValidationIssue:
+    """
+    An issue found during the validation of a FHIR model.
+
+    Attributes:
+        severity (str): The severity of the issue (`error` or `warning`).
+        code (str): The FHIR issue type, e.g. `invariant` or `structure`.
+        message (str): Human-readable description of the issue.
+        key (Optional[str]): The key of the violated constraint, if any.
+        expression (Optional[str]): The FHIRPath expression of the violated constraint, if any.
+        location (Optional[str]): The FHIRPath location of the element at which the issue was found.
+        value (Any): The element at which the issue was found, used to resolve its location.
+    """
+    severity: str
+    code: str
+    message: str
+    key: typing.Optional[str] = None
+    expression: typing.Optional[str] = None
+    location: typing.Optional[str] = None
+    value: typing.Any = field(default=None, repr=False, compare=False)
+
+    def to_operation_outcome_issue(self) -> dict:
+        """
+        Converts the issue into the `issue` element of a FHIR `OperationOutcome` resource.
+        """
+        diagnostics = self.message
+        if self.key:
+            diagnostics += f'. [{self.key}] -> "{self.expression}"'
+        issue = {'severity': self.severity, 'code': self.code, 'diagnostics': diagnostics}
+        if self.location:
+            issue['expression'] = [self.location]
+        return issue
+
+
+class ValidationReport:
+    """
+    Collection of all the issues found during the validation of a FHIR model, in which failing constraints 
+    are recorded instead of interrupting the validation.
+
+    Attributes:
+        resource (Optional[BaseModel]): The validated instance, or None if the model could not be constructed.
+        issues (List[ValidationIssue]): The issues found during the validation.
+    """
+    def __init__(self):
+        self.resource = None
+        self.issues: typing.List[ValidationIssue] = []
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        Whether no issue of severity `error` was found.
+        """
+        return not any(issue.severity == 'error' for issue in self.issues)
+
+    @property
+    def errors(self) -> typing.List[ValidationIssue]:
+        """
+        The issues of severity `error`.
+        """
+        return [issue for issue in self.issues if issue.severity == 'error']
+
+    @property
+    def warnings(self) -> typing.List[ValidationIssue]:
+        """
+        The issues of severity `warning`.
+        """
+        return [issue for issue in self.issues if issue.severity == 'warning']
+
+    def add_issue(self, value: typing.Any, severity: str, code: str, message: str, key: typing.Optional[str] = None, expression: typing.Optional[str] = None) -> None:
+        """
+        Records an issue found on an element.
+
+        Args:
+            value (Any): The element at which the issue was found.
+            severity (str): The severity of the issue (`error` or `warning`).
+            code (str): The FHIR issue type.
+            message (str): Human-readable description of the issue.
+            key (Optional[str]): The key of the violated constraint, if any.
+            expression (Optional[str]): The FHIRPath expression of the violated constraint, if any.
+        """
+        self.issues.append(ValidationIssue(severity=severity, code=code, message=message, key=key, expression=expression, value=value))
+
+    def add_validation_error(self, error: ValidationError, model: type, root: str) -> None:
+        """
+        Records the structural errors of a Pydantic `ValidationError`.
+
+        Args:
+            error (ValidationError): The validation error.
+            model (type): The validated model.
+            root (str): The FHIRPath location of the validated model.
+        """
+        for details in error.errors(include_url=False):
+            location = _error_location(model, details['loc'], root)
+            self.issues.append(ValidationIssue(severity='error', code='structure', message=details['msg'], location=location))
+
+    def resolve_locations(self, root: typing.Any, root_location: str) -> None:
+        """
+        Resolves the FHIRPath locations of the issues from the elements at which they were found.
+        The issues found on elements that are not part of the model are located by the name of their type.
+
+        Args:
+            root (Any): The validated instance.
+            root_location (str): The FHIRPath location of the validated instance.
+        """
+        locations = {}
+        if root is not None:
+            _locate_elements(root, root_location, locations)
+        for issue in self.issues:
+            if issue.location is None:
+                issue.location = locations.get(id(issue.value), root_location if issue.value is None else type(issue.value).__name__)
+
+    def to_operation_outcome(self) -> dict:
+        """
+        Converts the report into a FHIR `OperationOutcome` resource.
+
+        Returns:
+            dict: The JSON representation of the `OperationOutcome` resource.
+        """
+        if not self.issues:
+            return {
+                'resourceType': 'OperationOutcome', 
+                'issue': [{'severity': 'information', 'code': 'informational', 'diagnostics': 'No issues detected during validation'}],
+            }
+        return {
+            'resourceType': 'OperationOutcome', 
+            'issue': [issue.to_operation_outcome_issue() for issue in self.issues],
+        }
+
+    def __repr__(self):
+        return f'ValidationReport(errors={len(self.errors)}, warnings={len(self.warnings)})'
+
+
+def _error_location(model: typing.Optional[type], loc: tuple, root: str) -> str:
+    """
+    Converts the location of a Pydantic validation error into a FHIRPath location, 
+    leaving out the parts of the location that refer to members of union types.
+    """
+    location = root
+    for part in loc:
+        if isinstance(part, int):
+            location += f'[{part}]'
+            continue
+        if model is None:
+            continue
+        fields = {field.alias or name: (name, field) for name, field in model.model_fields.items()}
+        if part in fields:
+            name, field = fields[part]
+            location += f'.{name}'
+            model = next(get_all_models_from_field(field), None)
+    return location
+
+
+def _locate_elements(value: typing.Any, location: str, locations: dict) -> None:
+    """
+    Maps the identities of the elements nested within a value to their FHIRPath locations.
+    """
+    if isinstance(value, list):
+        locations.setdefault(id(value), location)
+        for index, entry in enumerate(value):
+            _locate_elements(entry, f'{location}[{index}]', locations)
+    elif isinstance(value, BaseModel):
+        locations.setdefault(id(value), location)
+        for name in type(value).model_fields:
+            if (entry := getattr(value, name, None)) is not None:
+                _locate_elements(entry, f'{location}.{name}', locations)
+
+
+class ValidationContext:
+    """
+    State of a single validation of a FHIR model.
+
+    Keeps track of the constraints that have already been evaluated on each object, such that a constraint
+    attached to several validators (e.g. `ele-1`, attached to the fields of a model as well as to the models of
+    these fields) is evaluated at most once per object and validation.
+
+    The validated objects are referenced by the context for its whole lifetime, such that their identities cannot be reused.
+
+    Attributes:
+        level (ValidationLevel): The level of validation.
+        deferred (bool): Whether the constraint validators are recorded instead of being run.
+        report (Optional[ValidationReport]): The report collecting the failed validations, instead of raising them.
+        changed_fields (Optional[Dict[int, Set[str]]]): During an incremental revalidation, the fields that changed 
+            in each instance (by identity), restricting the validated constraints to the ones reading them.
+        pending_validations (list): The validator calls recorded in deferred mode, as tuples of function, arguments and keyword arguments.
+        constraint_evaluations (int): Number of constraint evaluations claimed during the validation.
+        skipped_constraint_evaluations (int): Number of redundant constraint evaluations that were skipped.
+    """
+    def __init__(self, level: ValidationLevel = ValidationLevel.PATTERNS, deferred: bool = False, report: typing.Optional[ValidationReport] = None):
+        self.level = level
+        self.deferred = deferred
+        self.report = report
+        self.changed_fields = None
+        self.pending_validations = []
+        self.constraint_evaluations = 0
+        self.skipped_constraint_evaluations = 0
+        self._evaluated_constraints = set()
+        self._objects = []
+        self._content_hashes = {}
+
+    def content_hash(self, value: BaseModel) -> bytes:
+        """
+        Computes the canonical content hash of a model instance, computed at most once per instance and validation.
+        The hashes of the nested models are reused, such that each instance is only serialized once per validation.
+
+        Args:
+            value (BaseModel): The model instance.
+
+        Returns:
+            bytes: The content hash of the instance.
+        """
+        return _content_hash(value, self._content_hashes, self._objects)
+
+    def enables(self, level: ValidationLevel) -> bool:
+        """
+        Checks whether the validators of a given level must be run.
+
+        Args:
+            level (ValidationLevel): The level of the validator.
+
+        Returns:
+            bool: True if the validation level includes the given level, False otherwise.
+        """
+        return self.level >= level
+
+    def defer(self, validator: typing.Callable, *args, **kwargs) -> bool:
+        """
+        Records a validator call to be run later, if the validation is deferred.
+
+        Args:
+            validator (Callable): The validator function.
+            *args: The positional arguments of the call.
+            **kwargs: The keyword arguments of the call.
+
+        Returns:
+            bool: True if the call has been deferred, False if the validator must be run now.
+        """
+        if not self.deferred:
+            return False
+        self.pending_validations.append((validator, args, kwargs))
+        return True
+
+    def claim_constraint_evaluation(self, key: str, value: typing.Any, expression: typing.Optional[str] = None) -> bool:
+        """
+        Registers the evaluation of a constraint on a value.
+
+        Args:
+            key (str): The key of the constraint.
+            value (Any): The value on which the constraint is evaluated.
+            expression (Optional[str]): The FHIRPath expression of the constraint. Constraints sharing a key 
+                but with different expressions (e.g. tightened by a profile) are evaluated separately.
+
+        Returns:
+            bool: False if the constraint has already been evaluated on the same object during this validation, True otherwise.
+                  Values that are not models or containers (e.g. primitives) have no unique identity and are always evaluated.
+        """
+        if not isinstance(value, (BaseModel, dict, list)):
+            self.constraint_evaluations += 1
+            return True
+        entry = (key, expression, id(value))
+        if entry in self._evaluated_constraints:
+            self.skipped_constraint_evaluations += 1
+            return False
+        self._evaluated_constraints.add(entry)
+        self._objects.append(value)
+        self.constraint_evaluations += 1
+        return True
+
+    def __repr__(self):
+        return f'ValidationContext(constraint_evaluations={self.constraint_evaluations}, skipped_constraint_evaluations={self.skipped_constraint_evaluations})'
+
+
+def get_validation_context() -> typing.Optional[ValidationContext]:
+    """
+    Returns the validation context active in the current context, if any.
+    """
+    return _active_validation_context.get()
+
+
+@contextmanager
+def validation_context(level: typing.Optional[ValidationLevel] = None):
+    """
+    Context manager that activates a validation context (and a FHIRPath evaluation cache) for the validations
+    performed within its scope. If a validation context is already active, it is reused, such that the nested
+    validations of the elements of a model share the same state (including the validation level).
+
+    Args:
+        level (Optional[ValidationLevel]): The level of validation of a new context, by default full validation.
+
+    Example:
+        ``` python
+        >>> with validation_context() as context:
+        ...     Observation.model_validate(data)
+        >>> context.skipped_constraint_evaluations
+        12
+        ```
+    """
+    context = _active_validation_context.get()
+    if context is not None:
+        yield context
+        return
+    context = ValidationContext(level=level or ValidationLevel.PATTERNS, deferred=_deferred_validation.get(), report=_active_validation_report.get())
+    token = _active_validation_context.set(context)
+    try:
+        with evaluation_cache():
+            yield context
+    finally:
+        _active_validation_context.reset(token)
+
+
+@contextmanager
+def validation_report():
+    """
+    Context manager activating the collection of all validation issues for the models validated within its scope.
+    
+    Failing constraint, pattern and slicing validators record an issue in the yielded report instead of raising 
+    an error, such that all of them are evaluated in a single pass.
+
+    Example:
+        ``` python
+        >>> with validation_report() as report:
+        ...     observation = Observation.model_validate(data)
+        >>> report.to_operation_outcome()
+        ```
+    """
+    report = ValidationReport()
+    context_token = _active_validation_context.set(None)
+    report_token = _active_validation_report.set(report)
+    try:
+        yield report
+    finally:
+        _active_validation_report.reset(report_token)
+        _active_validation_context.reset(context_token)
+
+
+@contextmanager
+def deferred_validation():
+    """
+    Context manager activating the deferred validation mode for the models validated within its scope.
+
+    The models are parsed and their structure (types, cardinalities of elements and type choices) is validated immediately, 
+    whereas their constraint, pattern and slicing validators are recorded on the validated instances, to be run later
+    via `validate_constraints()`.
+
+    Example:
+        ``` python
+        >>> with deferred_validation():
+        ...     observation = Observation.model_validate(data)
+        >>> observation.validate_constraints()
+        ```
+    """
+    token = _deferred_validation.set(True)
+    try:
+        yield
+    finally:
+        _deferred_validation.reset(token)
+
+
+def attach_pending_validations(instance: BaseModel, context: ValidationContext, start: int = 0) -> None:
+    """
+    Moves the validator calls deferred during the validation of an instance from the validation context to the instance.
+
+    Args:
+        instance (BaseModel): The validated instance.
+        context (ValidationContext): The validation context.
+        start (int): Number of deferred calls that had already been recorded in the context before the validation of the instance.
+    """
+    pending = context.pending_validations[start:]
+    if not pending:
+        return
+    del context.pending_validations[start:]
+    instance.__dict__.setdefault(PENDING_VALIDATIONS_ATTRIBUTE, []).extend(pending)
+
+
+def get_pending_validations(instance: BaseModel) -> list:
+    """
+    Returns the validator calls deferred during the validation of an instance and its nested elements, that have not been run yet.
+    """
+    return [validation for _, pending in _collect_pending_validations(instance) for validation in pending]
+
+
+def _collect_pending_validations(value: typing.Any) -> typing.Iterator[typing.Tuple[BaseModel, list]]:
+    """
+    Iterates over the instances nested within a value that hold deferred validator calls.
+
+    Args:
+        value (Any): The instance, or a list of instances.
+
+    Returns:
+        Iterator[Tuple[BaseModel, list]]: The instances and their deferred validator calls.
+    """
+    if isinstance(value, list):
+        for entry in value:
+            yield from _collect_pending_validations(entry)
+    elif isinstance(value, BaseModel):
+        for name, entry in value.__dict__.items():
+            if name == PENDING_VALIDATIONS_ATTRIBUTE:
+                yield value, entry
+            else:
+                yield from _collect_pending_validations(entry)
+
+
+def _run_pending_validations(instance: BaseModel) -> typing.List[dict]:
+    """
+    Runs the validator calls deferred during the validation of an instance and its nested elements.
+
+    Args:
+        instance (BaseModel): The instance to validate.
+
+    Returns:
+        List[dict]: The details of the errors raised by the validators, empty if the instance is valid.
+    """
+    errors = []
+    # Run the validators in their own (non-deferred) validation context
+    context_token = _active_validation_context.set(None)
+    deferred_token = _deferred_validation.set(False)
+    report_token = _active_validation_report.set(None)
+    try:
+        with validation_context():
+            for validator, args, kwargs in get_pending_validations(instance):
+                try:
+                    validator(*args, **kwargs)
+                except (AssertionError, ValueError) as error:
+                    errors.append(_validator_error(error, (), args[-1]))
+    finally:
+        _active_validation_report.reset(report_token)
+        _deferred_validation.reset(deferred_token)
+        _active_validation_context.reset(context_token)
+    return errors
+
+
+def _validator_error(error: Exception, loc: tuple, value: typing.Any) -> dict:
+    """
+    Converts an error raised by a validator into the details of a Pydantic validation error.
+    """
+    error_type = 'assertion_error' if isinstance(error, AssertionError) else 'value_error'
+    return {'type': error_type, 'loc': loc, 'input': value, 'ctx': {'error': str(error)}}
+
+
+def _resolve_pending_validations(instance: BaseModel, errors: typing.List[dict]) -> typing.Optional[ValidationError]:
+    """
+    Clears the deferred validator calls of a valid instance, or converts the errors of an invalid instance into a `ValidationError`.
+    """
+    if errors:
+        return ValidationError.from_exception_data(instance.__class__.__name__, errors)
+    for holder, _ in list(_collect_pending_validations(instance)):
+        holder.__dict__.pop(PENDING_VALIDATIONS_ATTRIBUTE, None)
+    return None
+
+
+def validate_constraints(instances: typing.Iterable[BaseModel], executor: typing.Optional[Executor] = None) -> typing.List[typing.Optional[ValidationError]]:
+    """
+    Runs the validators deferred during the validation of many instances.
+
+    The instances are validated in order, or distributed across the workers of an executor if provided.
+    With a process pool, the instances (and their models) must be picklable. The deferred validators of 
+    the valid instances are cleared, whereas invalid instances keep them.
+
+    Args:
+        instances (Iterable[BaseModel]): The instances to validate.
+        executor (Optional[Executor]): Executor running the validations of the individual instances.
+
+    Returns:
+        List[Optional[ValidationError]]: For each instance, the validation error or `None` if the instance is valid.
+
+    Example:
+        ``` python
+        >>> with ThreadPoolExecutor() as executor:
+        ...     errors = validate_constraints(observations, executor=executor)
+        ```
+    """
+    instances = list(instances)
+    if executor is not None:
+        results = executor.map(_run_pending_validations, instances)
+    else:
+        results = map(_run_pending_validations, instances)
+    return [_resolve_pending_validations(instance, errors) for instance, errors in zip(instances, results)]
+
+
+def _content_hash(value: BaseModel, hashes: typing.Optional[dict] = None, objects: typing.Optional[list] = None) -> bytes:
+    """
+    Computes the canonical content hash of a model instance, combining the hashes of its nested models.
+
+    Args:
+        value (BaseModel): The model instance.
+        hashes (Optional[dict]): The hashes already computed, by instance identity. Nested models found in it are not hashed again.
+        objects (Optional[list]): List referencing the hashed instances, such that their identities cannot be reused.
+
+    Returns:
+        bytes: The content hash of the instance.
+    """
+    hashes = {} if hashes is None else hashes
+    identity = id(value)
+    if (content_hash := hashes.get(identity)) is not None:
+        return content_hash
+    digest = hashlib.blake2b(type(value).__name__.encode(), digest_size=16)
+    for name in value.model_fields:
+        field_value = value.__dict__.get(name)
+        if field_value is not None:
+            digest.update(b'\x00' + name.encode() + b'\x00')
+            _update_content_hash(digest, field_value, hashes, objects)
+    content_hash = hashes[identity] = digest.digest()
+    if objects is not None:
+        objects.append(value)
+    return content_hash
+
+
+def _update_content_hash(digest: typing.Any, value: typing.Any, hashes: dict, objects: typing.Optional[list]) -> None:
+    if isinstance(value, BaseModel):
+        digest.update(b'M' + _content_hash(value, hashes, objects))
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for entry in value:
+            _update_content_hash(digest, entry, hashes, objects)
+            digest.update(b',')
+        digest.update(b']')
+    else:
+        digest.update(f'{type(value).__name__}:{value!r}'.encode())
+
+
+@lru_cache(maxsize=2048)
+def _is_cacheable_constraint(expression: str) -> bool:
+    """
+    Checks whether the verdict of a constraint can be cached, i.e. it only depends on the content of the validated 
+    element (its FHIRPath expression does not access its context, e.g. `%resource`, or the environment) and it is 
+    not implemented natively (native invariants are cheaper to evaluate than the content hash).
+    """
+    from fhircraft.fhir.resources.invariants import get_native_invariant
+    if get_native_invariant(expression) is not None:
+        return False
+    from fhircraft.fhir.resources.validators import _compile_FHIRPath_expression
+    try:
+        return expression_signature(_compile_FHIRPath_expression(expression)) is not None
+    except Exception:
+        return False
+
+
+class ConstraintResultCache:
+    """
+    Bounded LRU cache remembering which constraints have been fulfilled by elements of a given content, 
+    keyed by the model class, the constraint expression and the canonical content hash of the element. 
+    Identical elements (e.g. the same `Coding` or `Quantity`) are therefore only validated once per process.
+
+    Only the fulfilled constraints are cached, and only for constraints that depend exclusively on the
+    content of the element and are evaluated by the FHIRPath engine.
+
+    Attributes:
+        maxsize (int): Maximal number of results kept in the cache.
+        hits (int): Number of constraint evaluations answered by the cache.
+        misses (int): Number of constraint evaluations that could not be answered by the cache.
+        evictions (int): Number of results evicted from the cache.
+    """
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, expression: str, value: typing.Any, context: typing.Optional[ValidationContext] = None) -> typing.Optional[tuple]:
+        """
+        Computes the cache key of the evaluation of a constraint on an element.
+
+        Args:
+            expression (str): The FHIRPath expression of the constraint.
+            value (Any): The validated element.
+            context (Optional[ValidationContext]): The active validation context, used to compute the content hash of each element only once.
+
+        Returns:
+            Optional[tuple]: The cache key, or None if the evaluation cannot be cached.
+        """
+        if not isinstance(value, BaseModel) or not _is_cacheable_constraint(expression):
+            return None
+        content_hash = context.content_hash(value) if context is not None else _content_hash(value)
+        return (type(value), expression, content_hash)
+
+    def is_fulfilled(self, key: tuple) -> bool:
+        """
+        Checks whether the constraint of a cache key is known to be fulfilled, updating the hit-rate metrics.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add_fulfilled(self, key: tuple) -> None:
+        """
+        Records that the constraint of a cache key is fulfilled, evicting the least recently used results if needed.
+        """
+        with self._lock:
+            self._results[key] = True
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Fraction of the lookups that were answered from the cache.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self) -> None:
+        """
+        Removes all results from the cache and resets its metrics.
+        """
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return f'ConstraintResultCache(size={len(self)}, maxsize={self.maxsize}, hits={self.hits}, misses={self.misses}, evictions={self.evictions})'
+
+
+_constraint_result_cache: typing.Optional[ConstraintResultCache] = None
+
+
+def enable_constraint_result_cache(maxsize: int = 65536) -> ConstraintResultCache:
+    """
+    Enables the process-wide cache of fulfilled constraints (see `ConstraintResultCache`).
+
+    Args:
+        maxsize (int): Maximal number of results kept in the cache.
+
+    Returns:
+        ConstraintResultCache: The enabled cache.
+
+    Example:
+        ``` python
+        >>> cache = enable_constraint_result_cache(maxsize=10000)
+        >>> observations = [Observation.model_validate(data) for data in feed]
+        >>> cache.hit_rate
+        0.93
+        ```
+    """
+    global _constraint_result_cache
+    _constraint_result_cache = ConstraintResultCache(maxsize)
+    return _constraint_result_cache
+
+
+def disable_constraint_result_cache() -> None:
+    """
+    Disables the process-wide cache of fulfilled constraints.
+    """
+    global _constraint_result_cache
+    _constraint_result_cache = None
+
+
+def get_constraint_result_cache() -> typing.Optional[ConstraintResultCache]:
+    """
+    Returns the process-wide cache of fulfilled constraints, if enabled.
+    """
+    return _constraint_result_cache
+
+
+def get_modified_fields(instance: BaseModel) -> typing.FrozenSet[str]:
+    """
+    Returns the fields of an instance that have been modified in place since it was validated.
+    """
+    return instance.__dict__.get(MODIFIED_FIELDS_ATTRIBUTE, frozenset())
+
+
+def mark_modified(instance: BaseModel, field: str) -> None:
+    """
+    Marks a field of an instance as modified in place, such that it is validated by the next revalidation.
+
+    Args:
+        instance (BaseModel): The modified instance.
+        field (str): The name of the modified field.
+    """
+    # Replace (instead of update) the set, as it is shared with shallow copies of the instance
+    instance.__dict__[MODIFIED_FIELDS_ATTRIBUTE] = get_modified_fields(instance) | {field}
+
+
+def _collect_modified_instances(value: typing.Any, loc: tuple = (), ancestors: tuple = ()) -> typing.Iterator[tuple]:
+    """
+    Iterates over the modified instances nested within a value.
+
+    Args:
+        value (Any): The instance, or a list of instances.
+        loc (tuple): The location of the value within the root instance.
+        ancestors (tuple): The ancestors of the value, as tuples of the ancestor instance, the field leading 
+                           to the value and the location of the ancestor.
+
+    Returns:
+        Iterator[tuple]: The modified instances, their locations and their ancestors.
+    """
+    if isinstance(value, list):
+        for index, entry in enumerate(value):
+            yield from _collect_modified_instances(entry, loc + (index,), ancestors)
+    elif isinstance(value, BaseModel):
+        if get_modified_fields(value):
+            yield value, loc, ancestors
+        for name in type(value).model_fields:
+            if (entry := value.__dict__.get(name)) is not None:
+                yield from _collect_modified_instances(entry, loc + (name,), ancestors + ((value, name, loc),))
+
+
+def _revalidate_fields(instance: BaseModel, fields: typing.Set[str], loc: tuple) -> typing.List[dict]:
+    """
+    Runs the field validators of some fields of an instance, and its model validators.
+
+    Returns:
+        List[dict]: The details of the errors raised by the validators.
+    """
+    errors = []
+    decorators = type(instance).__pydantic_decorators__
+    for validator in decorators.field_validators.values():
+        if validator.info.mode != 'after':
+            continue
+        for field in fields.intersection(validator.info.fields):
+            value = instance.__dict__.get(field)
+            try:
+                validator.func(value)
+            except (AssertionError, ValueError) as error:
+                errors.append(_validator_error(error, loc + (field,), value))
+    for validator in decorators.model_validators.values():
+        if validator.info.mode != 'after':
+            continue
+        try:
+            validator.func(instance)
+        except (AssertionError, ValueError) as error:
+            errors.append(_validator_error(error, loc, instance))
+    return errors
+
+
+def revalidate(instance: BaseModel) -> BaseModel:
+    """
+    Incrementally revalidates an instance after in-place modifications of its elements.
+
+    Only the modified fields are validated again, together with the constraints reading them. The constraints
+    of the ancestors of the modified elements are only validated again if they read the field leading to the modified element.
+
+    Args:
+        instance (BaseModel): The root instance to revalidate.
+
+    Returns:
+        instance (BaseModel): The validated instance.
+
+    Raises:
+        ValidationError: If any of the modified elements or their ancestors is not valid anymore.
+    """
+    modified_instances = list(_collect_modified_instances(instance))
+    if not modified_instances:
+        return instance
+    # Collect the changed fields of all modified elements and their ancestors
+    changed_fields, affected_ancestors = {}, {}
+    for element, _, ancestors in modified_instances:
+        changed_fields.setdefault(id(element), set()).update(get_modified_fields(element))
+        for ancestor, field, ancestor_loc in ancestors:
+            changed_fields.setdefault(id(ancestor), set()).add(field)
+            affected_ancestors[id(ancestor)] = (ancestor, ancestor_loc)
+    errors = []
+    context_token = _active_validation_context.set(None)
+    try:
+        with validation_context() as context:
+            context.changed_fields = changed_fields
+            # Validate the modified fields and the constraints reading them
+            for element, loc, _ in modified_instances:
+                for field in sorted(get_modified_fields(element)):
+                    try:
+                        type(element).__pydantic_validator__.validate_assignment(element, field, element.__dict__.get(field))
+                    except ValidationError as error:
+                        errors.extend({**details, 'loc': loc + details['loc']} for details in error.errors(include_url=False))
+            # Validate the affected ancestors, from the innermost to the outermost
+            for ancestor, ancestor_loc in sorted(affected_ancestors.values(), key=lambda entry: -len(entry[1])):
+                errors.extend(_revalidate_fields(ancestor, changed_fields[id(ancestor)], ancestor_loc))
+    finally:
+        _active_validation_context.reset(context_token)
+    if errors:
+        raise ValidationError.from_exception_data(type(instance).__name__, errors)
+    for element, _, _ in modified_instances:
+        element.__dict__.pop(MODIFIED_FIELDS_ATTRIBUTE, None)
+    return instance
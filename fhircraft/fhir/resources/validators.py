@@ -1,12 +1,59 @@
 
 # Fhircraft modules
 from fhircraft.utils import ensure_list, merge_dicts, get_all_models_from_field
-from fhircraft.fhir.resources.base import FHIRSliceModel, FHIRBaseModel
+from fhircraft.fhir.resources.base import FHIRSliceModel, FHIRBaseModel, _get_model_structure
+from fhircraft.fhir.resources.invariants import get_native_invariant
+from fhircraft.fhir.resources.validation import get_validation_context, get_constraint_result_cache, ValidationLevel
+from fhircraft.fhir.resources.dependencies import get_constraint_dependencies, get_field_labels, are_dependencies_absent, get_absent_dependencies_verdict, set_absent_dependencies_verdict
+from pydantic import BaseModel
 
 # Standard modules
-from typing import Any, List, Union
+from typing import Any, List, Tuple, Union
+from functools import lru_cache
+from collections import Counter
 import warnings
-import traceback
+
+@lru_cache(maxsize=2048)
+def _compile_FHIRPath_expression(expression: str):
+    '''
+    Parse a FHIRPath expression of a constraint. The parsed expression is cached, such that each
+    constraint is only parsed once, no matter how many elements it validates.
+
+    Args:
+        expression (str): The FHIRPath expression to parse.
+
+    Returns:
+        FHIRPath: The parsed FHIRPath expression.
+    '''
+    from fhircraft.fhir.path import fhirpath
+    return fhirpath.parse(expression)
+
+def _report_failed_validation(value:Any, message:str, code:str, severity:str='error', key:str=None, expression:str=None):
+    '''
+    Report a failed validation, either by recording it in the active validation report or by raising it.
+
+    Args:
+        value (Any): The value that failed the validation.
+        message (str): A human-readable description of the failure.
+        code (str): The FHIR issue type of the failure, e.g. `invariant`.
+        severity (str): The severity level of the failure.
+        key (str): The key of the violated constraint, if any.
+        expression (str): The FHIRPath expression of the violated constraint, if any.
+
+    Raises:
+        AssertionError: If no validation report is active and severity is not 'warning'.
+        Warning: If no validation report is active and severity is 'warning'.
+    '''
+    context = get_validation_context()
+    if context is not None and context.report is not None:
+        context.report.add_issue(value, severity, code, message, key=key, expression=expression)
+        return
+    if key:
+        message = f'{message}. [{key}] -> "{expression}"'
+    if severity == 'warning':
+        warnings.warn(message)
+    else:
+        raise AssertionError(message)
 
 def _validate_FHIR_element_constraint(value:Any, expression:str, human:str, key:str, severity:str):
     '''
@@ -26,24 +73,68 @@ def _validate_FHIR_element_constraint(value:Any, expression:str, human:str, key:
         AssertionError: If the validation fails and severity is not 'warning'.
         Warning: If the validation fails and severity is 'warning'.
     ''' 
-    from fhircraft.fhir.path import fhirpath, FhirPathLexerError, FhirPathParserError
+    from fhircraft.fhir.path import FhirPathLexerError, FhirPathParserError
     from fhircraft.fhir.path.engine.core import FHIRPathCollectionItem
     if value is None:
         return value
+    native_invariant = get_native_invariant(expression)
+    context = get_validation_context()
+    result_cache = get_constraint_result_cache()
     for item in ensure_list(value):
+        # Skip objects on which the constraint has already been evaluated during the current validation
+        if context is not None and not context.claim_constraint_evaluation(key, item, expression):
+            continue
+        # Skip elements whose content is known to fulfill the constraint
+        cache_key = result_cache.key(expression, item, context) if result_cache is not None else None
+        if cache_key is not None and result_cache.is_fulfilled(cache_key):
+            continue
+        # Reuse the verdict of the constraint if none of the elements it reads are present
+        dependencies_absent = native_invariant is None and isinstance(item, BaseModel) \
+            and (dependencies := get_constraint_dependencies(expression)) is not None \
+            and are_dependencies_absent(item, dependencies)
+        valid = get_absent_dependencies_verdict(type(item), expression) if dependencies_absent else None
         try:
-            valid = fhirpath.parse(expression).evaluate([FHIRPathCollectionItem(value=item)], create=False)
-            if valid == []:
-                valid = True
-            error_message =  f'{human}. [{key}] -> "{expression}"'
-            if severity == 'warning' and not valid:
-                warnings.warn(error_message)
-            else:
-                assert valid, error_message
+            # Use the native implementation of the invariant if available
+            if valid is None and native_invariant is not None:
+                valid = native_invariant(item)
+            if valid is None:
+                valid = _compile_FHIRPath_expression(expression).evaluate([FHIRPathCollectionItem(value=item)], create=False)
+                if dependencies_absent:
+                    set_absent_dependencies_verdict(type(item), expression, valid == [] or bool(valid))
         except (ValueError, FhirPathLexerError, FhirPathParserError, AttributeError, NotImplementedError) as e:
-            warnings.warn(f"Warning: FHIRPath raised {e.__class__.__name__} for expression: {expression}. {traceback.format_exc()}")
+            _report_failed_validation(item, f"FHIRPath raised {e.__class__.__name__} for expression: {expression}. {e}", 'exception', severity='warning')
+            continue
+        if valid == [] or valid:
+            if cache_key is not None:
+                result_cache.add_fulfilled(cache_key)
+            continue
+        _report_failed_validation(item, human, 'invariant', severity=severity, key=key, expression=expression)
     return value
 
+def _is_affected_by_changes(context:Any, instance:Any, expression:str) -> bool:
+    '''
+    Check whether a model constraint must be validated again during an incremental revalidation, i.e. whether 
+    it reads any of the fields of the instance that changed.
+
+    Args:
+        context (ValidationContext): The active validation context.
+        instance (Any): Instance of the model to be validated.
+        expression (str): The FHIRPath expression of the constraint.
+
+    Returns:
+        bool: False if the constraint does not read any of the changed fields, True otherwise.
+    '''
+    if context.changed_fields is None or (changed_fields := context.changed_fields.get(id(instance))) is None:
+        return True
+    dependencies = get_constraint_dependencies(expression)
+    if dependencies is None:
+        return True
+    # Map the changed fields to the elements read by the expression, e.g. `valueString` to `value`
+    labels = get_field_labels(type(instance))
+    if any(field not in labels for field in changed_fields):
+        return True
+    return not dependencies.isdisjoint(labels[field] for field in changed_fields)
+
 def validate_element_constraint(cls, value:Any, expression:str, human:str, key:str, severity:str) -> Any:
     """
     Validates a FHIR element constraint based on a FHIRPath expression.
@@ -63,6 +154,10 @@ def validate_element_constraint(cls, value:Any, expression:str, human:str, key:s
         AssertionError: If the validation fails and severity is not `warning`.
         Warning: If the validation fails and severity is `warning`.
     """    
+    if context := get_validation_context():
+        if not context.enables(ValidationLevel.INVARIANTS) \
+            or context.defer(validate_element_constraint, cls, value, expression=expression, human=human, key=key, severity=severity):
+            return value
     return _validate_FHIR_element_constraint(value, expression, human, key, severity)
 
 def validate_model_constraint(instance:object, expression:str, human:str, key:str, severity:str) -> object:
@@ -83,6 +178,11 @@ def validate_model_constraint(instance:object, expression:str, human:str, key:st
         AssertionError: If the validation fails and severity is not `warning`.
         Warning: If the validation fails and severity is `warning`.
     """       
+    if context := get_validation_context():
+        if not context.enables(ValidationLevel.INVARIANTS) \
+            or not _is_affected_by_changes(context, instance, expression) \
+            or context.defer(validate_model_constraint, instance, expression=expression, human=human, key=key, severity=severity):
+            return instance
     return _validate_FHIR_element_constraint(instance, expression, human, key, severity)
 
 def validate_FHIR_element_pattern(cls:Any, element:Union[FHIRBaseModel,List[FHIRBaseModel]], pattern:Union[FHIRBaseModel,List[FHIRBaseModel]]) -> Union[FHIRBaseModel, List[FHIRBaseModel]]:
@@ -100,10 +200,14 @@ def validate_FHIR_element_pattern(cls:Any, element:Union[FHIRBaseModel,List[FHIR
     Raises:
         AssertionError: If the element does not fulfill the specified pattern.
     '''
+    if context := get_validation_context():
+        if not context.enables(ValidationLevel.PATTERNS) \
+            or context.defer(validate_FHIR_element_pattern, cls, element, pattern=pattern):
+            return element
     if isinstance(pattern, list): pattern = pattern[0]
     _element = element[0] if isinstance(element, list) else element
-    assert merge_dicts(_element.model_dump(), pattern.model_dump()) == _element.model_dump(), \
-            f'Value does not fulfill pattern:\n{pattern.model_dump_json(indent=2)}'
+    if merge_dicts(_element.model_dump(), pattern.model_dump()) != _element.model_dump():
+        _report_failed_validation(_element, f'Value does not fulfill pattern:\n{pattern.model_dump_json(indent=2)}', 'value')
     return element
 
 def validate_type_choice_element(instance: object, field_types: List[str], field_name_base: str) -> object:
@@ -121,13 +225,30 @@ def validate_type_choice_element(instance: object, field_types: List[str], field
     Raises:
         AssertionError: If more than one value is set for the type choice element.
     """
-    assert sum(
+    if sum(
         getattr(instance, field_name_base + field_type if isinstance(field_type, str) else field_type.__name__, None) is not None 
             for field_type in field_types 
-    ) <= 1, f'Type choice element {field_name_base}[x] can only have one value set.'
+    ) > 1:
+        _report_failed_validation(instance, f'Type choice element {field_name_base}[x] can only have one value set.', 'structure')
     return instance
 
 
+def _get_field_slices(cls:Any, field_name:str) -> Tuple[type, ...]:
+    """
+    Returns the slices of a sliced field of a FHIR model. The slices are looked up once per model and field
+    (and again if the model is rebuilt).
+
+    Args:
+        cls (Any): The Pydantic FHIR model class.
+        field_name (str): The name of the sliced field.
+
+    Returns:
+        Tuple[type, ...]: The slice models of the field.
+    """
+    return _get_model_structure(cls, f'field_slices:{field_name}', lambda: tuple(
+        get_all_models_from_field(cls.model_fields[field_name], issubclass_of=FHIRSliceModel)
+    ))
+
 def validate_slicing_cardinalities(cls:Any, values:List[Any], field_name:str) -> List[FHIRSliceModel]:
     """
     Validates the cardinalities of FHIR slices for a specific field within a FHIR resource.
@@ -143,15 +264,25 @@ def validate_slicing_cardinalities(cls:Any, values:List[Any], field_name:str) ->
     Raises:
         AssertionError: If cardinality constraints are violated for any slice.
     """    
-    slices =  get_all_models_from_field(cls.model_fields[field_name], issubclass_of=FHIRSliceModel)
-    for slice in slices:
-        slice_instances_count = sum([isinstance(value, slice) for value in values])
-        assert slice_instances_count >= slice.min_cardinality, \
-            f"Slice '{slice.__name__}' for field '{field_name}' violates its min. cardinality. \
-                Requires min. cardinality of {slice.min_cardinality}, but got {slice_instances_count}"
-        assert slice_instances_count <= slice.max_cardinality, \
-            f"Slice '{slice.__name__}' for field '{field_name}' violates its max. cardinality. \
-                Requires max. cardinality of {slice.max_cardinality}, but got {slice_instances_count}"
+    if context := get_validation_context():
+        if not context.enables(ValidationLevel.CARDINALITY) \
+            or context.defer(validate_slicing_cardinalities, cls, values, field_name=field_name):
+            return values
+    slices = _get_field_slices(cls, field_name)
+    # Classify the values in a single pass, by type, and count the instances of each slice
+    type_counts = Counter(type(value) for value in values)
+    slice_instances_counts = dict.fromkeys(slices, 0)
+    for value_type, count in type_counts.items():
+        for slice in slices:
+            if issubclass(value_type, slice):
+                slice_instances_counts[slice] += count
+    for slice, slice_instances_count in slice_instances_counts.items():
+        if slice_instances_count < slice.min_cardinality:
+            _report_failed_validation(values, f"Slice '{slice.__name__}' for field '{field_name}' violates its min. cardinality. \
+                Requires min. cardinality of {slice.min_cardinality}, but got {slice_instances_count}", 'structure')
+        if slice_instances_count > slice.max_cardinality:
+            _report_failed_validation(values, f"Slice '{slice.__name__}' for field '{field_name}' violates its max. cardinality. \
+                Requires max. cardinality of {slice.max_cardinality}, but got {slice_instances_count}", 'structure')
     return values
         
 
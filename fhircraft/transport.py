@@ -0,0 +1,133 @@
+"""
+Shared HTTP transport of Fhircraft, used to download FHIR StructureDefinitions and any other remote content.
+
+All requests go through a single pooled `requests.Session`, configured once from the settings of the `.env` file
+(proxies and certificate bundle), reusing connections across requests and retrying transient server failures (and read errors) with
+an exponential backoff. Connection errors are not retried, such that unreachable hosts fail fast.
+"""
+
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from fhircraft.utils import load_env_variables
+
+# Timeout (in seconds) of the HTTP requests
+DEFAULT_TIMEOUT = 10
+# Number of retries of failed requests, and backoff factor (in seconds) of the delays between them
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Status codes of the responses of requests to be retried
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Maximal number of connections kept alive per host, and of concurrent requests of prefetches
+POOL_MAXSIZE = 16
+MAX_CONCURRENT_REQUESTS = 8
+
+_session: typing.Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> typing.Dict[str, typing.Optional[str]]:
+    """
+    Returns the settings of the `.env` file. The file is only read once, until `reload_settings` is called.
+
+    Returns:
+        Dict[str, Optional[str]]: The settings.
+    """
+    return load_env_variables()
+
+
+def reload_settings() -> None:
+    """
+    Reads the settings of the `.env` file again, and reconfigures the HTTP session accordingly.
+    """
+    global _session
+    get_settings.cache_clear()
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _create_session() -> requests.Session:
+    settings = get_settings()
+    session = requests.Session()
+    retries = Retry(
+        total=MAX_RETRIES,
+        connect=0,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({'GET', 'HEAD'}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # Configure proxy if needed
+    if settings.get('PROXY_URL_HTTPS') or settings.get('PROXY_URL_HTTP'):
+        session.proxies.update({'https': settings.get('PROXY_URL_HTTPS'), 'http': settings.get('PROXY_URL_HTTP')})
+    if settings.get('CERTIFICATE_BUNDLE_PATH'):
+        session.verify = settings.get('CERTIFICATE_BUNDLE_PATH')
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the pooled HTTP session shared by all requests of Fhircraft.
+
+    Returns:
+        requests.Session: The session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def http_get(url: str, headers: typing.Optional[typing.Dict[str, str]] = None, timeout: float = DEFAULT_TIMEOUT) -> requests.Response:
+    """
+    Sends a GET request through the shared HTTP session, retrying it on connection errors and transient failures.
+
+    Args:
+        url (str): The URL to request.
+        headers (Optional[Dict[str, str]]): Additional headers of the request.
+        timeout (float): The timeout of the request, in seconds.
+
+    Returns:
+        requests.Response: The response. Its status is not checked.
+    """
+    return get_session().get(url, headers=headers, timeout=timeout)
+
+
+def fetch_concurrently(urls: typing.Iterable[str], fetch: typing.Callable[[str], typing.Any],
+                       max_workers: int = MAX_CONCURRENT_REQUESTS) -> typing.Dict[str, typing.Any]:
+    """
+    Fetches the content of multiple URLs concurrently.
+
+    Args:
+        urls (Iterable[str]): The URLs to fetch.
+        fetch (Callable[[str], Any]): Fetches the content of a single URL.
+        max_workers (int): The maximal number of concurrent requests.
+
+    Returns:
+        Dict[str, Any]: The content of each URL that could be fetched. URLs whose fetch failed are omitted.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        for url, future in [(url, executor.submit(fetch, url)) for url in urls]:
+            try:
+                results[url] = future.result()
+            except Exception:
+                continue
+    return results
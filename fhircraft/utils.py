@@ -120,17 +120,20 @@ def load_url(url: str) -> Dict:
     if not url.startswith('http://') and not url.startswith('https://'):
         raise ValueError("Invalid URL format. Please provide a valid URL starting with 'http://' or 'https://'.")
     
-    # Add a timeout to the requests.get call
-    # Configure proxy if needed
-    settings = load_env_variables()
-    proxies = {
-        'https': settings.get('PROXY_URL_HTTPS'), 
-        'http': settings.get('PROXY_URL_HTTP')
-    } if settings.get('PROXY_URL_HTTPS') or settings.get('PROXY_URL_HTTP') else None
-    # Download the StructureDefinition JSON            
-    response = requests.get(url, proxies=proxies, verify=settings.get('CERTIFICATE_BUNDLE_PATH'), timeout=10)
-    
+    # Download the content through the shared HTTP session, unless available in the on-disk cache
+    from fhircraft.cache import get_disk_cache
+    from fhircraft.transport import http_get
+    download = lambda cache_headers: http_get(url, headers=cache_headers)
+    if (disk_cache := get_disk_cache()) is not None:
+        return disk_cache.fetch(url, download, parse=_parse_url_content)
+    response = download({})
     response.raise_for_status()
+    return _parse_url_content(response)
+
+def _parse_url_content(response: requests.Response) -> Union[Dict, List, Any]:
+    """
+    Parse the content of a response based on its content type (YAML or JSON).
+    """
     content_type = response.headers['Content-Type']
     
     # Use content_type.lower() to make the content type check case-insensitive
@@ -0,0 +1,152 @@
+import time
+import pytest
+import requests
+
+import fhircraft.cache as fhir_cache
+from fhircraft.cache import DiskCache, CacheEntry, configure_disk_cache, get_disk_cache
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.packages import PackageRegistry
+from fhircraft.utils import load_url
+
+PROFILE_URL = 'http://example.org/StructureDefinition/TestProfile'
+
+
+def mock_response(mocker, content=None, status_code=200, headers=None):
+    response = mocker.Mock()
+    response.status_code = status_code
+    response.headers = {'Content-Type': 'application/json', **(headers or {})}
+    response.json.return_value = content
+    response.raise_for_status.return_value = None
+    return response
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    cache = configure_disk_cache(tmp_path / 'cache', ttl=60)
+    yield cache
+    configure_disk_cache(None)
+
+
+class TestDiskCache:
+
+    def test_stores_and_reads_entries(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        cache.store(CacheEntry(url=PROFILE_URL, version='1.0.0', content={'key': 'value'}, fetched_at=time.time(), etag='"abc"'))
+        entry = cache.get_entry(PROFILE_URL, '1.0.0')
+        assert entry.content == {'key': 'value'} and entry.etag == '"abc"'
+
+    def test_entries_are_keyed_by_version(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        cache.store(CacheEntry(url=PROFILE_URL, version='1.0.0', content={}, fetched_at=time.time()))
+        assert cache.get_entry(PROFILE_URL, '2.0.0') is None
+        assert cache.get_entry(PROFILE_URL) is None
+
+    def test_corrupted_entry_is_ignored(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        cache.store(CacheEntry(url=PROFILE_URL, version=None, content={}, fetched_at=time.time()))
+        cache._get_path(PROFILE_URL, None).write_text('{invalid')
+        assert cache.get_entry(PROFILE_URL) is None
+
+    def test_invalidate_and_clear(self, tmp_path):
+        cache = DiskCache(tmp_path)
+        for version in ('1', '2'):
+            cache.store(CacheEntry(url=PROFILE_URL, version=version, content={}, fetched_at=time.time()))
+        cache.invalidate(PROFILE_URL, '1')
+        assert cache.get_entry(PROFILE_URL, '1') is None and cache.get_entry(PROFILE_URL, '2') is not None
+        cache.clear()
+        assert cache.get_entry(PROFILE_URL, '2') is None
+
+    def test_fetch_downloads_and_stores_content(self, tmp_path, mocker):
+        cache = DiskCache(tmp_path, ttl=60)
+        download = mocker.Mock(return_value=mock_response(mocker, {'key': 'value'}, headers={'ETag': '"abc"'}))
+        assert cache.fetch(PROFILE_URL, download) == {'key': 'value'}
+        assert cache.fetch(PROFILE_URL, download) == {'key': 'value'}
+        download.assert_called_once_with({})
+
+    def test_fetch_revalidates_stale_entries(self, tmp_path, mocker):
+        cache = DiskCache(tmp_path, ttl=60)
+        cache.store(CacheEntry(url=PROFILE_URL, version=None, content={'key': 'cached'}, fetched_at=time.time() - 120,
+                               etag='"abc"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT'))
+        download = mocker.Mock(return_value=mock_response(mocker, status_code=304))
+        assert cache.fetch(PROFILE_URL, download) == {'key': 'cached'}
+        download.assert_called_once_with({'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        # The revalidated entry is fresh again
+        assert cache.get_entry(PROFILE_URL).is_fresh(cache.ttl)
+
+    def test_fetch_replaces_modified_entries(self, tmp_path, mocker):
+        cache = DiskCache(tmp_path, ttl=60)
+        cache.store(CacheEntry(url=PROFILE_URL, version=None, content={'key': 'cached'}, fetched_at=time.time() - 120, etag='"abc"'))
+        download = mocker.Mock(return_value=mock_response(mocker, {'key': 'new'}, headers={'ETag': '"def"'}))
+        assert cache.fetch(PROFILE_URL, download) == {'key': 'new'}
+        assert cache.get_entry(PROFILE_URL).etag == '"def"'
+
+    def test_fetch_serves_stale_entries_if_server_unreachable(self, tmp_path, mocker):
+        cache = DiskCache(tmp_path, ttl=60)
+        cache.store(CacheEntry(url=PROFILE_URL, version=None, content={'key': 'cached'}, fetched_at=time.time() - 120))
+        download = mocker.Mock(side_effect=requests.ConnectionError('unreachable'))
+        with pytest.warns(UserWarning):
+            assert cache.fetch(PROFILE_URL, download) == {'key': 'cached'}
+
+    def test_entries_without_ttl_never_expire(self, tmp_path, mocker):
+        cache = DiskCache(tmp_path)
+        cache.store(CacheEntry(url=PROFILE_URL, version=None, content={'key': 'cached'}, fetched_at=0))
+        download = mocker.Mock()
+        assert cache.fetch(PROFILE_URL, download) == {'key': 'cached'}
+        download.assert_not_called()
+
+
+class TestDiskCacheConfiguration:
+
+    def test_disabled_by_default(self, mocker):
+        mocker.patch.object(fhir_cache, 'get_settings', return_value={})
+        assert get_disk_cache() is None
+
+    def test_configured_from_settings(self, tmp_path, mocker):
+        mocker.patch.object(fhir_cache, 'get_settings', return_value={'FHIRCRAFT_CACHE_DIR': str(tmp_path), 'FHIRCRAFT_CACHE_TTL': '3600'})
+        cache = get_disk_cache()
+        assert cache.directory == tmp_path and cache.ttl == 3600
+
+    def test_configured_programmatically(self, disk_cache):
+        assert get_disk_cache() is disk_cache
+
+
+class TestDiskCacheUsage:
+
+    def test_download_structure_definition_uses_cache(self, disk_cache, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        structure_definition = {'url': PROFILE_URL, 'version': '1.0.0'}
+        get = mocker.patch('requests.Session.get', return_value=mock_response(mocker, structure_definition))
+        for _ in range(2):
+            assert ResourceFactory().download_structure_definition(f'{PROFILE_URL}|1.0.0') == structure_definition
+        get.assert_called_once()
+        assert disk_cache.get_entry(PROFILE_URL, '1.0.0') is not None
+
+    def test_download_of_other_version_is_cached_under_its_version(self, disk_cache, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        structure_definition = {'url': PROFILE_URL, 'version': '2.0.0'}
+        mocker.patch('requests.Session.get', return_value=mock_response(mocker, structure_definition))
+        with pytest.raises(ValueError, match='requested version 1.0.0'):
+            ResourceFactory().download_structure_definition(f'{PROFILE_URL}|1.0.0')
+        assert disk_cache.get_entry(PROFILE_URL, '1.0.0') is None
+        assert disk_cache.get_entry(PROFILE_URL, '2.0.0').content == structure_definition
+        assert ResourceFactory().download_structure_definition(f'{PROFILE_URL}|2.0.0') == structure_definition
+
+    def test_unversioned_download_is_cached_under_its_version(self, disk_cache, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        structure_definition = {'url': PROFILE_URL, 'version': '2.0.0'}
+        mocker.patch('requests.Session.get', return_value=mock_response(mocker, structure_definition))
+        ResourceFactory().download_structure_definition(PROFILE_URL)
+        assert disk_cache.get_entry(PROFILE_URL).content == disk_cache.get_entry(PROFILE_URL, '2.0.0').content == structure_definition
+
+    def test_download_of_other_version_without_cache(self, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        mocker.patch.object(fhir_cache, 'get_settings', return_value={})
+        mocker.patch('requests.Session.get', return_value=mock_response(mocker, {'url': PROFILE_URL, 'version': '2.0.0'}))
+        with pytest.raises(ValueError, match='requested version 1.0.0'):
+            ResourceFactory().download_structure_definition(f'{PROFILE_URL}|1.0.0')
+
+    def test_load_url_uses_cache(self, disk_cache, mocker):
+        get = mocker.patch('requests.Session.get', return_value=mock_response(mocker, {'key': 'value'}))
+        for _ in range(2):
+            assert load_url('http://example.com/data.json') == {'key': 'value'}
+        get.assert_called_once()
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from fhircraft.fhir.path.engine.core import FHIRPathCollectionItem
+from fhircraft.fhir.path.engine.cache import EvaluationCache, evaluation_cache, get_evaluation_cache, expression_signature
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+
+
+class TestEvaluationCache(TestCase):
+
+    def setUp(self):
+        self.resource = CodeableConcept.model_construct(text='A', coding=[get_complex_FHIR_type('Coding')(code='1')])
+        self.collection = [FHIRPathCollectionItem(self.resource)]
+
+    def test_no_cache_active_by_default(self):
+        assert get_evaluation_cache() is None
+
+    def test_cache_is_active_within_scope(self):
+        with evaluation_cache() as cache:
+            assert get_evaluation_cache() is cache
+        assert get_evaluation_cache() is None
+
+    def test_nested_scopes_share_cache(self):
+        with evaluation_cache() as outer:
+            with evaluation_cache() as inner:
+                assert inner is outer
+
+    def test_repeated_evaluation_is_memoized(self):
+        expression = parse('coding.count()')
+        with evaluation_cache() as cache:
+            assert expression.evaluate(self.collection, create=False) == 1
+            assert expression.evaluate(self.collection, create=False) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == 0.5
+
+    def test_structurally_identical_expressions_share_results(self):
+        with evaluation_cache() as cache:
+            parse('coding.exists()').evaluate(self.collection, create=False)
+            parse('coding.exists()').evaluate(self.collection, create=False)
+        assert cache.hits == 1
+
+    def test_different_inputs_are_not_shared(self):
+        other = CodeableConcept.model_construct(text='B')
+        expression = parse('coding.exists()')
+        with evaluation_cache() as cache:
+            assert expression.evaluate(self.collection, create=False) is True
+            assert expression.evaluate([FHIRPathCollectionItem(other)], create=False) is False
+        assert cache.hits == 0
+
+    def test_collection_results_are_not_memoized(self):
+        with evaluation_cache() as cache:
+            parse('coding.first()').evaluate(self.collection, create=False)
+        assert len(cache) == 0
+
+    def test_primitive_inputs_are_not_memoized(self):
+        with evaluation_cache() as cache:
+            parse('text.length()').evaluate(self.collection, create=False)
+            parse('text.length()').evaluate(self.collection, create=False)
+        assert cache.hits == 1
+        with evaluation_cache() as cache:
+            parse('length()').evaluate([FHIRPathCollectionItem('abc')], create=False)
+            parse('length()').evaluate([FHIRPathCollectionItem('abc')], create=False)
+        assert cache.hits == 0
+
+    def test_impure_expressions_are_not_memoized(self):
+        assert expression_signature(parse('%resource.coding.exists()')) is None
+        assert expression_signature(parse('now().exists()')) is None
+        collection = [FHIRPathCollectionItem(self.resource.coding[0], parent=self.collection[0])]
+        with evaluation_cache() as cache:
+            parse('%resource.coding.exists()').evaluate(collection, create=False)
+        assert len(cache) == 0
+
+    def test_model_validation_uses_cache(self):
+        from pydantic import model_validator
+        from fhircraft.fhir.resources.base import FHIRBaseModel
+        active_caches = []
+        class Model(FHIRBaseModel):
+            field: str = None
+            @model_validator(mode='after')
+            def record_cache(self):
+                active_caches.append(get_evaluation_cache())
+                return self
+        Model.model_validate({'field': 'a'})
+        Model(field='a')
+        assert active_caches and all(isinstance(cache, EvaluationCache) for cache in active_caches)
+        with evaluation_cache() as cache:
+            Model.model_validate({'field': 'a'})
+        assert active_caches[-1] is cache
+        assert get_evaluation_cache() is None
@@ -277,3 +277,33 @@ def test_fhirpath_mixin_replace_fhirpath(path_string, update_value, getattr_fcn)
     _observation = observation.model_copy(deep=True)
     _observation.replace_fhirpath(path_string, update_value)
     assert getattr_fcn(_observation) == update_value
+
+
+
+# ======== Batched evaluation ============
+#               Find many                        
+# ======================================
+fhirpath_batch_resources = [
+    observation,
+    Observation.model_construct(status='preliminary'),
+    Observation.model_construct(status='final', identifier=[get_complex_FHIR_type('Identifier')(value='A')]),
+]
+
+@pytest.mark.parametrize("path_string", [case[0] for case in fhirpath_find_test_cases] + ["Observation.status"])
+def test_fhirpath_find_many_matches_find(path_string):
+    expression = parse(path_string)
+    results = expression.find_many(fhirpath_batch_resources)
+    assert len(results) == len(fhirpath_batch_resources)
+    for result, resource in zip(results, fhirpath_batch_resources):
+        assert [item.value for item in result] == [item.value for item in expression.find(resource)]
+
+def test_fhirpath_find_many_returns_bare_function_values():
+    assert parse('Observation.identifier.exists()').find_many(fhirpath_batch_resources) == [True, False, True]
+    assert parse('Observation.identifier.count()').find_many(fhirpath_batch_resources) == [3, 0, 1]
+
+def test_fhirpath_find_many_returns_empty_for_empty_batch():
+    assert parse('Observation.identifier.value').find_many([]) == []
+
+def test_fhirpath_values_many_matches_get_value():
+    expression = parse('Observation.identifier.value')
+    assert expression.values_many(fhirpath_batch_resources) == [expression.get_value(resource) for resource in fhirpath_batch_resources]
@@ -0,0 +1,111 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from fhircraft.fhir.path.engine.core import FHIRPathCollectionItem, Invocation, Element, This, Root
+from fhircraft.fhir.path.engine.existence import Exists
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+Coding = get_complex_FHIR_type('Coding')
+
+
+class TestElementEvaluateMany(TestCase):
+
+    def setUp(self):
+        self.resources = [
+            CodeableConcept.model_construct(text='A', coding=[Coding(code='1'), Coding(code='2')]),
+            CodeableConcept.model_construct(),
+            CodeableConcept.model_construct(text='C', coding=[Coding(code='3')]),
+        ]
+        self.collections = [[FHIRPathCollectionItem(resource, path=Root())] for resource in self.resources]
+
+    def test_element_evaluate_many_splits_results_by_collection(self):
+        result = Element('coding').evaluate_many(self.collections, create=False)
+        assert [[item.value.code for item in collection] for collection in result] == [['1', '2'], [], ['3']]
+
+    def test_element_evaluate_many_keeps_trailing_empty_collections(self):
+        result = Element('text').evaluate_many(self.collections[:2] + [[]], create=False)
+        assert [[item.value for item in collection] for collection in result] == [['A'], [], []]
+
+    def test_element_evaluate_many_matches_evaluate(self):
+        result = Element('coding').evaluate_many(self.collections, create=False)
+        for collection, input_collection in zip(result, self.collections):
+            expected = Element('coding').evaluate(input_collection, create=False)
+            assert [(item.value, item.parent) for item in collection] == [(item.value, item.parent) for item in expected]
+
+    def test_element_evaluate_many_creates_missing_elements(self):
+        result = Element('coding').evaluate_many(self.collections, create=True)
+        assert [len(collection) for collection in result] == [2, 1, 1]
+        assert self.resources[1].coding == [result[1][0].value]
+
+    def test_element_evaluate_many_accepts_generator(self):
+        result = Element('text').evaluate_many((collection for collection in self.collections), create=False)
+        assert [[item.value for item in collection] for collection in result] == [['A'], [], ['C']]
+
+
+class TestThisEvaluateMany(TestCase):
+
+    def test_this_evaluate_many_returns_input_collections(self):
+        collections = [[FHIRPathCollectionItem('A')], [], [FHIRPathCollectionItem('B')]]
+        assert This().evaluate_many(collections) == collections
+
+    def test_this_evaluate_many_accepts_generator(self):
+        collections = [[FHIRPathCollectionItem('A')], []]
+        assert This().evaluate_many(collection for collection in collections) == collections
+
+
+class TestInvocationEvaluateMany(TestCase):
+
+    def setUp(self):
+        self.resources = [
+            CodeableConcept.model_construct(coding=[Coding(code='1'), Coding(code='2')]),
+            CodeableConcept.model_construct(),
+            CodeableConcept.model_construct(coding=[Coding(code='3')]),
+        ]
+        self.collections = [[FHIRPathCollectionItem(resource, path=Root())] for resource in self.resources]
+
+    def test_invocation_evaluate_many_evaluates_each_collection(self):
+        result = Invocation(Element('coding'), Element('code')).evaluate_many(self.collections, create=False)
+        assert [[item.value for item in collection] for collection in result] == [['1', '2'], [], ['3']]
+
+    def test_invocation_evaluate_many_with_function(self):
+        result = Invocation(Element('coding'), Exists()).evaluate_many(self.collections, create=False)
+        assert result == [True, False, True]
+
+    def test_invocation_evaluate_many_creates_missing_elements(self):
+        result = Invocation(Element('coding'), Element('code')).evaluate_many(self.collections, create=True)
+        assert [len(collection) for collection in result] == [2, 1, 1]
+        result[1][0].set_value('4')
+        assert self.resources[1].coding[0].code == '4'
+
+    def test_invocation_evaluate_many_accepts_generator(self):
+        result = Invocation(Element('coding'), Element('code')).evaluate_many((collection for collection in self.collections), create=False)
+        assert [[item.value for item in collection] for collection in result] == [['1', '2'], [], ['3']]
+
+    def test_invocation_evaluate_many_shares_dispatch_across_batch(self):
+        expression = Invocation(Element('coding'), Element('code'))
+        with patch.object(Element, 'evaluate_many', autospec=True, side_effect=Element.evaluate_many) as evaluate_many, \
+             patch.object(Element, 'evaluate', autospec=True, side_effect=Element.evaluate) as evaluate:
+            expression.evaluate_many(self.collections, create=False)
+        assert evaluate_many.call_count == 2
+        assert evaluate.call_count == 0
+
+    def test_find_many_accepts_generator(self):
+        result = Invocation(Element('coding'), Element('code')).find_many(resource for resource in self.resources)
+        assert [[item.value for item in collection] for collection in result] == [['1', '2'], [], ['3']]
+
+
+class TestValuesMany(TestCase):
+
+    def test_values_many_extracts_values_per_resource(self):
+        assert parse('coding.code').values_many([{'coding': [{'code': '1'}, {'code': '2'}]}, {}, {'coding': [{'code': '3'}]}]) == [['1', '2'], None, '3']
+
+    def test_values_many_with_function(self):
+        assert parse('status.exists()').values_many([{'status': 'active'}, {}]) == [True, False]
+        assert parse('coding.count()').values_many([{'coding': [{'code': '1'}, {'code': '2'}]}, {}]) == [2, 0]
+
+    def test_values_many_matches_get_value(self):
+        resources = [{'status': 'active'}, {}]
+        expression = parse('status.exists()')
+        assert expression.values_many(resources) == [expression.get_value(resource) for resource in resources]
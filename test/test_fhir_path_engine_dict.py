@@ -0,0 +1,94 @@
+import pytest
+
+from fhircraft.fhir.path.engine.core import FHIRPathCollectionItem, Element, Root
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+
+# -------------------------------------------------------------------------------------------------------------------------
+# Parity with the model-based evaluation
+# -------------------------------------------------------------------------------------------------------------------------
+
+parity_test_cases = (
+    ('CodeableConcept', {'text': 'A', 'coding': [{'system': 's1', 'code': '1'}, {'system': 's2', 'code': '2'}]}, 'coding.code'),
+    ('CodeableConcept', {'text': 'A', 'coding': [{'system': 's1', 'code': '1'}, {'system': 's2', 'code': '2'}]}, "coding.where(system = 's2').code"),
+    ('CodeableConcept', {'text': 'A', 'coding': [{'system': 's1', 'code': '1'}]}, 'coding.exists()'),
+    ('CodeableConcept', {'text': 'A', 'coding': [{'system': 's1', 'code': '1'}]}, 'children().count()'),
+    ('CodeableConcept', {'text': 'A', '_text': {'extension': [{'url': 'u', 'valueString': 'x'}]}}, 'children().count()'),
+    ('CodeableConcept', {'text': 'A', '_text': {'extension': [{'url': 'u', 'valueString': 'x'}]}}, 'text_ext.extension.url'),
+    ('CodeableConcept', {'id': '1'}, 'hasValue() or (children().count() > id.count())'),
+    ('Extension', {'url': 'u', 'valueString': 'x'}, 'value'),
+    ('Extension', {'url': 'u', 'valueString': 'x'}, 'valueString'),
+    ('Extension', {'url': 'u', 'valueString': 'x'}, 'value[x]'),
+    ('Extension', {'url': 'u', 'valueString': 'x'}, 'extension.exists() != value.exists()'),
+    ('Extension', {'url': 'u', 'extension': [{'url': 'v', 'valueInteger': 3}]}, "extension('v').value"),
+    ('Quantity', {'value': 5, 'unit': 'mg'}, 'value'),
+    ('Quantity', {'value': 5, 'unit': 'mg'}, 'unit.length() > 1'),
+    ('HumanName', {'family': 'Doe', 'given': ['John', 'J']}, 'given.first()'),
+    ('HumanName', {'family': 'Doe', 'given': ['John', 'J']}, 'descendants().count()'),
+)
+
+def _values(result):
+    if not isinstance(result, list):
+        return result
+    return [item.value.model_dump() if hasattr(item.value, 'model_dump') else item.value for item in result]
+
+@pytest.mark.parametrize("type_name, data, path_string", parity_test_cases)
+def test_dict_evaluation_matches_model_evaluation(type_name, data, path_string):
+    model = get_complex_FHIR_type(type_name).model_validate(data)
+    expression = parse(path_string)
+    assert _values(expression.find(model.model_dump())) == _values(expression.find(model))
+
+
+# -------------------------------------------------------------------------------------------------------------------------
+# JSON-specific representations
+# -------------------------------------------------------------------------------------------------------------------------
+
+class TestElementOnDicts:
+
+    def setup_method(self):
+        self.resource = {
+            'resourceType': 'Patient',
+            'birthDate': '1970-01-01',
+            '_birthDate': {'extension': [{'url': 'birthTime', 'valueDateTime': '1970-01-01T10:00:00Z'}]},
+            'name': [{'given': ['John', 'J'], '_given': [None, {'id': 'g2'}]}],
+            'deceasedBoolean': False,
+            'multipleBirthInteger': 2,
+        }
+        self.collection = [FHIRPathCollectionItem(self.resource, path=Root())]
+
+    def test_element_evaluates_plain_key(self):
+        result = Element('birthDate').evaluate(self.collection, create=False)
+        assert [item.value for item in result] == ['1970-01-01']
+
+    def test_element_evaluates_type_choice_key(self):
+        result = Element('multipleBirth').evaluate(self.collection, create=False)
+        assert [item.value for item in result] == [2]
+
+    def test_element_evaluates_false_type_choice_key(self):
+        result = Element('deceased').evaluate(self.collection, create=False)
+        assert [item.value for item in result] == [False]
+
+    def test_element_ignores_non_type_suffixes(self):
+        assert Element('multiple').evaluate(self.collection, create=False) == []
+
+    def test_primitive_extension(self):
+        assert parse('birthDate.extension.url').get_value(self.resource) == 'birthTime'
+
+    def test_primitive_extension_in_list(self):
+        assert parse('name.given.id').get_value(self.resource) == 'g2'
+
+    def test_primitive_extension_placeholder_element(self):
+        assert parse('birthDate_ext.extension.valueDateTime').get_value(self.resource) == '1970-01-01T10:00:00Z'
+
+    def test_children_skip_resource_type(self):
+        result = parse('children()').find(self.resource)
+        assert 'Patient' not in [item.value for item in result]
+
+    def test_update_sets_dict_value(self):
+        parse('name.given').update(self.resource, 'Jane')
+        assert self.resource['name'][0]['given'] == ['Jane', 'Jane']
+
+    def test_update_or_create_sets_missing_dict_value(self):
+        parse('gender').update_or_create(self.resource, 'male')
+        assert self.resource['gender'] == 'male'
@@ -1,6 +1,8 @@
 from fhircraft.fhir.path.engine.core import *
 from fhircraft.fhir.path.engine.comparison import *
 from fhircraft.fhir.path.engine.filtering import *
+from fhircraft.fhir.path.engine.equality import Equals
+from fhircraft.fhir.path.engine.boolean import And
 from collections import namedtuple
 
 
@@ -19,6 +21,80 @@ def test_where_returns_valid_items_in_collection_where_true():
     assert result == [collection[1]]
 
 
+#-------------
+# Where (indexed)
+#-------------
+
+def _indexed_resource():
+    from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+    Coding = get_complex_FHIR_type('Coding')
+    return get_complex_FHIR_type('CodeableConcept').model_construct(coding=[
+        Coding(system='s1', code='a'), Coding(system='s2', code='b'), Coding(system='s1', code='c'), Coding(code='d'),
+    ])
+
+def test_where_indexed_equality_is_detected():
+    assert Where(Equals(Element('system'), 's1')).indexed_equality == ('system', 's1')
+    assert Where(Equals('s1', Element('system'))).indexed_equality == ('system', 's1')
+    assert Where(And(Equals(Element('system'), 's1'), Equals(Element('code'), 'a'))).indexed_equality == ('system', 's1')
+    assert Where(LessThan(Element('system'), 's1')).indexed_equality is None
+
+def test_where_indexed_returns_matching_items_in_order():
+    from fhircraft.fhir.path.engine.cache import element_index_cache
+    resource = _indexed_resource()
+    expression = Invocation(Element('coding'), Where(Equals(Element('system'), 's1')))
+    result = expression.evaluate([FHIRPathCollectionItem(resource)], create=False)
+    assert [item.value.code for item in result] == ['a', 'c']
+    hits = element_index_cache.hits
+    result = expression.evaluate([FHIRPathCollectionItem(resource)], create=False)
+    assert [item.value.code for item in result] == ['a', 'c']
+    assert element_index_cache.hits == hits + 1
+
+def test_where_indexed_refilters_conjunctions():
+    resource = _indexed_resource()
+    expression = Invocation(Element('coding'), Where(And(Equals(Element('system'), 's1'), Equals(Element('code'), 'c'))))
+    result = expression.evaluate([FHIRPathCollectionItem(resource)], create=False)
+    assert [item.value.code for item in result] == ['c']
+
+def test_where_indexed_items_can_be_updated():
+    resource = _indexed_resource()
+    expression = Invocation(Invocation(Element('coding'), Where(Equals(Element('system'), 's2'))), Element('code'))
+    expression.update([FHIRPathCollectionItem(resource)], 'z')
+    assert resource.coding[1].code == 'z'
+
+def test_where_indexed_is_invalidated_by_modifications():
+    resource = _indexed_resource()
+    expression = Invocation(Element('coding'), Where(Equals(Element('system'), 's2')))
+    collection = [FHIRPathCollectionItem(resource)]
+    assert len(expression.evaluate(collection, create=False)) == 1
+    resource.coding[0].system = 's2'
+    assert len(expression.evaluate(collection, create=False)) == 2
+    resource.coding[3] = resource.coding[1].model_copy()
+    assert len(expression.evaluate(collection, create=False)) == 3
+    resource.coding.append(resource.coding[1].model_copy())
+    assert len(expression.evaluate(collection, create=False)) == 4
+
+def test_element_index_is_invalidated_by_list_mutations():
+    from fhircraft.fhir.path.engine.cache import ElementIndexCache, notify_mutation
+    cache = ElementIndexCache()
+    codings = _indexed_resource().coding
+    assert cache.lookup(codings, 'system')['s2'] == [1]
+    codings.append(codings[1].model_copy())
+    assert cache.lookup(codings, 'system')['s2'] == [1, 4]
+    codings.pop(0)
+    assert cache.lookup(codings, 'system')['s2'] == [0, 3]
+    codings[1] = codings[0].model_copy()
+    notify_mutation()
+    assert cache.lookup(codings, 'system')['s2'] == [0, 1, 3]
+    assert cache.lookup(codings, 'system')['s2'] == [0, 1, 3]
+    assert (cache.hits, cache.misses) == (1, 4)
+
+def test_where_indexed_matches_linear_scan_on_dicts():
+    resource = _indexed_resource().model_dump()
+    expression = Invocation(Element('coding'), Where(Equals(Element('system'), 's1')))
+    result = expression.evaluate([FHIRPathCollectionItem(resource)], create=False)
+    assert [item.value['code'] for item in result] == ['a', 'c']
+
+
 
 #-------------
 # Select
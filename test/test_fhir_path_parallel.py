@@ -0,0 +1,55 @@
+import json
+
+from fhircraft.fhir.path.parallel import evaluate_in_parallel, evaluate_ndjson_in_parallel, _ndjson_ranges
+from fhircraft.fhir.path.parser import parse
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+
+resources = [
+    CodeableConcept(text=f'concept-{n}', coding=[{'code': str(n)}] * (n % 3))
+        for n in range(25)
+]
+
+
+def test_evaluate_in_parallel_matches_sequential_evaluation():
+    expression = parse('coding.code')
+    expected = [[item.value for item in expression.find(resource)] for resource in resources]
+    result = list(evaluate_in_parallel('coding.code', resources, max_workers=2, batch_size=4))
+    assert result == expected
+
+def test_evaluate_in_parallel_accepts_compiled_expression_and_generator():
+    result = list(evaluate_in_parallel(parse('coding.exists()'), (resource for resource in resources), max_workers=2, batch_size=3))
+    assert result == [bool(n % 3) for n in range(25)]
+
+def test_evaluate_in_parallel_empty_input():
+    assert list(evaluate_in_parallel('text', [], max_workers=2)) == []
+
+def test_evaluate_ndjson_in_parallel(tmp_path):
+    path = tmp_path / 'concepts.ndjson'
+    path.write_text('\n'.join(resource.model_dump_json() for resource in resources) + '\n')
+    result = list(evaluate_ndjson_in_parallel('text', str(path), model=CodeableConcept, max_workers=2, chunk_size=64))
+    assert result == [[f'concept-{n}'] for n in range(25)]
+
+def test_ndjson_ranges_are_aligned_to_lines(tmp_path):
+    path = tmp_path / 'lines.ndjson'
+    lines = [json.dumps({'n': n}) for n in range(10)]
+    path.write_text('\n'.join(lines))
+    ranges = list(_ndjson_ranges(str(path), 7))
+    content = path.read_bytes()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(content)
+    assert [content[start:end].decode().strip() for start, end in ranges] == lines
+
+def test_evaluate_ndjson_in_parallel_on_raw_json(tmp_path):
+    path = tmp_path / 'concepts.ndjson'
+    path.write_text('\n'.join(resource.model_dump_json() for resource in resources) + '\n')
+    result = list(evaluate_ndjson_in_parallel('coding.exists()', str(path), max_workers=2, chunk_size=64))
+    assert result == [bool(n % 3) for n in range(25)]
+
+def test_evaluate_ndjson_in_parallel_keeps_blank_lines_aligned(tmp_path):
+    path = tmp_path / 'concepts.ndjson'
+    lines = [resource.model_dump_json() for resource in resources[:6]]
+    lines[2] = lines[4] = ''
+    path.write_text('\n'.join(lines) + '\n')
+    result = list(evaluate_ndjson_in_parallel('text', str(path), max_workers=2, chunk_size=64))
+    assert result == [[f'concept-{n}'] if line else [] for n, line in enumerate(lines)]
@@ -0,0 +1,101 @@
+import pytest
+from functools import partial
+from typing import Optional
+from pydantic import ValidationError, create_model, model_validator
+
+import fhircraft.fhir.resources.validators as fhir_validators
+from fhircraft.fhir.resources.base import FHIRBaseModel
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+from fhircraft.fhir.resources.dependencies import (
+    get_constraint_dependencies, 
+    are_dependencies_absent, 
+    get_absent_dependencies_verdict, 
+    get_model_constraint_dependencies, 
+    get_model_fields_constraints,
+    get_field_labels,
+)
+
+Period = get_complex_FHIR_type('Period')
+PER_1 = 'start.hasValue().not() or end.hasValue().not() or (start <= end)'
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('extension.exists() != value.exists()', {'extension', 'value'}),
+    (PER_1, {'start', 'end'}),
+    ("coding.where(system = 'http://loinc.org').exists() and $this.text.empty()", {'coding', 'text'}),
+    ("code.empty() or system = 'http://unitsofmeasure.org'", {'code', 'system'}),
+    ('(a | b).count() > 1', {'a', 'b'}),
+    ('hasValue() or (children().count() > id.count())', None),
+    ('$this is Parameters', None),
+    ('%resource.contained.exists()', None),
+    ('reference.resolve().exists()', None),
+    ('code.(', None),
+])
+def test_constraint_dependencies(expression, expected):
+    dependencies = get_constraint_dependencies(expression)
+    assert (set(dependencies) if dependencies is not None else None) == expected
+
+
+@pytest.mark.parametrize('instance, absent', [
+    (Period.model_construct(), True),
+    (Period.model_construct(start='2020-01-01'), False),
+    (Period.model_construct(end='2020-01-01', id='x'), False),
+    (Period.model_construct(id='x'), True),
+])
+def test_dependencies_absent(instance, absent):
+    assert are_dependencies_absent(instance, {'start', 'end'}) == absent
+
+
+class TestAbsentDependenciesShortCircuit:
+
+    def count_evaluations(self, monkeypatch, expression):
+        # Analyze the expression beforehand, such that only its evaluations are counted
+        get_constraint_dependencies(expression)
+        evaluations = []
+        compile_expression = fhir_validators._compile_FHIRPath_expression
+        def counting_compile(compiled_expression):
+            if compiled_expression == expression:
+                evaluations.append(compiled_expression)
+            return compile_expression(compiled_expression)
+        monkeypatch.setattr(fhir_validators, '_compile_FHIRPath_expression', counting_compile)
+        return evaluations
+
+    def test_constraint_without_present_dependencies_is_evaluated_once(self, monkeypatch):
+        Model = create_model('Model', __base__=FHIRBaseModel, start=(Optional[str], None), end=(Optional[str], None), 
+            __validators__={'FHIR_test_1_constraint_model_validator': model_validator(mode='after')(partial(
+                fhir_validators.validate_model_constraint, expression=PER_1, human='Period', key='test-1', severity='error'))}
+        )
+        evaluations = self.count_evaluations(monkeypatch, PER_1)
+        for _ in range(3):
+            Model.model_validate({})
+        assert len(evaluations) == 1
+        assert get_absent_dependencies_verdict(Model, PER_1) is True
+        Model.model_validate({'start': '2020-01-01', 'end': '2021-01-01'})
+        assert len(evaluations) == 2
+
+    def test_failed_verdict_is_reused(self, monkeypatch):
+        Model = create_model('Model', __base__=FHIRBaseModel, code=(Optional[str], None), 
+            __validators__={'FHIR_test_1_constraint_model_validator': model_validator(mode='after')(partial(
+                fhir_validators.validate_model_constraint, expression='code.exists()', human='Code', key='test-1', severity='error'))}
+        )
+        evaluations = self.count_evaluations(monkeypatch, 'code.exists()')
+        for _ in range(2):
+            with pytest.raises(ValidationError, match='test-1'):
+                Model.model_validate({})
+        assert len(evaluations) == 1
+        Model.model_validate({'code': 'a'})
+
+
+def test_model_constraint_dependencies_of_generated_model():
+    assert get_model_constraint_dependencies(Period) == {'per-1': frozenset({'start', 'end'})}
+
+
+def test_model_fields_constraints_of_generated_model():
+    assert get_model_fields_constraints(Period) == {'start': ['per-1'], 'end': ['per-1']}
+
+
+def test_field_labels_of_type_choice_elements_and_primitive_extensions():
+    Extension = get_complex_FHIR_type('Extension')
+    labels = get_field_labels(Extension)
+    assert (labels['valueString'], labels['valueQuantity'], labels['url'], labels['url_ext']) == ('value', 'value', 'url', 'url')
+    assert get_field_labels(Period)['start'] == 'start'
@@ -1,13 +1,21 @@
-from fhircraft.fhir.resources.factory import ResourceFactory, _Unset
+from fhircraft.fhir.resources.factory import ResourceFactory, ProfileBuild, _Unset
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
+from fhircraft.fhir.resources.packages import PackageRegistry
+from fhircraft.fhir.resources.registry import ModelRegistry
+from fhircraft.utils import get_all_models_from_field
 import fhircraft.fhir.resources.datatypes.primitives as primitives
 import fhircraft.fhir.resources.datatypes.R4B.complex_types as complex_types
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
 
 from pydantic import Field
 from pydantic.fields import FieldInfo
 
 from typing import Optional, List, get_args
 
-from unittest import TestCase 
+from unittest import TestCase, mock
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 from parameterized import parameterized, parameterized_class
 
 class FactoryTestCase(TestCase):
@@ -16,7 +24,7 @@ class FactoryTestCase(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.factory = ResourceFactory()
-        cls.factory.Config = cls.factory.FactoryConfig(FHIR_release='R4B',resource_name='Test')
+        cls.config = ResourceFactory.FactoryConfig(FHIR_release='R4B',resource_name='Test')
 
 
 class TestBuildTreeStructure(FactoryTestCase):
@@ -74,23 +82,23 @@ class TestBuildTreeStructure(FactoryTestCase):
 class TestGetFhirType(FactoryTestCase):
 
     def test_parses_fhir_primitive_datatype(self):
-        result = self.factory._get_complex_FHIR_type('string')
+        result = self.factory._get_complex_FHIR_type('string', self.config)
         assert result == primitives.String
 
     def test_parses_fhir_complex_datatype(self):
-        result = self.factory._get_complex_FHIR_type('Coding')
+        result = self.factory._get_complex_FHIR_type('Coding', self.config)
         assert result == complex_types.Coding
 
     def test_parses_fhir_complex_datatype_from_canonical_url(self):
-        result = self.factory._get_complex_FHIR_type('http://hl7.org/fhir/StructureDefinition/Extension')
+        result = self.factory._get_complex_FHIR_type('http://hl7.org/fhir/StructureDefinition/Extension', self.config)
         assert result == complex_types.Extension
 
     def test_parses_fhir_fhirpath_datatype(self):
-        result = self.factory._get_complex_FHIR_type('http://hl7.org/fhirpath/System.String')
+        result = self.factory._get_complex_FHIR_type('http://hl7.org/fhirpath/System.String', self.config)
         assert result == primitives.String
 
     def test_returns_field_type_name_if_not_found(self):
-        result = self.factory._get_complex_FHIR_type('UnknownType')
+        result = self.factory._get_complex_FHIR_type('UnknownType', self.config)
         assert result == 'UnknownType'
 
 
@@ -144,7 +152,7 @@ class TestProcessPatternOrFixedValues(FactoryTestCase):
         element = {
             f'{self.prefix}{attribute}': expected_value
         }
-        result = self.factory._process_pattern_or_fixed_values(element, self.prefix)
+        result = self.factory._process_pattern_or_fixed_values(element, self.prefix, self.config)
         assert type(result) in get_args(expected_type.__value__) or type(result) is expected_type.__value__ 
         assert result == expected_value
         
@@ -157,13 +165,13 @@ class TestProcessPatternOrFixedValues(FactoryTestCase):
         element = {
             f'{self.prefix}{attribute}': expected_value
         }
-        result = self.factory._process_pattern_or_fixed_values(element, self.prefix)
+        result = self.factory._process_pattern_or_fixed_values(element, self.prefix, self.config)
         assert isinstance(result, expected_type) 
         assert result == expected_type.model_validate(expected_value)
         
     def test_processes_no_constraints(self):
         element = {}
-        result = self.factory._process_pattern_or_fixed_values(element, self.prefix)
+        result = self.factory._process_pattern_or_fixed_values(element, self.prefix, self.config)
         assert result is None
 
 
@@ -178,4 +186,176 @@ class TestProcessCardinalityConstraints(FactoryTestCase):
     def test_cardinality_constraints(self, element, expected_min, expected_max):
         min_card, max_card = self.factory._process_cardinality_constraints(element)
         assert min_card == expected_min
-        assert max_card == expected_max
\ No newline at end of file
+        assert max_card == expected_max
+
+ELE_1 = {'key': 'ele-1', 'expression': 'hasValue() or (children().count() > id.count()) or $this is Parameters'}
+
+class TestIsConstraintEnforcedByType(FactoryTestCase):
+
+    def test_constraint_enforced_by_model_validator_of_complex_type(self):
+        assert self.factory._is_constraint_enforced_by_type(ELE_1, complex_types.Coding)
+
+    def test_constraint_enforced_by_all_types_of_union(self):
+        assert self.factory._is_constraint_enforced_by_type(ELE_1, Optional[complex_types.Coding])
+
+    def test_constraint_not_enforced_by_primitive_type(self):
+        assert not self.factory._is_constraint_enforced_by_type(ELE_1, primitives.String)
+
+    def test_constraint_not_enforced_by_unrelated_model_validator(self):
+        assert not self.factory._is_constraint_enforced_by_type({**ELE_1, 'key': 'xyz-1'}, complex_types.Coding)
+
+    def test_constraint_with_tightened_expression_not_enforced_by_type(self):
+        assert not self.factory._is_constraint_enforced_by_type({**ELE_1, 'expression': 'hasValue()'}, complex_types.Coding)
+
+
+def _profile_structure_definition(name, slice_profiles=(), base=None):
+    return {
+        'resourceType': 'StructureDefinition', 'url': f'http://example.org/StructureDefinition/{name}', 'version': '1.0.0', 
+        'baseDefinition': f'http://example.org/StructureDefinition/{base or "Test"}', 'name': name, 'type': 'Test', 'fhirVersion': '4.3.0' if name.startswith('R4B') else '4.0.1',
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': f'Test.value{name}', 'path': f'Test.value{name}', 'min': 0, 'max': '1', 'type': [{'code': 'Coding'}]},
+            {'id': 'Test.item', 'path': 'Test.item', 'min': 0, 'max': '*', 'type': [{'code': 'string'}]},
+            *[
+                {'id': f'Test.item:slice{index}', 'path': 'Test.item', 'sliceName': f'slice{index}', 'min': 0, 'max': '1',
+                 'type': [{'code': 'string', 'profile': [f'http://example.org/StructureDefinition/{profile}']}]}
+                    for index, profile in enumerate(slice_profiles)
+            ],
+        ]}
+    }
+
+
+class TestConcurrentConstruction(TestCase):
+
+    def setUp(self):
+        self.registry = PackageRegistry()
+        for patcher in (
+            mock.patch.object(ResourceFactory, 'package_registry', self.registry),
+            mock.patch.object(ResourceFactory, 'construction_cache', ModelRegistry()),
+            mock.patch.object(ResourceFactory, '_construction_locks', {}),
+            mock.patch('requests.Session.get', side_effect=AssertionError('Unexpected network access')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.shared_profiles = [f'Shared{index}' for index in range(4)]
+        for name in self.shared_profiles:
+            self.registry.add_structure_definition(_profile_structure_definition(name))
+        self.profiles = [f'{release}Profile{index}' for index in range(12) for release in ('R4', 'R4B')]
+        for name in self.profiles:
+            self.registry.add_structure_definition(_profile_structure_definition(name, self.shared_profiles))
+
+    def construct_concurrently(self, names, repeats=8, workers=32):
+        factory = ResourceFactory()
+        urls = [f'http://example.org/StructureDefinition/{name}' for name in names] * repeats
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(zip(urls, executor.map(factory.construct_resource_model, urls)))
+
+    def test_concurrent_constructions_do_not_share_configuration(self):
+        for url, model in self.construct_concurrently(self.profiles):
+            name = url.rsplit('/', 1)[-1]
+            assert model.__name__ == name
+            assert f'value{name}' in model.model_fields
+            release = 'R4B' if name.startswith('R4B') else 'R4'
+            assert model.model_fields[f'value{name}'].annotation == Optional[get_complex_FHIR_type('Coding', release)]
+            slice_models = get_all_models_from_field(model.model_fields['item'], issubclass_of=FHIRSliceModel)
+            assert {slice_model.__name__ for slice_model in slice_models} == set(self.shared_profiles)
+
+    def test_concurrent_constructions_of_same_model_are_deduplicated(self):
+        with mock.patch.object(ResourceFactory, '_build_resource_model', autospec=True, side_effect=ResourceFactory._build_resource_model) as build:
+            results = self.construct_concurrently(self.profiles)
+        models = {}
+        for url, model in results:
+            assert models.setdefault(url, model) is model
+        assert build.call_count == len(self.profiles) + len(self.shared_profiles)
+        assert not ResourceFactory._construction_locks
+
+    def test_construction_lock_is_kept_while_threads_wait_for_it(self):
+        threads, url = 4, 'http://example.org/StructureDefinition/Shared0'
+        build_resource_model = ResourceFactory._build_resource_model
+        def build(factory, structure_definition, base_model):
+            # Only finish the construction once all other threads are waiting for the same lock
+            for _ in range(500):
+                if [entry[1] for entry in ResourceFactory._construction_locks.values()] == [threads]:
+                    break
+                time.sleep(0.01)
+            return build_resource_model(factory, structure_definition, base_model)
+        with mock.patch.object(ResourceFactory, '_build_resource_model', autospec=True, side_effect=build) as builder:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                models = list(executor.map(lambda _: ResourceFactory().construct_resource_model(url), range(threads)))
+        assert builder.call_count == 1
+        assert all(model is models[0] for model in models)
+        assert not ResourceFactory._construction_locks
+
+
+class TestBulkConstruction(TestCase):
+
+    def setUp(self):
+        for patcher in (
+            mock.patch.object(ResourceFactory, 'package_registry', PackageRegistry()),
+            mock.patch.object(ResourceFactory, 'construction_cache', ModelRegistry()),
+            mock.patch.object(ResourceFactory, '_construction_locks', {}),
+            mock.patch('requests.Session.get', side_effect=AssertionError('Unexpected network access')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.factory = ResourceFactory()
+        # Implementation guide with a base profile, derived profiles, and profiles slicing the derived ones
+        self.structure_definitions = [
+            _profile_structure_definition('Sliced0', ['Derived0', 'Derived1']),
+            _profile_structure_definition('Sliced1', ['Derived1'], base='Derived2'),
+            *[_profile_structure_definition(f'Derived{index}', base='Base') for index in range(3)],
+            _profile_structure_definition('Base'),
+        ]
+        self.urls = [structure_definition['url'] for structure_definition in self.structure_definitions]
+
+    def build_tracking_order(self):
+        order, lock = [], threading.Lock()
+        build = ResourceFactory._build_resource_model
+        def tracked_build(factory, structure_definition, base_model):
+            with lock:
+                order.append((structure_definition['name'], base_model))
+            return build(factory, structure_definition, base_model)
+        with mock.patch.object(ResourceFactory, '_build_resource_model', autospec=True, side_effect=tracked_build):
+            return self.factory.construct_resource_models(self.structure_definitions, max_workers=4), order
+
+    def test_constructs_all_profiles(self):
+        builds, _ = self.build_tracking_order()
+        assert list(builds) == self.urls
+        for url, build in builds.items():
+            assert isinstance(build, ProfileBuild) and build.error is None
+            assert build.model.__name__ == url.rsplit('/', 1)[-1]
+            assert build.duration > 0
+            assert ResourceFactory.construction_cache.get(url, base=FHIRBaseModel) is build.model
+
+    def test_constructs_dependencies_first(self):
+        _, order = self.build_tracking_order()
+        slice_models = [('Derived0', FHIRSliceModel), ('Derived1', FHIRSliceModel)]
+        assert sorted(order, key=str) == sorted([(url.rsplit('/', 1)[-1], FHIRBaseModel) for url in self.urls] + slice_models, key=str)
+        assert order.index(('Sliced0', FHIRBaseModel)) > max(order.index(slice_model) for slice_model in slice_models)
+        assert order.index(('Sliced1', FHIRBaseModel)) > order.index(('Derived1', FHIRSliceModel))
+
+    def test_constructs_independent_profiles_concurrently(self):
+        structure_definitions = [_profile_structure_definition(f'Independent{index}') for index in range(4)]
+        barrier = threading.Barrier(4, timeout=5)
+        build = ResourceFactory._build_resource_model
+        def synchronized_build(factory, structure_definition, base_model):
+            barrier.wait()
+            return build(factory, structure_definition, base_model)
+        with mock.patch.object(ResourceFactory, '_build_resource_model', autospec=True, side_effect=synchronized_build):
+            builds = self.factory.construct_resource_models(structure_definitions, max_workers=4)
+        assert all(build.error is None for build in builds.values())
+
+    def test_reports_failed_constructions(self):
+        invalid = {'resourceType': 'StructureDefinition', 'url': 'http://example.org/StructureDefinition/Invalid'}
+        builds = self.factory.construct_resource_models([*self.structure_definitions, invalid])
+        assert isinstance(builds[invalid['url']].error, ValueError) and builds[invalid['url']].model is None
+        assert all(builds[url].error is None for url in self.urls)
+
+    def test_raises_for_cyclic_dependencies(self):
+        structure_definitions = [
+            _profile_structure_definition('CycleA', ['CycleB']),
+            _profile_structure_definition('CycleB', ['CycleA']),
+            _profile_structure_definition('Acyclic'),
+        ]
+        with self.assertRaisesRegex(ValueError, 'CycleA, .*CycleB'):
+            self.factory.construct_resource_models(structure_definitions)
@@ -0,0 +1,71 @@
+import pytest
+from typing import List, Optional
+
+from fhircraft.fhir.path.engine.core import FHIRPathCollectionItem
+from fhircraft.fhir.resources.validators import _compile_FHIRPath_expression
+from fhircraft.fhir.resources.base import FHIRBaseModel
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+from fhircraft.fhir.resources.invariants import NATIVE_INVARIANTS, get_native_invariant
+
+Extension = get_complex_FHIR_type('Extension')
+Quantity = get_complex_FHIR_type('Quantity')
+ContactPoint = get_complex_FHIR_type('ContactPoint')
+CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+
+
+class TimingRepeat(FHIRBaseModel):
+    timeOfDay: Optional[List[str]] = None
+    when: Optional[List[str]] = None
+
+
+instances = (
+    Extension.model_construct(url='u'),
+    Extension.model_construct(url='u', valueString='a'),
+    Extension.model_construct(url='u', valueBoolean=False),
+    Extension.model_construct(url='u', extension=[Extension.model_construct(url='v', valueInteger=1)]),
+    Extension.model_construct(url='u', valueString='a', extension=[Extension.model_construct(url='v', valueInteger=1)]),
+    Extension.model_construct(url='u', extension=[]),
+    Quantity.model_construct(),
+    Quantity.model_construct(value=1.0, code='mg'),
+    Quantity.model_construct(value=1.0, code='mg', system='http://unitsofmeasure.org'),
+    Quantity.model_construct(value=1.0, system='http://unitsofmeasure.org'),
+    ContactPoint.model_construct(value='555'),
+    ContactPoint.model_construct(value='555', system='phone'),
+    ContactPoint.model_construct(system='phone'),
+    CodeableConcept.model_construct(),
+    CodeableConcept.model_construct(id='1'),
+    CodeableConcept.model_construct(text='a', coding=[]),
+    TimingRepeat.model_construct(),
+    TimingRepeat.model_construct(timeOfDay=['10:00:00']),
+    TimingRepeat.model_construct(when=['MORN']),
+    TimingRepeat.model_construct(timeOfDay=['10:00:00'], when=['MORN']),
+)
+
+
+def _engine_verdict(expression, instance):
+    valid = _compile_FHIRPath_expression(expression).evaluate([FHIRPathCollectionItem(value=instance)], create=False)
+    return True if valid == [] else bool(valid)
+
+
+@pytest.mark.parametrize("expression", NATIVE_INVARIANTS.keys())
+@pytest.mark.parametrize("instance", instances)
+def test_native_invariant_matches_fhirpath_evaluation(expression, instance):
+    try:
+        expected = _engine_verdict(expression, instance)
+    except Exception:
+        pytest.skip('Expression cannot be evaluated on this instance by the FHIRPath engine.')
+    assert get_native_invariant(expression)(instance) == expected
+
+
+def test_native_invariant_defers_unsupported_values():
+    for expression, invariant in NATIVE_INVARIANTS.items():
+        assert invariant('primitive') is None
+
+
+def test_native_invariant_not_available_for_unknown_expression():
+    assert get_native_invariant('code.exists()') is None
+
+
+def test_native_invariant_used_in_validation():
+    with pytest.raises(ValueError, match='ext-1'):
+        Extension.model_validate({'url': 'u', 'valueString': 'a', 'extension': [{'url': 'v', 'valueInteger': 1}]})
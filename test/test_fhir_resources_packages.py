@@ -0,0 +1,157 @@
+import io
+import json
+import tarfile
+import pytest
+
+from fhircraft.fhir.resources.packages import PackageRegistry, split_canonical_url
+from fhircraft.fhir.resources.registry import ModelRegistry
+from fhircraft.fhir.resources.factory import ResourceFactory
+
+PROFILE_URL = 'http://example.org/StructureDefinition/TestProfile'
+
+
+def structure_definition(version='1.0.0', url=PROFILE_URL):
+    return {
+        'resourceType': 'StructureDefinition', 'url': url, 'version': version, 'name': 'TestProfile',
+        'type': 'Test', 'fhirVersion': '4.0.1',
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': 'Test.value', 'path': 'Test.value', 'min': 0, 'max': '1', 'type': [{'code': 'string'}]},
+        ]}
+    }
+
+
+def package_files(version='1.0.0', with_index=True):
+    files = {
+        'package.json': {'name': 'example.fhir.test', 'version': version},
+        'StructureDefinition-TestProfile.json': structure_definition(version),
+        'ValueSet-Test.json': {'resourceType': 'ValueSet', 'url': 'http://example.org/ValueSet/Test'},
+    }
+    if with_index:
+        files['.index.json'] = {'index-version': 1, 'files': [
+            {'filename': 'StructureDefinition-TestProfile.json', 'resourceType': 'StructureDefinition', 'url': PROFILE_URL, 'version': version},
+            {'filename': 'ValueSet-Test.json', 'resourceType': 'ValueSet', 'url': 'http://example.org/ValueSet/Test'},
+        ]}
+    return files
+
+
+def write_tarball(path, files):
+    with tarfile.open(path, 'w:gz') as tarball:
+        for filename, content in files.items():
+            data = json.dumps(content).encode()
+            member = tarfile.TarInfo(f'package/{filename}')
+            member.size = len(data)
+            tarball.addfile(member, io.BytesIO(data))
+    return path
+
+
+def write_directory(path, files):
+    path.mkdir()
+    for filename, content in files.items():
+        (path / filename).write_text(json.dumps(content))
+    return path
+
+
+@pytest.fixture
+def no_network(mocker):
+    return mocker.patch('requests.Session.get', side_effect=AssertionError('Unexpected network access'))
+
+
+class TestSplitCanonicalUrl:
+
+    def test_url_without_version(self):
+        assert split_canonical_url(PROFILE_URL) == (PROFILE_URL, None)
+
+    def test_url_with_version(self):
+        assert split_canonical_url(f'{PROFILE_URL}|1.0.0') == (PROFILE_URL, '1.0.0')
+
+
+class TestPackageRegistry:
+
+    def test_loads_package_tarball(self, tmp_path):
+        registry = PackageRegistry()
+        package = registry.load_package(write_tarball(tmp_path / 'package.tgz', package_files()))
+        assert package == 'example.fhir.test#1.0.0'
+        assert registry.get_structure_definition(PROFILE_URL) == structure_definition()
+
+    def test_loads_package_directory_with_index(self, tmp_path):
+        registry = PackageRegistry()
+        registry.load_package(write_directory(tmp_path / 'package', package_files()))
+        assert registry.get_structure_definition(PROFILE_URL) == structure_definition()
+
+    def test_loads_package_directory_without_index(self, tmp_path):
+        registry = PackageRegistry()
+        registry.load_package(write_directory(tmp_path / 'package', package_files(with_index=False)))
+        assert registry.get_structure_definition(PROFILE_URL) == structure_definition()
+        assert len(registry) == 1
+
+    def test_loads_extracted_package_folder(self, tmp_path):
+        write_directory(tmp_path / 'package', package_files())
+        registry = PackageRegistry()
+        registry.load_package(tmp_path)
+        assert PROFILE_URL in registry
+
+    def test_index_does_not_parse_resources(self, tmp_path):
+        files = package_files()
+        directory = write_directory(tmp_path / 'package', files)
+        (directory / 'StructureDefinition-TestProfile.json').write_text('invalid')
+        registry = PackageRegistry()
+        registry.load_package(directory)
+        assert PROFILE_URL in registry
+
+    def test_resolves_versioned_canonical_url(self, tmp_path):
+        registry = PackageRegistry()
+        registry.load_package(write_tarball(tmp_path / 'v1.tgz', package_files('1.0.0')))
+        registry.load_package(write_tarball(tmp_path / 'v10.tgz', package_files('10.0.0')))
+        registry.load_package(write_tarball(tmp_path / 'v2.tgz', package_files('2.0.0')))
+        assert registry.get_structure_definition(f'{PROFILE_URL}|2.0.0')['version'] == '2.0.0'
+        assert registry.get_structure_definition(PROFILE_URL)['version'] == '10.0.0'
+        assert registry.get_versions(PROFILE_URL) == ['1.0.0', '2.0.0', '10.0.0']
+
+    def test_returns_none_for_unknown_canonical_url(self, tmp_path):
+        registry = PackageRegistry()
+        registry.load_package(write_tarball(tmp_path / 'package.tgz', package_files()))
+        assert registry.get_structure_definition('http://example.org/StructureDefinition/Unknown') is None
+        assert registry.get_structure_definition(f'{PROFILE_URL}|3.0.0') is None
+        assert f'{PROFILE_URL}|3.0.0' not in registry
+
+    def test_raises_for_missing_package(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            PackageRegistry().load_package(tmp_path / 'missing.tgz')
+
+    def test_raises_for_tarball_without_manifest(self, tmp_path):
+        with pytest.raises(ValueError):
+            PackageRegistry().load_package(write_tarball(tmp_path / 'package.tgz', {'StructureDefinition-TestProfile.json': structure_definition()}))
+
+    def test_clear(self, tmp_path):
+        registry = PackageRegistry()
+        registry.load_package(write_tarball(tmp_path / 'package.tgz', package_files()))
+        registry.clear()
+        assert len(registry) == 0 and registry.packages == []
+
+
+class TestResourceFactoryPackages:
+
+    @pytest.fixture(autouse=True)
+    def factory(self, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        mocker.patch.object(ResourceFactory, 'construction_cache', ModelRegistry())
+        return ResourceFactory()
+
+    def test_resolves_structure_definition_without_network(self, factory, tmp_path, no_network):
+        factory.load_package(write_tarball(tmp_path / 'package.tgz', package_files()))
+        assert factory.download_structure_definition(PROFILE_URL) == structure_definition()
+        no_network.assert_not_called()
+
+    def test_constructs_model_without_network(self, factory, tmp_path, no_network):
+        factory.load_package(write_directory(tmp_path / 'package', package_files()))
+        model = factory.construct_resource_model(f'{PROFILE_URL}|1.0.0')
+        assert model(value='test').value == 'test'
+        no_network.assert_not_called()
+
+    def test_downloads_unknown_profiles_without_version(self, factory, mocker):
+        response = mocker.Mock()
+        response.json.return_value = structure_definition()
+        get = mocker.patch('requests.Session.get', return_value=response)
+        factory.download_structure_definition(f'{PROFILE_URL}|1.0.0')
+        assert get.call_args.args[0] == f'{PROFILE_URL.rsplit("/", 1)[0]}-TestProfile.json'
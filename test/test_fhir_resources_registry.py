@@ -0,0 +1,151 @@
+import pytest
+from pydantic import create_model
+
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.packages import PackageRegistry
+from fhircraft.fhir.resources.registry import ModelRegistry, ModelKey, estimate_model_memory
+
+PROFILE_URL = 'http://example.org/StructureDefinition/TestProfile'
+
+
+def model(name='Test', fields=1):
+    return create_model(name, **{f'field{index}': (str, None) for index in range(fields)})
+
+
+def structure_definition(version='1.0.0', fhir_version='4.0.1', name='TestProfile'):
+    return {
+        'resourceType': 'StructureDefinition', 'url': PROFILE_URL, 'version': version, 'name': name,
+        'type': 'Test', 'fhirVersion': fhir_version,
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': 'Test.value', 'path': 'Test.value', 'min': 0, 'max': '1', 'type': [{'code': 'string'}]},
+        ]}
+    }
+
+
+class TestModelRegistry:
+
+    def test_get_by_url_version_and_release(self):
+        registry = ModelRegistry()
+        models = {(version, release): model() for version in ('1.0.0', '2.0.0') for release in ('R4', 'R5')}
+        for (version, release), entry in models.items():
+            registry.put(ModelKey(PROFILE_URL, version, release), entry)
+        assert registry.get(PROFILE_URL, '1.0.0', 'R5') is models['1.0.0', 'R5']
+        assert registry.get(f'{PROFILE_URL}|1.0.0', release='R4') is models['1.0.0', 'R4']
+        assert registry.get(PROFILE_URL, '3.0.0') is None
+        assert registry.get(PROFILE_URL, release='R4B') is None
+
+    def test_get_returns_latest_version_if_unspecified(self):
+        registry = ModelRegistry()
+        models = {version: model() for version in ('2.0.0', '10.0.0', '9.1.0')}
+        for version, entry in models.items():
+            registry.put(ModelKey(PROFILE_URL, version, 'R4'), entry)
+        assert registry.get(PROFILE_URL) is models['10.0.0']
+
+    def test_get_by_base_model(self):
+        registry = ModelRegistry()
+        resource_model, slice_model = model(), model()
+        registry.put(ModelKey(PROFILE_URL, '1.0.0', 'R4', FHIRBaseModel), resource_model)
+        registry.put(ModelKey(PROFILE_URL, '1.0.0', 'R4', FHIRSliceModel), slice_model)
+        assert registry.get(PROFILE_URL, base=FHIRBaseModel) is resource_model
+        assert registry.get(PROFILE_URL, base=FHIRSliceModel) is slice_model
+
+    def test_evicts_least_recently_used_models(self):
+        registry = ModelRegistry(maxsize=2)
+        keys = [ModelKey(f'{PROFILE_URL}{index}', None, 'R4') for index in range(3)]
+        registry.put(keys[0], model())
+        registry.put(keys[1], model())
+        registry.get(keys[0].url)
+        registry.put(keys[2], model())
+        assert registry.keys() == [keys[0], keys[2]]
+        assert registry.stats().evictions == 1
+
+    def test_evicts_models_exceeding_memory_bound(self):
+        small, large = model(fields=1), model(fields=50)
+        registry = ModelRegistry(max_memory=estimate_model_memory(small) + estimate_model_memory(large) // 2)
+        registry.put(ModelKey('small', None, 'R4'), small)
+        registry.put(ModelKey('large', None, 'R4'), large)
+        assert registry.keys() == [ModelKey('large', None, 'R4')]
+        assert registry.stats().memory == estimate_model_memory(large)
+
+    def test_resize_evicts_models(self):
+        registry = ModelRegistry()
+        for index in range(5):
+            registry.put(ModelKey(f'{PROFILE_URL}{index}', None, 'R4'), model())
+        registry.resize(maxsize=3)
+        assert len(registry) == 3 and registry.stats().maxsize == 3
+
+    def test_memory_accounting(self):
+        registry = ModelRegistry()
+        models = [model(fields=fields) for fields in (1, 10, 100)]
+        for index, entry in enumerate(models):
+            registry.put(ModelKey(f'{PROFILE_URL}{index}', None, 'R4'), entry)
+        assert registry.stats().memory == sum(estimate_model_memory(entry) for entry in models)
+        assert estimate_model_memory(models[2]) > estimate_model_memory(models[1]) > estimate_model_memory(models[0])
+        registry.invalidate(f'{PROFILE_URL}0')
+        assert registry.stats().memory == sum(estimate_model_memory(entry) for entry in models[1:])
+
+    def test_invalidate(self):
+        registry = ModelRegistry()
+        for version in ('1.0.0', '2.0.0'):
+            for release in ('R4', 'R5'):
+                registry.put(ModelKey(PROFILE_URL, version, release), model())
+        assert registry.invalidate(PROFILE_URL, '1.0.0', 'R4') == 1
+        assert registry.invalidate(f'{PROFILE_URL}|1.0.0') == 1
+        assert registry.invalidate(PROFILE_URL) == 2
+        assert PROFILE_URL not in registry
+
+    def test_statistics(self):
+        registry = ModelRegistry(maxsize=10)
+        registry.put(ModelKey(PROFILE_URL, None, 'R4'), model())
+        registry.get(PROFILE_URL)
+        registry.get(PROFILE_URL)
+        registry.get('http://example.org/Unknown')
+        stats = registry.stats()
+        assert (stats.hits, stats.misses, stats.size, stats.maxsize) == (2, 1, 1, 10)
+        registry.clear()
+        assert registry.stats()[:5] == (0, 0, 0, 0, 10)
+
+
+class TestFactoryConstructionCache:
+
+    @pytest.fixture(autouse=True)
+    def factory(self, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        mocker.patch.object(ResourceFactory, 'construction_cache', ModelRegistry())
+        return ResourceFactory()
+
+    def test_caches_models_by_version_and_release(self, factory):
+        models = {
+            (version, fhir_version): factory.construct_resource_model(structure_definition=structure_definition(version, fhir_version))
+                for version in ('1.0.0', '2.0.0') for fhir_version in ('4.0.1', '4.3.0')
+        }
+        assert len(set(models.values())) == 4
+        assert factory.construct_resource_model(structure_definition=structure_definition('1.0.0', '4.3.0')) is models['1.0.0', '4.3.0']
+        assert {key.release for key in factory.construction_cache.keys()} == {'R4', 'R4B'}
+
+    def test_caches_models_constructed_from_structure_definitions_by_url(self, factory):
+        model = factory.construct_resource_model(structure_definition=structure_definition())
+        assert factory.construction_cache.keys() == [ModelKey(PROFILE_URL, '1.0.0', 'R4', FHIRBaseModel)]
+        factory.package_registry.add_structure_definition(structure_definition())
+        assert factory.construct_resource_model(f'{PROFILE_URL}|1.0.0') is model
+        assert factory.construct_resource_model(structure_definition=structure_definition('2.0.0')) is not model
+
+    def test_caches_slice_models_separately(self, factory):
+        factory.package_registry.add_structure_definition(structure_definition())
+        resource_model = factory.construct_resource_model(PROFILE_URL)
+        slice_model = factory.construct_resource_model(PROFILE_URL, base_model=FHIRSliceModel)
+        assert issubclass(slice_model, FHIRSliceModel) and not issubclass(resource_model, FHIRSliceModel)
+
+    def test_invalidate_cache(self, factory):
+        model = factory.construct_resource_model(structure_definition=structure_definition())
+        assert factory.invalidate_cache(PROFILE_URL) == 1
+        assert factory.construct_resource_model(structure_definition=structure_definition()) is not model
+
+    @pytest.mark.parametrize('method', ['clear_cache', 'clear_chache'])
+    def test_clear_cache_clears_shared_cache(self, factory, method):
+        factory.construct_resource_model(structure_definition=structure_definition())
+        getattr(ResourceFactory(), method)()
+        assert len(ResourceFactory.construction_cache) == 0
+        assert 'construction_cache' not in vars(factory)
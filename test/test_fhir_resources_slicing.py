@@ -0,0 +1,337 @@
+import copy
+import pytest
+from typing import List, Optional, Union, get_args
+from pydantic import Field, ConfigDict, ValidationError
+
+from fhircraft.utils import get_all_models_from_field
+import fhircraft.fhir.resources.base as fhir_base
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+from fhircraft.fhir.resources.slicing import SliceDiscriminator, get_slice_discriminator_rules, matches_pattern, SLICE_BASE_TAG
+
+Coding = get_complex_FHIR_type('Coding')
+
+
+def structure_definition(discriminator=None):
+    slicing = {'slicing': {'discriminator': [discriminator], 'rules': 'open'}} if discriminator else {}
+    return {
+        'resourceType': 'StructureDefinition', 'url': 'http://example.org/StructureDefinition/Test', 'name': 'TestProfile', 
+        'type': 'Test', 'fhirVersion': '4.0.1', 'version': '1',
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': 'Test.coding', 'path': 'Test.coding', 'min': 1, 'max': '*', 'type': [{'code': 'Coding'}], **slicing},
+            {'id': 'Test.coding:sliceA', 'path': 'Test.coding', 'sliceName': 'sliceA', 'min': 1, 'max': '1', 'type': [{'code': 'Coding'}]},
+            {'id': 'Test.coding:sliceA.system', 'path': 'Test.coding.system', 'min': 1, 'max': '1', 'type': [{'code': 'uri'}], 'fixedUri': 'http://a'},
+            {'id': 'Test.coding:sliceB', 'path': 'Test.coding', 'sliceName': 'sliceB', 'min': 0, 'max': '1', 'type': [{'code': 'Coding'}], 'patternCoding': {'system': 'http://b'}},
+        ]}
+    }
+
+
+def construct_model(discriminator=None):
+    ResourceFactory.construction_cache.invalidate('http://example.org/StructureDefinition/Test')
+    model = ResourceFactory().construct_resource_model(structure_definition=structure_definition(discriminator))
+    # Resolve the forward references of the slice models derived from the complex types
+    namespace = {'Extension': get_complex_FHIR_type('Extension')}
+    for slice_model in get_all_models_from_field(model.model_fields['coding'], issubclass_of=FHIRSliceModel):
+        slice_model.model_rebuild(_types_namespace=namespace)
+    model.model_rebuild(_types_namespace=namespace)
+    return model
+
+
+class TestSliceDiscriminatorRules:
+
+    def test_rule_from_fixed_value_at_path(self):
+        slice_element = {'children': {'system': {'fixedUri': 'http://a'}}}
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'value', 'path': 'system'}]) == [('value', 'system', ['http://a'])]
+
+    def test_rule_from_pattern_of_ancestor(self):
+        slice_element = {'children': {'code': {'patternCodeableConcept': {'coding': [{'system': 's', 'code': 'a'}]}}}}
+        rules = get_slice_discriminator_rules(slice_element, [{'type': 'pattern', 'path': 'code.coding.code'}])
+        assert rules == [('pattern', 'code.coding.code', ['a'])]
+
+    def test_rule_from_choice_element(self):
+        slice_element = {'children': {'value[x]': {'patternString': 'x'}}}
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'value', 'path': 'value'}]) == [('value', 'value', ['x'])]
+
+    def test_rule_from_extension_profile(self):
+        slice_element = {'type': [{'code': 'Extension', 'profile': ['http://example.org/ext']}]}
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'value', 'path': 'url'}]) == [('value', 'url', ['http://example.org/ext'])]
+
+    @pytest.mark.parametrize('element, expected', [({'min': 1, 'max': '1'}, True), ({'min': 0, 'max': '0'}, False)])
+    def test_rule_from_exists(self, element, expected):
+        slice_element = {'children': {'value[x]': element}}
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'exists', 'path': 'value'}]) == [('exists', 'value', expected)]
+
+    def test_rule_from_type_at_path(self):
+        slice_element = {'type': [{'code': 'BackboneElement'}], 'children': {'resource': {'type': [{'code': 'Patient'}]}}}
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'type', 'path': 'resource'}]) == [('type', 'resource', ['Patient'])]
+
+    @pytest.mark.parametrize('slice_element, expected', [
+        ({'type': [{'code': 'Patient', 'profile': ['http://example.org/StructureDefinition/Patient']}]}, [('type', '$this', ['Patient'])]),
+        ({'type': [{'code': 'Quantity'}]}, None),
+        ({'type': [{'code': 'Resource'}]}, None),
+    ])
+    def test_rule_from_type_of_slice(self, slice_element, expected):
+        assert get_slice_discriminator_rules(slice_element, [{'type': 'type', 'path': '$this'}]) == expected
+
+    @pytest.mark.parametrize('discriminator', [
+        {'type': 'profile', 'path': '$this'},
+        {'type': 'value', 'path': 'system'},
+        {'type': 'value', 'path': "extension('http://example.org').value"},
+    ])
+    def test_unsupported_discriminators(self, discriminator):
+        assert get_slice_discriminator_rules({'children': {}}, [discriminator]) is None
+
+    def test_no_discriminators(self):
+        assert get_slice_discriminator_rules({'children': {}}, []) is None
+
+
+class TestSliceDiscriminator:
+
+    discriminator = SliceDiscriminator({
+        'SliceA': [('value', 'system', ['http://a'])],
+        'SliceB': [('pattern', 'code.coding', [{'system': 's', 'code': 'b'}])],
+        'SliceC': [('exists', 'value', True), ('type', 'resource', ['Patient'])],
+    })
+
+    @pytest.mark.parametrize('value, tag', [
+        ({'system': 'http://a', 'code': 'x'}, 'SliceA'),
+        ({'code': {'coding': [{'system': 's', 'code': 'a'}, {'system': 's', 'code': 'b', 'display': 'B'}]}}, 'SliceB'),
+        ({'value': 1, 'resource': {'resourceType': 'Patient'}}, 'SliceC'),
+        ({'resource': {'resourceType': 'Patient'}}, SLICE_BASE_TAG),
+        ({'system': 'http://c'}, SLICE_BASE_TAG),
+        (Coding(system='http://a'), SLICE_BASE_TAG),
+    ])
+    def test_dispatch(self, value, tag):
+        assert self.discriminator(value) == tag
+
+    def test_pattern_matching_of_model_instances(self):
+        assert matches_pattern([Coding(system='s', code='b', display='B')], [{'system': 's', 'code': 'b'}])
+        assert not matches_pattern([Coding(system='s', code='a')], [{'system': 's', 'code': 'b'}])
+
+
+class TestDiscriminatedSliceModels:
+
+    def test_sliced_field_uses_discriminator(self):
+        model = construct_model({'type': 'value', 'path': 'system'})
+        union, discriminator = get_args(get_args(model.model_fields['coding'].annotation)[0])
+        assert isinstance(discriminator.discriminator, SliceDiscriminator)
+
+    def test_elements_are_validated_against_their_slice(self):
+        model = construct_model({'type': 'value', 'path': 'system'})
+        instance = model.model_validate({'coding': [{'system': 'http://b'}, {'system': 'http://a'}, {'system': 'http://c'}]})
+        assert [type(coding).__name__ for coding in instance.coding] == ['SliceB', 'SliceA', 'Coding']
+
+    def test_slice_instances_are_kept(self):
+        model = construct_model({'type': 'value', 'path': 'system'})
+        SliceA = type(model.model_validate({'coding': [{'system': 'http://a'}]}).coding[0])
+        instance = model(coding=[SliceA(system='http://a')])
+        assert type(instance.coding[0]) is SliceA
+
+    def test_without_discriminator_falls_back_to_union(self):
+        model = construct_model()
+        field_info = get_args(get_args(model.model_fields['coding'].annotation)[0])[1]
+        assert field_info.metadata[0].union_mode == 'left_to_right'
+
+
+class Resource(FHIRBaseModel):
+    model_config = ConfigDict(extra='allow')
+    resourceType: str
+
+
+class Patient(Resource):
+    pass
+
+
+def bundle_structure_definition():
+    return {
+        'resourceType': 'StructureDefinition', 'url': 'http://example.org/StructureDefinition/TestBundle', 'name': 'TestBundle', 
+        'type': 'Bundle', 'fhirVersion': '4.0.1', 'version': '1',
+        'snapshot': {'element': [
+            {'id': 'Bundle', 'path': 'Bundle', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': 'Bundle.entry', 'path': 'Bundle.entry', 'min': 1, 'max': '*', 'type': [{'code': 'BackboneElement'}],
+             'slicing': {'discriminator': [{'type': 'type', 'path': 'resource'}], 'rules': 'open'}},
+            {'id': 'Bundle.entry.resource', 'path': 'Bundle.entry.resource', 'min': 0, 'max': '1', 'type': [{'code': 'Resource'}]},
+            {'id': 'Bundle.entry:patientEntry', 'path': 'Bundle.entry', 'sliceName': 'patientEntry', 'min': 1, 'max': '1', 'type': [{'code': 'BackboneElement'}]},
+            {'id': 'Bundle.entry:patientEntry.resource', 'path': 'Bundle.entry.resource', 'min': 1, 'max': '1', 'type': [{'code': 'Patient'}]},
+        ]}
+    }
+
+
+class TestTypeDiscriminatedSliceModels:
+
+    def setup_method(self):
+        ResourceFactory.construction_cache.invalidate('http://example.org/StructureDefinition/TestBundle')
+        self.model = ResourceFactory().construct_resource_model(structure_definition=bundle_structure_definition())
+        # Resolve the resource types, which are not constructed offline
+        namespace = {'Extension': get_complex_FHIR_type('Extension'), 'Resource': Resource, 'Patient': Patient}
+        for model in get_all_models_from_field(self.model.model_fields['entry']):
+            model.model_rebuild(_types_namespace=namespace, force=True)
+        self.model.model_rebuild(_types_namespace=namespace, force=True)
+
+    def test_entries_are_dispatched_by_resource_type(self):
+        instance = self.model.model_validate({'entry': [{'resource': {'resourceType': 'Observation'}}, {'resource': {'resourceType': 'Patient'}}]})
+        assert [type(entry).__name__ for entry in instance.entry] == ['BackboneElement', 'PatientEntry']
+        assert isinstance(instance.entry[1].resource, Patient)
+
+    def test_slice_cardinality_is_validated(self):
+        with pytest.raises(ValidationError, match='PatientEntry'):
+            self.model.model_validate({'entry': [{'resource': {'resourceType': 'Observation'}}]})
+
+
+class LeafSlice(FHIRSliceModel):
+    max_cardinality = 3
+    code: Optional[str] = None
+
+class RequiredLeafSlice(FHIRSliceModel):
+    min_cardinality, max_cardinality = 1, 1
+    code: str
+    values: List[str] = Field(min_length=2)
+
+class NestedSlice(FHIRSliceModel):
+    max_cardinality = 2
+    component: Optional[List[Union[LeafSlice, FHIRBaseModel]]] = None
+    required: Optional[List[Union[RequiredLeafSlice, FHIRBaseModel]]] = None
+
+class DeeplySlicedModel(FHIRBaseModel):
+    component: Optional[List[Union[NestedSlice, FHIRBaseModel]]] = None
+    name: Optional[str] = None
+
+
+class TestLazySliceMaterialization:
+
+    def test_slices_are_not_materialized_on_construction(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        assert 'component' not in instance.__dict__
+        assert instance.name is None
+
+    def test_slices_are_materialized_on_access(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        assert [type(entry) for entry in instance.component] == [NestedSlice, NestedSlice]
+        # Nested slices are only materialized once accessed
+        assert 'component' not in instance.component[0].__dict__
+        assert len(instance.component[0].component) == 3
+
+    def test_slices_are_materialized_by_fhirpath(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        instance.replace_fhirpath('component[1].component[2].code', 'a')
+        assert instance.component[1].component[2].code == 'a'
+        assert 'component' not in instance.component[0].__dict__
+
+    def test_assigned_slices_replace_placeholders(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        instance.component = []
+        assert instance.component == []
+
+    @pytest.mark.parametrize('duplicate', [copy.copy, copy.deepcopy])
+    def test_serialization_materializes_slices(self, duplicate):
+        instance = duplicate(DeeplySlicedModel.model_construct_with_slices())
+        assert len(instance.model_dump()['component']) == 2
+        assert len(instance.component[1].component) == 3
+
+    def test_lazy_instances_equal_materialized_instances(self):
+        lazy, materialized = DeeplySlicedModel.model_construct_with_slices(), DeeplySlicedModel.model_construct_with_slices()
+        materialized.component[0].component
+        materialized.component[1].component
+        assert lazy == materialized and materialized == DeeplySlicedModel.model_construct_with_slices()
+        assert repr(DeeplySlicedModel.model_construct_with_slices()) == repr(materialized)
+        assert 'component' in repr(DeeplySlicedModel.model_construct_with_slices())
+
+    def test_lazy_state_is_private(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        assert '_lazy_slices' not in instance.__dict__
+        assert instance.__pydantic_private__['_lazy_slices']
+
+    def test_modification_of_slices(self):
+        instance = NestedSlice.model_construct_with_slices()
+        assert not instance.has_been_modified
+        instance.component[0].code = 'a'
+        assert instance.has_been_modified
+
+
+class TestSliceCompletenessAndModifications:
+
+    def test_required_fields(self):
+        assert RequiredLeafSlice.get_required_fields() == {'code': 1, 'values': 2}
+
+    @pytest.mark.parametrize('values, complete', [
+        ({}, False),
+        ({'code': 'a'}, False),
+        ({'code': 'a', 'values': ['x']}, False),
+        ({'code': 'a', 'values': ['x', 'y']}, True),
+    ])
+    def test_completeness(self, values, complete):
+        assert RequiredLeafSlice.model_construct(**values).is_FHIR_complete == complete
+
+    def test_completeness_of_elements(self):
+        instance = NestedSlice.model_construct(required=[RequiredLeafSlice.model_construct(values=['x', 'y'])])
+        assert not instance.is_FHIR_complete
+        instance.required[0].code = 'a'
+        assert instance.is_FHIR_complete
+
+    def test_templates_are_not_modified(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        assert not instance.component[0].has_been_modified
+        assert not instance.component[0].component[0].has_been_modified
+
+    def test_modifications_of_elements_are_tracked(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        instance.replace_fhirpath('component[0].component[1].code', 'a')
+        assert instance.component[0].has_been_modified
+        assert instance.component[0].component[1].has_been_modified
+        assert not instance.component[1].has_been_modified
+
+    def test_revalidation_does_not_reset_modifications(self):
+        instance = NestedSlice.model_construct_with_slices()
+        instance.component[0].code = 'a'
+        instance.component[0].revalidate()
+        assert instance.has_been_modified
+
+    def test_instances_not_constructed_as_templates_are_modified(self):
+        assert LeafSlice(code='a').has_been_modified
+
+    def test_unused_slices_are_cleaned(self):
+        instance = DeeplySlicedModel.model_construct_with_slices()
+        instance.replace_fhirpath('component[1].component[2].code', 'a')
+        instance.replace_fhirpath('component[1].required[0].code', 'b')
+        instance.component[1].required[0].values = ['x', 'y']
+        instance = DeeplySlicedModel.clean_unusued_slice_instances(instance)
+        assert len(instance.component) == 1
+        assert [entry.code for entry in instance.component[0].component] == ['a']
+        assert [entry.code for entry in instance.component[0].required] == ['b']
+
+
+class TestCachedModelStructure:
+
+    def count_lookups(self, monkeypatch):
+        calls = []
+        get_all_models_from_field = fhir_base.get_all_models_from_field
+        monkeypatch.setattr(fhir_base, 'get_all_models_from_field', lambda *args, **kwargs: calls.append(args) or get_all_models_from_field(*args, **kwargs))
+        return calls
+
+    def test_sliced_elements_are_looked_up_once(self, monkeypatch):
+        fhir_base._model_structures.pop(DeeplySlicedModel, None)
+        calls = self.count_lookups(monkeypatch)
+        assert DeeplySlicedModel.get_sliced_elements() == {'component': [NestedSlice]}
+        lookups = len(calls)
+        DeeplySlicedModel.get_sliced_elements()
+        DeeplySlicedModel.model_construct_with_slices().component
+        assert len(calls) == lookups
+
+    def test_sliced_elements_are_not_shared(self):
+        DeeplySlicedModel.get_sliced_elements().clear()
+        assert DeeplySlicedModel.get_sliced_elements() == {'component': [NestedSlice]}
+
+    def test_sliced_element_paths_are_compiled_once(self):
+        paths = DeeplySlicedModel._get_sliced_element_paths()
+        assert DeeplySlicedModel._get_sliced_element_paths()['component'] is paths['component']
+
+    def test_rebuilt_models_are_inspected_again(self):
+        class ForwardSlicedModel(FHIRBaseModel):
+            component: Optional[List[Union['ForwardSlice', FHIRBaseModel]]] = None
+        assert ForwardSlicedModel.get_sliced_elements() == {}
+        class ForwardSlice(FHIRSliceModel):
+            pass
+        ForwardSlicedModel.model_rebuild(_types_namespace={'ForwardSlice': ForwardSlice})
+        assert ForwardSlicedModel.get_sliced_elements() == {'component': [ForwardSlice]}
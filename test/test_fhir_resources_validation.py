@@ -0,0 +1,353 @@
+import pytest
+from functools import partial
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import ValidationError, create_model, field_validator
+
+import fhircraft.fhir.resources.validators as fhir_validators
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+from fhircraft.fhir.resources.validation import deferred_validation, validate_constraints, validation_context, validation_report, ValidationLevel, enable_constraint_result_cache, disable_constraint_result_cache
+
+Quantity = get_complex_FHIR_type('Quantity')
+Coding = get_complex_FHIR_type('Coding')
+CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+
+
+class RequiredSlice(FHIRSliceModel):
+    min_cardinality = 1
+    code: Optional[str] = None
+
+ProfiledModel = create_model('ProfiledModel', 
+    __base__=FHIRBaseModel,
+    component=(Optional[List[RequiredSlice]], None),
+    coding=(Optional[Coding], None),
+    __validators__={
+        'component_slicing_cardinality_validator': field_validator('component', mode='after')(partial(
+            fhir_validators.validate_slicing_cardinalities, field_name='component')),
+        'FHIR_coding_pattern_constraint': field_validator('coding', mode='after')(partial(
+            fhir_validators.validate_FHIR_element_pattern, pattern=Coding(system='http://example.org'))),
+    }
+)
+
+
+def test_validation_context_is_shared_by_nested_scopes():
+    with validation_context() as outer:
+        with validation_context() as inner:
+            assert inner is outer
+
+
+class TestDeferredValidation:
+
+    def test_constraints_are_not_evaluated_immediately(self):
+        with deferred_validation():
+            quantity = Quantity.model_validate({'value': 1.0, 'code': 'mg'})
+        assert quantity.has_pending_validations
+
+    def test_structure_is_validated_immediately(self):
+        with pytest.raises(ValidationError):
+            with deferred_validation():
+                Quantity.model_validate({'value': 'not-a-number'})
+
+    def test_validate_constraints_fails_invalid_instance(self):
+        with deferred_validation():
+            quantity = Quantity.model_validate({'value': 1.0, 'code': 'mg'})
+        with pytest.raises(ValidationError, match='qty-3'):
+            quantity.validate_constraints()
+        assert quantity.has_pending_validations
+
+    def test_validate_constraints_clears_valid_instance(self):
+        with deferred_validation():
+            quantity = Quantity.model_validate({'value': 1.0, 'code': 'mg', 'system': 'http://unitsofmeasure.org'})
+        assert quantity.validate_constraints() is quantity
+        assert not quantity.has_pending_validations
+
+    def test_nested_constraints_are_validated_with_root_instance(self):
+        with deferred_validation():
+            concept = CodeableConcept.model_validate({'coding': [{'code': 'a', 'extension': [{'url': 'http://example.org'}]}]})
+        with pytest.raises(ValidationError, match='ext-1'):
+            concept.validate_constraints()
+
+    def test_nested_instances_are_cleared_with_root_instance(self):
+        with deferred_validation():
+            concept = CodeableConcept.model_validate({'coding': [{'code': 'a'}]})
+        concept.validate_constraints()
+        assert not concept.has_pending_validations
+        assert not concept.coding[0].has_pending_validations
+
+    def test_instances_are_validated_immediately_outside_deferred_mode(self):
+        with pytest.raises(ValidationError, match='qty-3'):
+            Quantity.model_validate({'value': 1.0, 'code': 'mg'})
+
+
+class TestValidateConstraints:
+
+    def setup_method(self):
+        with deferred_validation():
+            self.instances = [
+                Quantity.model_validate({'value': 1.0, 'code': 'mg', 'system': 'http://unitsofmeasure.org'}),
+                Quantity.model_validate({'value': 1.0, 'code': 'mg'}),
+            ]
+
+    def test_batch_validation(self):
+        valid, invalid = validate_constraints(self.instances)
+        assert valid is None
+        assert isinstance(invalid, ValidationError)
+        assert not self.instances[0].has_pending_validations
+        assert self.instances[1].has_pending_validations
+
+    def test_batch_validation_with_executor(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            valid, invalid = validate_constraints(self.instances, executor=executor)
+        assert valid is None
+        assert isinstance(invalid, ValidationError)
+
+    def test_batch_validation_of_instances_without_pending_validations(self):
+        assert validate_constraints([Quantity(value=1.0)]) == [None]
+
+
+class TestValidationLevels:
+
+    @pytest.mark.parametrize('level', [ValidationLevel.STRUCTURE, ValidationLevel.CARDINALITY, 'structure', 'cardinality'])
+    def test_lower_levels_skip_invariants(self, level):
+        quantity = Quantity.model_validate({'value': 1.0, 'code': 'mg'}, context={'validation_level': level})
+        assert quantity.code == 'mg'
+
+    @pytest.mark.parametrize('level', [ValidationLevel.INVARIANTS, ValidationLevel.PATTERNS, None])
+    def test_higher_levels_validate_invariants(self, level):
+        with pytest.raises(ValidationError, match='qty-3'):
+            Quantity.model_validate({'value': 1.0, 'code': 'mg'}, context={'validation_level': level})
+
+    def test_level_is_honored_by_json_validation(self):
+        Quantity.model_validate_json('{"value": 1.0, "code": "mg"}', context={'validation_level': 'structure'})
+
+    def test_structure_level_still_validates_structure(self):
+        with pytest.raises(ValidationError):
+            Quantity.model_validate({'value': 'not-a-number'}, context={'validation_level': ValidationLevel.STRUCTURE})
+
+    def test_invalid_level(self):
+        with pytest.raises(ValueError, match='Invalid validation level'):
+            Quantity.model_validate({'value': 1.0}, context={'validation_level': 'everything'})
+
+    @pytest.mark.parametrize('level, raises', [
+        (ValidationLevel.STRUCTURE, False),
+        (ValidationLevel.CARDINALITY, True),
+        (ValidationLevel.PATTERNS, True),
+    ])
+    def test_slicing_cardinalities_are_validated_from_cardinality_level(self, level, raises):
+        validate = partial(ProfiledModel.model_validate, {'component': []}, context={'validation_level': level})
+        if raises:
+            with pytest.raises(ValidationError, match='min. cardinality'):
+                validate()
+        else:
+            validate()
+
+    @pytest.mark.parametrize('level, raises', [
+        (ValidationLevel.INVARIANTS, False),
+        (ValidationLevel.PATTERNS, True),
+    ])
+    def test_patterns_are_validated_from_patterns_level(self, level, raises):
+        validate = partial(ProfiledModel.model_validate, {'coding': {'system': 'http://other.org'}}, context={'validation_level': level})
+        if raises:
+            with pytest.raises(ValidationError, match='pattern'):
+                validate()
+        else:
+            validate()
+
+
+class TestValidationReport:
+
+    def test_collects_all_failed_invariants(self):
+        report = CodeableConcept.model_validate_with_report({
+            'coding': [{'code': 'a', 'extension': [{'url': 'http://example.org'}, {'url': 'http://example.org'}]}],
+        })
+        assert not report.is_valid
+        assert [(issue.key, issue.location) for issue in report.errors] == [
+            ('ext-1', 'CodeableConcept.coding[0].extension[0]'),
+            ('ext-1', 'CodeableConcept.coding[0].extension[1]'),
+        ]
+        assert report.resource.coding[0].code == 'a'
+
+    def test_valid_instance(self):
+        report = Quantity.model_validate_with_report({'value': 1.0, 'code': 'mg', 'system': 'http://unitsofmeasure.org'})
+        assert report.is_valid
+        assert report.issues == []
+        assert report.to_operation_outcome()['issue'][0]['severity'] == 'information'
+
+    def test_structural_errors_are_reported(self):
+        report = Quantity.model_validate_with_report({'value': 'not-a-number'})
+        assert report.resource is None
+        assert {(issue.code, issue.location) for issue in report.errors} == {('structure', 'Quantity.value')}
+
+    def test_slicing_and_pattern_failures_are_reported(self):
+        report = ProfiledModel.model_validate_with_report({'component': [], 'coding': {'system': 'http://other.org'}})
+        assert sorted((issue.code, issue.location) for issue in report.errors) == [
+            ('structure', 'ProfiledModel.component'), 
+            ('value', 'ProfiledModel.coding'),
+        ]
+
+    def test_engine_failures_are_reported_as_warnings_without_traceback(self):
+        with validation_report() as report, validation_context():
+            fhir_validators.validate_model_constraint(Coding.model_construct(code='a'), expression='code.(', human='Invalid', key='test-1', severity='error')
+        issue, = report.warnings
+        assert issue.code == 'exception'
+        assert 'Traceback' not in issue.message
+
+    def test_conversion_to_operation_outcome(self):
+        report = Quantity.model_validate_with_report({'value': 1.0, 'code': 'mg'})
+        assert report.to_operation_outcome() == {
+            'resourceType': 'OperationOutcome',
+            'issue': [{
+                'severity': 'error',
+                'code': 'invariant',
+                'diagnostics': 'If a code for the unit is present, the system SHALL also be present. [qty-3] -> "code.empty() or system.exists()"',
+                'expression': ['Quantity'],
+            }],
+        }
+
+    def test_failures_are_raised_outside_report(self):
+        with pytest.raises(AssertionError, match='test-1'):
+            fhir_validators.validate_model_constraint(Coding.model_construct(system='s'), expression='code.exists()', human='Code', key='test-1', severity='error')
+
+
+class TestConstraintResultCache:
+
+    def setup_method(self):
+        self.cache = enable_constraint_result_cache(maxsize=100)
+
+    def teardown_method(self):
+        disable_constraint_result_cache()
+
+    def validate(self, instance, expression='code.exists()'):
+        with validation_context():
+            fhir_validators.validate_model_constraint(instance, expression=expression, human='Code', key='test-1', severity='error')
+
+    def test_identical_elements_are_validated_once(self):
+        for _ in range(3):
+            self.validate(Coding.model_construct(system='s', code='a'))
+        assert (self.cache.misses, self.cache.hits) == (1, 2)
+        assert self.cache.hit_rate == pytest.approx(2/3)
+
+    def test_different_elements_are_validated_separately(self):
+        self.validate(Coding.model_construct(system='s', code='a'))
+        self.validate(Coding.model_construct(system='s', code='b'))
+        assert (self.cache.misses, self.cache.hits) == (2, 0)
+
+    def test_failed_constraints_are_not_cached(self):
+        for _ in range(2):
+            with pytest.raises(AssertionError):
+                self.validate(Coding.model_construct(system='s'))
+        assert len(self.cache) == 0
+
+    def test_constraints_depending_on_context_are_not_cached(self):
+        self.validate(Coding.model_construct(code='a'), expression='%resource.code.exists()')
+        assert (len(self.cache), self.cache.misses) == (0, 0)
+
+    def test_native_invariants_are_not_cached(self):
+        self.validate(Quantity.model_construct(value=1.0), expression='code.empty() or system.exists()')
+        assert (len(self.cache), self.cache.misses) == (0, 0)
+
+    def test_least_recently_used_results_are_evicted(self):
+        self.cache.maxsize = 2
+        for code in ('a', 'b', 'c'):
+            self.validate(Coding.model_construct(code=code))
+        assert (len(self.cache), self.cache.evictions) == (2, 1)
+
+    def test_model_validation_uses_cache(self):
+        Period = get_complex_FHIR_type('Period')
+        data = {'start': '2020-01-01', 'end': '2021-01-01'}
+        Period.model_validate(data)
+        misses = self.cache.misses
+        Period.model_validate(data)
+        assert self.cache.misses == misses
+        assert self.cache.hits > 0
+
+
+    def test_nested_elements_with_different_content_are_validated_separately(self):
+        concept = lambda code: CodeableConcept.model_construct(coding=[Coding.model_construct(code=code)])
+        self.validate(concept('a'), expression='coding.exists()')
+        self.validate(concept('b'), expression='coding.exists()')
+        self.validate(concept('a'), expression='coding.exists()')
+        assert (self.cache.misses, self.cache.hits) == (2, 1)
+
+    def test_each_instance_is_hashed_once_per_validation(self, mocker):
+        from fhircraft.fhir.resources import validation
+        blake2b = mocker.spy(validation.hashlib, 'blake2b')
+        codings = [Coding.model_construct(code=code) for code in 'abc']
+        concepts = [CodeableConcept.model_construct(coding=codings) for _ in range(2)]
+        with validation_context():
+            for instance in [*codings, *concepts]:
+                fhir_validators.validate_model_constraint(instance, expression='id.empty()', human='Id', key='test-1', severity='error')
+        # The concepts reuse the hashes of the codings computed when validating them
+        assert blake2b.call_count == len(codings) + len(concepts)
+
+class TestIncrementalRevalidation:
+
+    Period = get_complex_FHIR_type('Period')
+    Encounter = create_model('Encounter', __base__=FHIRBaseModel, period=(Optional[Period], None), coding=(Optional[List[Coding]], None))
+
+    def record_constraints(self, monkeypatch):
+        keys = []
+        validate = fhir_validators._validate_FHIR_element_constraint
+        def recorder(value, expression, human, key, severity):
+            keys.append(key)
+            return validate(value, expression, human, key, severity)
+        monkeypatch.setattr(fhir_validators, '_validate_FHIR_element_constraint', recorder)
+        return keys
+
+    def test_assigned_fields_are_tracked(self):
+        instance = self.Encounter(period={'start': '2020-01-01'})
+        assert not instance.period.modified_fields
+        instance.period.end = '2021-01-01'
+        assert instance.period.modified_fields == {'end'}
+
+    def test_revalidation_clears_modified_fields(self):
+        instance = self.Encounter(period={'start': '2020-01-01'})
+        instance.period.end = '2021-01-01'
+        assert instance.revalidate() is instance
+        assert not instance.period.modified_fields
+
+    def test_revalidation_detects_violated_constraints(self):
+        instance = self.Encounter(period={'start': '2020-01-01'})
+        instance.period.end = '2019-01-01'
+        with pytest.raises(ValidationError, match='per-1') as error:
+            instance.revalidate()
+        assert error.value.errors()[0]['loc'] == ('period',)
+        assert instance.period.modified_fields == {'end'}
+
+    def test_revalidation_detects_violated_constraints_on_type_choice_elements(self):
+        Extension = get_complex_FHIR_type('Extension')
+        instance = Extension(url='http://example.org', extension=[{'url': 'http://example.org/nested', 'valueString': 'a'}])
+        instance.valueString = 'b'
+        with pytest.raises(ValidationError, match='ext-1'):
+            instance.revalidate()
+
+    def test_revalidation_detects_invalid_values(self):
+        instance = self.Encounter(coding=[{'code': 'a'}])
+        instance.coding[0].system = 1
+        with pytest.raises(ValidationError) as error:
+            instance.revalidate()
+        assert error.value.errors()[0]['loc'] == ('coding', 0, 'system')
+
+    def test_only_constraints_reading_modified_fields_are_validated(self, monkeypatch):
+        instance = self.Encounter(period={'start': '2020-01-01', 'end': '2021-01-01'})
+        keys = self.record_constraints(monkeypatch)
+        instance.period.id = 'period-1'
+        instance.revalidate()
+        assert 'per-1' not in keys
+        instance.period.end = '2022-01-01'
+        instance.revalidate()
+        assert 'per-1' in keys
+
+    def test_unmodified_instances_are_not_validated(self, monkeypatch):
+        instance = self.Encounter(period={'start': '2020-01-01'}, coding=[{'code': 'a'}])
+        keys = self.record_constraints(monkeypatch)
+        instance.revalidate()
+        assert keys == []
+
+    def test_fhirpath_replacement_of_list_entries_is_tracked(self):
+        instance = self.Encounter(coding=[{'code': 'a'}])
+        instance.replace_fhirpath('coding[0]', Coding(code='b'))
+        assert instance.modified_fields == {'coding'}
+        instance.revalidate()
+        assert not instance.modified_fields
@@ -0,0 +1,93 @@
+import pytest
+from typing import List, Optional, Union
+from pydantic import BaseModel
+
+import fhircraft.fhir.resources.validators as fhir_validators
+from fhircraft.fhir.resources.base import FHIRBaseModel, FHIRSliceModel, _model_structures
+from fhircraft.fhir.resources.datatypes import get_complex_FHIR_type
+
+
+def test_constraint_expression_is_parsed_once():
+    # Analyze the dependencies of the constraint beforehand, as the analysis parses the expression as well
+    fhir_validators.get_constraint_dependencies('code.exists()')
+    fhir_validators._compile_FHIRPath_expression.cache_clear()
+    Coding = get_complex_FHIR_type('Coding')
+    for _ in range(3):
+        fhir_validators.validate_model_constraint(Coding.model_construct(code='a'), expression='code.exists()', human='Code', key='test-1', severity='error')
+    info = fhir_validators._compile_FHIRPath_expression.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+def test_constraint_with_compiled_expression_fails_invalid_value():
+    Coding = get_complex_FHIR_type('Coding')
+    with pytest.raises(AssertionError):
+        fhir_validators.validate_model_constraint(Coding.model_construct(system='s'), expression='code.exists()', human='Code', key='test-1', severity='error')
+
+def test_constraint_is_evaluated_once_per_object_and_validation(monkeypatch):
+    from collections import Counter
+    from fhircraft.fhir.resources.invariants import NATIVE_INVARIANTS, ele_1
+    evaluations = Counter()
+    def counting_ele_1(expression):
+        def invariant(instance):
+            if isinstance(instance, BaseModel):
+                evaluations[id(instance), expression] += 1
+            return ele_1(instance)
+        return invariant
+    for expression, invariant in list(NATIVE_INVARIANTS.items()):
+        if invariant is ele_1:
+            monkeypatch.setitem(NATIVE_INVARIANTS, expression, counting_ele_1(expression))
+    CodeableConcept = get_complex_FHIR_type('CodeableConcept')
+    extension = {'url': 'http://example.org', 'valueString': 'a'}
+    CodeableConcept.model_validate({
+        'coding': [{'code': 'a', 'extension': [extension]}, {'code': 'b', 'extension': [extension, extension]}],
+        'extension': [extension],
+    })
+    # 1 CodeableConcept, 2 Coding, 4 Extension objects
+    assert len({instance for instance, _ in evaluations}) == 7
+    # Each expression of ele-1 (which differ between the element and the type definitions in R4B) is evaluated once
+    assert set(evaluations.values()) == {1}
+
+
+class SliceA(FHIRSliceModel):
+    min_cardinality, max_cardinality = 1, 2
+
+class SliceB(FHIRSliceModel):
+    min_cardinality, max_cardinality = 0, 1
+
+class SlicedModel(FHIRBaseModel):
+    component: Optional[List[Union[SliceA, SliceB]]] = None
+
+
+class TestSlicingCardinalities:
+
+    def validate(self, *values):
+        return fhir_validators.validate_slicing_cardinalities(SlicedModel, list(values), field_name='component')
+
+    def test_valid_cardinalities(self):
+        values = self.validate(SliceA(), SliceA(), SliceB())
+        assert len(values) == 3
+
+    def test_min_cardinality_violated(self):
+        with pytest.raises(AssertionError, match="SliceA.*min. cardinality"):
+            self.validate(SliceB())
+
+    def test_max_cardinality_violated(self):
+        with pytest.raises(AssertionError, match="SliceB.*max. cardinality"):
+            self.validate(SliceA(), SliceB(), SliceB())
+
+    def test_slices_are_looked_up_once_per_field(self, monkeypatch):
+        _model_structures.pop(SlicedModel, None)
+        calls = []
+        get_all_models_from_field = fhir_validators.get_all_models_from_field
+        monkeypatch.setattr(fhir_validators, 'get_all_models_from_field', lambda *args, **kwargs: calls.append(args) or get_all_models_from_field(*args, **kwargs))
+        for _ in range(3):
+            self.validate(SliceA())
+        assert len(calls) == 1
+
+def test_constraints_sharing_a_key_with_different_expressions_are_evaluated_separately():
+    from fhircraft.fhir.resources.validation import validation_context
+    Coding = get_complex_FHIR_type('Coding')
+    coding = Coding.model_construct(system='s')
+    with validation_context():
+        fhir_validators.validate_model_constraint(coding, expression='system.exists()', human='System', key='test-1', severity='error')
+        with pytest.raises(AssertionError):
+            fhir_validators.validate_model_constraint(coding, expression='code.exists()', human='Code', key='test-1', severity='error')
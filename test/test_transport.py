@@ -0,0 +1,209 @@
+import json
+import threading
+import pytest
+import requests
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import fhircraft.transport as transport
+from fhircraft.transport import http_get, fetch_concurrently, get_settings, get_session
+from fhircraft.fhir.resources.base import FHIRSliceModel
+from fhircraft.fhir.resources.factory import ResourceFactory
+from fhircraft.fhir.resources.packages import PackageRegistry
+from fhircraft.fhir.resources.registry import ModelRegistry
+from fhircraft.utils import load_url, get_all_models_from_field
+
+
+class FHIRServer(ThreadingHTTPServer):
+    """
+    Local stand-in of a FHIR server, serving JSON content by path.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FHIRRequestHandler)
+        self.routes = {}
+        self.failures = Counter()
+        self.requests = Counter()
+        self.client_ports = set()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class FHIRRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests[self.path] += 1
+        self.server.client_ports.add(self.client_address[1])
+        if self.server.failures[self.path] > 0:
+            self.server.failures[self.path] -= 1
+            status, body = 503, b''
+        elif self.path in self.server.routes:
+            status, body = 200, json.dumps(self.server.routes[self.path]).encode()
+        else:
+            status, body = 404, b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FHIRServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def session(mocker):
+    mocker.patch.object(transport, 'BACKOFF_FACTOR', 0)
+    mocker.patch.object(transport, 'load_env_variables', return_value={})
+    transport.reload_settings()
+    yield get_session()
+    transport.reload_settings()
+
+
+def structure_definition(url, slice_profiles=()):
+    return {
+        'resourceType': 'StructureDefinition', 'url': url, 'version': '1.0.0', 'name': url.rsplit('/', 1)[-1],
+        'type': 'Test', 'fhirVersion': '4.0.1',
+        'snapshot': {'element': [
+            {'id': 'Test', 'path': 'Test', 'min': 0, 'max': '*', 'constraint': []},
+            {'id': 'Test.value', 'path': 'Test.value', 'min': 0, 'max': '1', 'type': [{'code': 'string'}]},
+            {'id': 'Test.item', 'path': 'Test.item', 'min': 0, 'max': '*', 'type': [{'code': 'string'}]},
+            *[
+                {'id': f'Test.item:slice{index}', 'path': 'Test.item', 'sliceName': f'slice{index}', 'min': 0, 'max': '1',
+                 'type': [{'code': 'string', 'profile': [profile]}]}
+                    for index, profile in enumerate(slice_profiles)
+            ],
+        ]}
+    }
+
+
+class TestSettings:
+
+    def test_settings_are_read_once(self):
+        get_settings()
+        get_settings()
+        transport.load_env_variables.assert_called_once()
+
+    def test_session_is_configured_from_settings(self):
+        transport.load_env_variables.return_value = {'PROXY_URL_HTTPS': 'http://proxy:8080', 'CERTIFICATE_BUNDLE_PATH': '/path/to/bundle.pem'}
+        transport.reload_settings()
+        assert get_session().proxies['https'] == 'http://proxy:8080'
+        assert get_session().verify == '/path/to/bundle.pem'
+
+
+class TestHttpGet:
+
+    def test_returns_response(self, server):
+        server.routes['/data.json'] = {'key': 'value'}
+        assert http_get(f'{server.url}/data.json').json() == {'key': 'value'}
+
+    def test_reuses_connections(self, server):
+        server.routes['/data.json'] = {'key': 'value'}
+        for _ in range(5):
+            http_get(f'{server.url}/data.json')
+        assert server.requests['/data.json'] == 5
+        assert len(server.client_ports) == 1
+
+    def test_retries_transient_failures(self, server):
+        server.routes['/data.json'] = {'key': 'value'}
+        server.failures['/data.json'] = 2
+        response = http_get(f'{server.url}/data.json')
+        assert response.status_code == 200
+        assert server.requests['/data.json'] == 3
+
+    def test_returns_failed_response_after_retries(self, server):
+        server.failures['/data.json'] = 10
+        assert http_get(f'{server.url}/data.json').status_code == 503
+        assert server.requests['/data.json'] == transport.MAX_RETRIES + 1
+
+    def test_does_not_retry_connection_errors(self, server):
+        url = f'{server.url}/data.json'
+        server.shutdown()
+        server.server_close()
+        with pytest.raises(requests.ConnectionError):
+            http_get(url)
+        assert get_session().get_adapter(url).max_retries.connect == 0
+
+    def test_load_url(self, server):
+        server.routes['/data.json'] = {'key': 'value'}
+        assert load_url(f'{server.url}/data.json') == {'key': 'value'}
+
+
+class TestFetchConcurrently:
+
+    def test_fetches_concurrently(self):
+        barrier = threading.Barrier(4, timeout=5)
+        def fetch(url):
+            barrier.wait()
+            return url.upper()
+        assert fetch_concurrently(['a', 'b', 'c', 'd'], fetch, max_workers=4) == {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'}
+
+    def test_omits_failed_fetches(self):
+        def fetch(url):
+            if url == 'b':
+                raise ValueError()
+            return url
+        assert fetch_concurrently(['a', 'b'], fetch) == {'a': 'a'}
+
+
+class TestPrefetchProfiles:
+
+    @pytest.fixture(autouse=True)
+    def factory(self, mocker):
+        mocker.patch.object(ResourceFactory, 'package_registry', PackageRegistry())
+        mocker.patch.object(ResourceFactory, 'construction_cache', ModelRegistry())
+        return ResourceFactory()
+
+    def serve_profile(self, server, name, slice_profiles=()):
+        url = f'{server.url}/StructureDefinition/{name}'
+        server.routes[f'/StructureDefinition-{name}.json'] = structure_definition(url, slice_profiles)
+        return url
+
+    def test_prefetches_slice_profiles_recursively(self, factory, server):
+        nested_profile = self.serve_profile(server, 'Nested')
+        profiles = [self.serve_profile(server, f'Profile{index}', [nested_profile]) for index in range(3)]
+        prefetched = factory.prefetch_profiles(structure_definition('http://example.org/Test', profiles))
+        assert prefetched == [*profiles, nested_profile]
+        assert set(factory.prefetched_structure_definitions) == {*profiles, nested_profile}
+        assert server.requests['/StructureDefinition-Nested.json'] == 1
+
+    def test_prefetched_profiles_are_consumed_without_requests(self, factory, server):
+        profile = self.serve_profile(server, 'Profile')
+        factory.prefetch_profiles(structure_definition('http://example.org/Test', [profile]))
+        assert factory.download_structure_definition(profile)['url'] == profile
+        assert server.requests['/StructureDefinition-Profile.json'] == 1
+        assert profile not in factory.prefetched_structure_definitions
+
+    def test_skips_unavailable_profiles(self, factory, server):
+        profile = f'{server.url}/StructureDefinition/Missing'
+        assert factory.prefetch_profiles(structure_definition('http://example.org/Test', [profile])) == []
+
+    def test_prefetched_profiles_are_not_shared_between_factories(self, factory, server):
+        profile = self.serve_profile(server, 'Profile')
+        factory.prefetch_profiles(structure_definition('http://example.org/Test', [profile]))
+        assert ResourceFactory().prefetched_structure_definitions == {}
+        factory.clear_cache()
+        assert factory.prefetched_structure_definitions == {}
+
+    def test_constructs_slice_models_from_prefetched_profiles(self, factory, server):
+        nested_profile = self.serve_profile(server, 'Nested')
+        profiles = [self.serve_profile(server, f'Profile{index}', [nested_profile]) for index in range(2)]
+        model = factory.construct_resource_model(structure_definition=structure_definition('http://example.org/Test', profiles))
+        slice_models = get_all_models_from_field(model.model_fields['item'], issubclass_of=FHIRSliceModel)
+        assert {slice_model.__name__ for slice_model in slice_models} == {'Profile0', 'Profile1'}
+        assert all(count == 1 for count in server.requests.values())
+        assert factory.prefetched_structure_definitions == {}
@@ -126,7 +126,7 @@ class TestLoadUrl:
         mock_response.headers = {'Content-Type': 'application/json'}
         mock_response.json.return_value = {"key": "value"}
         mock_response.raise_for_status.return_value = None
-        mocker.patch('requests.get', return_value=mock_response)
+        mocker.patch('requests.Session.get', return_value=mock_response)
     
         result = load_url(url)
         assert result == {"key": "value"}
@@ -137,7 +137,7 @@ class TestLoadUrl:
         mock_response.headers = {'Content-Type': 'application/x-yaml'}
         mock_response.text = "key: value"
         mock_response.raise_for_status.return_value = None
-        mocker.patch('requests.get', return_value=mock_response)
+        mocker.patch('requests.Session.get', return_value=mock_response)
     
         result = load_url(url)
         assert result == {"key": "value"}
@@ -148,7 +148,7 @@ class TestLoadUrl:
         mock_response.headers = {'Content-Type': 'Application/Json'}
         mock_response.json.return_value = {"key": "value"}
         mock_response.raise_for_status.return_value = None
-        mocker.patch('requests.get', return_value=mock_response)
+        mocker.patch('requests.Session.get', return_value=mock_response)
     
         result = load_url(url)
         assert result == {"key": "value"}
@@ -163,7 +163,7 @@ class TestLoadUrl:
         mock_response = mocker.Mock()
         mock_response.headers = {'Content-Type': 'text/plain'}
         mock_response.raise_for_status.return_value = None
-        mocker.patch('requests.get', return_value=mock_response)
+        mocker.patch('requests.Session.get', return_value=mock_response)
     
         with pytest.raises(ValueError, match="Unsupported content type. Please provide a URL that returns .yaml, .yml, or .json content."):
             load_url(url)